@@ -129,9 +129,19 @@ function checkCurrentUrl() {
 }
 
 function pollCvData() {
-  fetch(LOCAL_CV_SERVER)
+  chrome.storage.local.get(['visionToken'], function(result) {
+    if (result.visionToken) fetchCvData(result.visionToken);
+  });
+}
+
+// The vision server keeps one pipeline per login; its dashboard shows the token that reads ours
+function fetchCvData(visionToken) {
+  fetch(LOCAL_CV_SERVER, { headers: { 'Authorization': `Bearer ${visionToken}` } })
     .then(res => res.json())
     .then(data => {
+      // The token is wrong or its vision session has ended
+      if (data.error) return;
+
       // WAVE DETECTION IMPROVEMENT - Remember when we see a wave
       if (data.wave === 'detected') {
         lastWaveDetectedTime = Date.now();
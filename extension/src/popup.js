@@ -5,6 +5,7 @@ const loginSection = document.getElementById('login-section');
 const petSection = document.getElementById('pet-section');
 const loginBtn = document.getElementById('login-btn');
 const emailInput = document.getElementById('email-input');
+const tokenInput = document.getElementById('token-input');
 const logoutBtn = document.getElementById('logout-btn');
 const loginError = document.getElementById('login-error');
 const statusMessage = document.getElementById('status-message');
@@ -53,8 +54,9 @@ document.addEventListener('DOMContentLoaded', function() {
 // Handle simple email login
 function handleLogin() {
   try {
-    // Get email from input
+    // Get email and vision token from input
     const email = emailInput.value.trim();
+    const visionToken = tokenInput.value.trim();
     
     // Validate email
     if (!email || !validateEmail(email)) {
@@ -69,7 +71,8 @@ function handleLogin() {
     // Store user data
     chrome.storage.local.set({
       isLoggedIn: true,
-      userEmail: email
+      userEmail: email,
+      visionToken: visionToken
     }, function() {
       console.log('User logged in with email:', email);
       
@@ -116,7 +119,8 @@ function handleLogout() {
     // Clear storage
     chrome.storage.local.set({
       isLoggedIn: false,
-      userEmail: null
+      userEmail: null,
+      visionToken: null
     });
     
     // Send logout message to background script
@@ -126,8 +130,9 @@ function handleLogout() {
     petSection.classList.add('hidden');
     loginSection.classList.remove('hidden');
     
-    // Clear email input
+    // Clear email and token inputs
     emailInput.value = '';
+    tokenInput.value = '';
   } catch (error) {
     console.error('Logout error:', error);
     showLoginError('Logout failed. Please try again.');
@@ -1,108 +1,82 @@
 import sys
-import time
-import threading
-import datetime
-import requests
-import cv2
-from flask import Flask, jsonify, render_template, request, redirect, url_for, session
 import os
+import time
+from functools import partial
+from flask import Flask, Response, jsonify, render_template, request, redirect, url_for, session
 
-# Import your detector classes
+# Import the per-session pipeline manager
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from emotion_detector import EmotionDetector
-from focus_detector import SimpleFocusDetector
-from gesture_detector import GestureDetector
+from pipeline import VisionPipeline
+from pipeline_config import load_pipeline_config
+from process_pipeline import ProcessPipeline
+import metrics
+from sessions import SessionManager
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)  # For session management
 
 # Configuration
-DATA_SEND_INTERVAL = 1  # Seconds between data sends
+DATA_HEARTBEAT_INTERVAL = 5  # Seconds between posts when nothing changes (changes are posted right away)
+SUMMARY_INTERVAL = float(os.environ.get("VISION_SUMMARY_INTERVAL", 0))  # Seconds between summary posts; 0 = post changes
 REMOTE_SERVER_URL = "http://localhost:3000/api/cv-event"  # Your remote endpoint
+MAX_SESSIONS = int(os.environ.get("VISION_MAX_SESSIONS", 32))  # Concurrent logged-in users
+MAX_WORKERS = int(os.environ.get("VISION_MAX_WORKERS", os.cpu_count() or 1))  # Shared detection pool size
+MAX_FRAME_BYTES = 2 * 1024 * 1024  # Reject uploads larger than this
+UPLOAD_REDUCE = int(os.environ.get("VISION_UPLOAD_REDUCE", 1))  # Decode uploaded JPEGs at 1/n size (1, 2, 4 or 8)
+EMOTION_BACKEND = os.environ.get("VISION_EMOTION_BACKEND", "keras")  # "keras" (bundled model) or "deepface"
+EVENT_QUEUE_PATH = os.environ.get("VISION_EVENT_QUEUE")  # File to keep unsent events in across restarts
+STREAM_CPU_BUDGET = float(os.environ.get("VISION_CPU_BUDGET", 0))  # Share of one core per stream (e.g. 0.25); 0 = fixed intervals
+ROI_TRACKING = os.environ.get("VISION_ROI", "0") == "1"  # FaceMesh/Hands on a crop around the last face/hand
+PIPELINE_STAGES = load_pipeline_config(os.environ.get("VISION_PIPELINE", "full"))  # Profile, stage list or .json
+PIPELINE_MODE = os.environ.get("VISION_PIPELINE_MODE", "thread")  # "process" = one process per detector
+WARM_PIPELINES = int(os.environ.get("VISION_WARM_PIPELINES", 1))  # Loaded in the background at start-up
+POOLED_PIPELINES = int(os.environ.get("VISION_POOLED_PIPELINES", 2))  # Kept loaded after logout for reuse
+SESSION_LOG_DIR = os.environ.get("VISION_SESSION_LOG_DIR")  # Directory for per-session binary frame logs; unset = off
+SESSION_LOG_LANDMARKS = os.environ.get("VISION_SESSION_LOG_LANDMARKS", "0") == "1"  # Add quantized face landmarks
+STATE_HISTORY_SIZE = 1024  # Snapshots kept per session for /api/history (~100 s at 10 fps)
 
-# Store the latest detection results
-latest_data = {
-    "emotion": "neutral",
-    "focus": "focused",
-    "thumbs_up": "not_detected",
-    "wave": "not_detected",
-    "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
-    "user_email": "",  # Will be set from login
-    "current_tab_url": ""
-}
-
-# Detection and data sender threads
-detection_thread = None
-sender_thread = None
-stop_threads = False
-
-# Detection thread function
-def run_detectors():
-    global latest_data, stop_threads
-    
-    # Initialize detectors
-    emotion_detector = EmotionDetector()
-    focus_detector = SimpleFocusDetector()
-    gesture_detector = GestureDetector()
-    
-    print("Starting vision detection thread...")
-    
-    # Initialize webcam
-    cap = cv2.VideoCapture(0)
-    
-    if not cap.isOpened():
-        print("❌ Error: Cannot access webcam.")
-        return
-        
-    while not stop_threads:
-        try:
-            ret, frame = cap.read()
-            if not ret:
-                print("❌ Failed to grab frame")
-                time.sleep(0.1)
-                continue
-
-            frame = cv2.flip(frame, 1)  # Mirror image for natural interaction
-            
-            # Process with focus detector
-            frame, focus_state = focus_detector.process_frame(frame)
-            latest_data["focus"] = "focused" if focus_state["is_focused"] else "distracted"
-            
-            # Get emotion update
-            emotion_state = emotion_detector.detect_emotion(frame)
-            latest_data["emotion"] = emotion_state["emotion"].lower()
-            
-            # Get gesture update
-            gesture_state = gesture_detector.detect_gesture(frame)
-            
-            # Update gestures in latest_data
-            latest_data["thumbs_up"] = "detected" if gesture_state["gesture"] == "Thumbs Up" else "not_detected"
-            latest_data["wave"] = "detected" if gesture_state["gesture"] == "Wave" else "not_detected"
-            
-            # Update timestamp
-            latest_data["timestamp"] = datetime.datetime.utcnow().isoformat() + "Z"
-            
-            time.sleep(0.1)  # Small sleep to prevent CPU overuse
-        except Exception as e:
-            print(f"Error in detection thread: {e}")
-            time.sleep(1)  # Sleep longer on error
-
-# Data sender thread function
-def send_data():
-    global latest_data, stop_threads
-    
-    print(f"Starting data sender thread, posting to {REMOTE_SERVER_URL}")
-    
-    while not stop_threads:
-        try:
-            # Send data to the remote server
-            response = requests.post(REMOTE_SERVER_URL, json=latest_data)
-            if response.status_code != 200:
-                print(f"❌ Failed to send data: {response.status_code}")
-            time.sleep(DATA_SEND_INTERVAL)
-        except Exception as e:
-            print(f"Error sending data: {e}")
-            time.sleep(DATA_SEND_INTERVAL)
+if PIPELINE_MODE == "process":
+    pipeline_factory = partial(ProcessPipeline, emotion_backend=EMOTION_BACKEND, roi=ROI_TRACKING,
+                               stages=PIPELINE_STAGES)
+else:
+    pipeline_factory = partial(VisionPipeline, emotion_backend=EMOTION_BACKEND, cpu_budget=STREAM_CPU_BUDGET,
+                               roi=ROI_TRACKING, stages=PIPELINE_STAGES)
+
+# One detection pipeline per logged-in session, all sharing a bounded worker pool
+session_manager = None
+
+def start_session_manager():
+    """Builds the session manager and starts warming pipelines.
+
+    Not done at import time: in process mode every detector process is
+    spawned and re-imports this script, and must not start a server of
+    its own. `python app.py` calls this; other importers call it themselves.
+    """
+    global session_manager
+    session_manager = SessionManager(
+        max_workers=MAX_WORKERS,
+        max_sessions=MAX_SESSIONS,
+        remote_url=REMOTE_SERVER_URL,
+        heartbeat_interval=DATA_HEARTBEAT_INTERVAL,
+        event_queue_path=EVENT_QUEUE_PATH,
+        pipeline_factory=pipeline_factory,
+        history_size=STATE_HISTORY_SIZE,
+        pooled_pipelines=POOLED_PIPELINES,
+        session_log_dir=SESSION_LOG_DIR,
+        session_log_landmarks=SESSION_LOG_LANDMARKS,
+        summary_interval=SUMMARY_INTERVAL,
+        upload_reduce=UPLOAD_REDUCE
+    )
+    session_manager.warm_up(WARM_PIPELINES)
+    return session_manager
+
+def current_vision_session():
+    vision_session = session_manager.get(session.get('vision_session_id'))
+    auth = request.headers.get('Authorization', '')
+    if vision_session is None and auth.startswith('Bearer '):
+        # The browser extension has no session cookie; it sends the token shown on the dashboard
+        vision_session = session_manager.find_by_token(auth[len('Bearer '):])
+    return vision_session
 
 # Routes
 @app.route('/')
@@ -113,28 +87,20 @@ def index():
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
-    global latest_data, detection_thread, sender_thread, stop_threads
-    
     if request.method == 'POST':
         email = request.form.get('email')
         if not email or '@' not in email:
             return render_template('login.html', error='Please enter a valid email address')
         
-        # Store email in session and latest_data
-        session['user_email'] = email
-        latest_data["user_email"] = email
+        # Logging in again replaces this browser's previous pipeline
+        session_manager.close(session.pop('vision_session_id', None))
         
-        # Start threads if they're not already running
-        if detection_thread is None or not detection_thread.is_alive():
-            stop_threads = False
-            detection_thread = threading.Thread(target=run_detectors)
-            detection_thread.daemon = True
-            detection_thread.start()
+        vision_session = session_manager.create(email)
+        if vision_session is None:
+            return render_template('login.html', error='Vision server is at capacity, please try again later')
         
-        if sender_thread is None or not sender_thread.is_alive():
-            sender_thread = threading.Thread(target=send_data)
-            sender_thread.daemon = True
-            sender_thread.start()
+        session['user_email'] = email
+        session['vision_session_id'] = vision_session.session_id
         
         return redirect(url_for('dashboard'))
     
@@ -144,25 +110,103 @@ def login():
 def dashboard():
     if 'user_email' not in session:
         return redirect(url_for('index'))
+    vision_session = session_manager.get(session.get('vision_session_id'))
+    if vision_session is None:
+        # Server restarted or session was closed; log in again to get a pipeline
+        session.clear()
+        return redirect(url_for('index'))
     
-    return render_template('dashboard.html', user_email=session['user_email'])
+    return render_template('dashboard.html', user_email=session['user_email'], extension_token=vision_session.token)
 
 @app.route('/logout')
 def logout():
-    global stop_threads
-    
-    # Clear session
+    # Clear session and stop this user's pipeline
     session.pop('user_email', None)
-    
-    # Signal threads to stop
-    stop_threads = True
+    session_manager.close(session.pop('vision_session_id', None))
     
     return redirect(url_for('index'))
 
+@app.route('/api/frame', methods=['POST'])
+def upload_frame():
+    vision_session = session_manager.get(session.get('vision_session_id'))
+    if vision_session is None:
+        return jsonify({"error": "No active vision session"}), 401
+    
+    upload = request.files.get('frame')
+    data = upload.read() if upload is not None else request.get_data()
+    if not data:
+        return jsonify({"error": "Expected a JPEG frame"}), 400
+    if len(data) > MAX_FRAME_BYTES:
+        return jsonify({"error": "Frame too large"}), 413
+    
+    if not vision_session.submit_jpeg(data):
+        return jsonify({"error": "Vision session closed"}), 410
+    return jsonify({"accepted": True}), 202
+
 @app.route('/api/state')
 def get_state():
-    return jsonify(latest_data)
+    vision_session = current_vision_session()
+    if vision_session is None:
+        return jsonify({"error": "No active vision session"}), 401
+    return jsonify(vision_session.latest_data)
+
+@app.route('/api/aggregates')
+def get_aggregates():
+    # Focus ratio, gaze and emotion shares over the last 10 s / 1 min / 5 min, and distraction streaks
+    vision_session = current_vision_session()
+    if vision_session is None:
+        return jsonify({"error": "No active vision session"}), 401
+    return jsonify(vision_session.aggregates.summary(time.time()))
+
+@app.route('/api/metrics')
+def get_metrics():
+    # Prometheus text format; gauges are sampled at scrape time
+    metrics.ACTIVE_SESSIONS.set(session_manager.active_count())
+    if session_manager.event_sender is not None:
+        metrics.EVENT_QUEUE_DEPTH.set(len(session_manager.event_sender.queue))
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/history')
+def get_history():
+    vision_session = current_vision_session()
+    if vision_session is None:
+        return jsonify({"error": "No active vision session"}), 401
+    since = request.args.get('since', -1, type=int)
+    snapshots, truncated = vision_session.state.since(since)
+    # `truncated` means snapshots after `since` were already overwritten
+    return jsonify({
+        "version": snapshots[-1]["version"] if snapshots else vision_session.state.version,
+        "truncated": truncated,
+        "snapshots": snapshots
+    })
+
+@app.route('/api/state/stream')
+def stream_state():
+    # Server-Sent Events: a snapshot, then only the fields that changed
+    vision_session = current_vision_session()
+    if vision_session is None:
+        return jsonify({"error": "No active vision session"}), 401
+    return Response(vision_session.state_stream.subscribe(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/ready')
+def ready():
+    # 503 until the start-up pipelines have loaded their models and run a warm-up frame
+    is_ready = session_manager.ready.is_set()
+    return jsonify({
+        "ready": is_ready,
+        "warm_pipelines": session_manager.idle_pipeline_count(),
+        "warm_up_seconds": session_manager.warm_up_seconds
+    }), 200 if is_ready else 503
+
+@app.route('/api/latency')
+def get_latency():
+    vision_session = current_vision_session()
+    if vision_session is None:
+        return jsonify({"error": "No active vision session"}), 401
+    return jsonify(vision_session.pipeline.latency_stats())
 
 if __name__ == '__main__':
+    start_session_manager()
     print("🚀 Starting Vision Server on http://localhost:8000")
-    app.run(host='0.0.0.0', port=8000)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=8000, threaded=True)
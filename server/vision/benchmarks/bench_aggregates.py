@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+import bench_event_sender  # noqa: E402
+from bench_event_sender import StandInServer, state_stream  # noqa: E402
+from event_sender import EventSender  # noqa: E402
+from focus_aggregates import FocusAggregates, window_name  # noqa: E402
+from landmarks import GAZE_DIRECTIONS  # noqa: E402
+
+
+class RecomputedAggregates:
+    """Baseline: keep every frame of the longest window and recount each window on every summary."""
+
+    def __init__(self, windows=(10, 60, 300)):
+        self.windows = windows
+        self.frames = deque()
+
+    def add(self, timestamp, result, focus_state=None):
+        self.frames.append((timestamp, result["focus"] == "focused", focus_state["gaze_direction"], result["emotion"]))
+        while self.frames[0][0] <= timestamp - max(self.windows):
+            self.frames.popleft()
+
+    def summary(self, now):
+        windows = {}
+        for seconds in self.windows:
+            # Same bucket-aligned windows as FocusAggregates
+            start = (now // 1 - seconds + 1)
+            frames = [f for f in self.frames if f[0] // 1 >= start]
+            windows[window_name(seconds)] = {"frames": len(frames),
+                                             "focus_ratio": round(sum(f[1] for f in frames) / len(frames), 3)}
+        return {"windows": windows}
+
+
+def synthetic_frames(minutes, fps, seed=0):
+    """Focus results and gaze directions with runs of a few seconds each."""
+    rng = np.random.default_rng(seed)
+    focus, gaze, emotion = "focused", "CENTER", "neutral"
+    for i in range(int(minutes * 60 * fps)):
+        if rng.random() < 1 / (4 * fps):
+            focus = "distracted" if focus == "focused" else "focused"
+            gaze = "CENTER" if focus == "focused" else str(rng.choice(GAZE_DIRECTIONS[1:]))
+        if rng.random() < 1 / (6 * fps):
+            emotion = str(rng.choice(["neutral", "happy", "sad"]))
+        yield i / fps, {"focus": focus, "emotion": emotion}, {"gaze_direction": gaze}
+
+
+def update_cost(minutes, fps, summary_interval):
+    """Microseconds per frame (updates plus a summary every `summary_interval` s) for both approaches."""
+    frames = list(synthetic_frames(minutes, fps))
+    results = {}
+    summaries = {}
+    for name, aggregates in (("incremental", FocusAggregates()), ("recomputed", RecomputedAggregates())):
+        summaries[name] = []
+        next_summary = 0.0
+        start = time.perf_counter()
+        for timestamp, result, focus_state in frames:
+            aggregates.add(timestamp, result, focus_state)
+            if timestamp >= next_summary:
+                next_summary = timestamp + summary_interval
+                summaries[name].append(aggregates.summary(timestamp))
+        results[f"{name}_us_per_frame"] = (time.perf_counter() - start) / len(frames) * 1e6
+
+    # Both must agree on every window's frame count and focus ratio
+    for incremental, recomputed in zip(summaries["incremental"], summaries["recomputed"]):
+        for window, figures in recomputed["windows"].items():
+            assert {key: incremental["windows"][window][key] for key in figures} == figures, window
+    return results
+
+
+def downstream_load(users, duration, fps, summary_interval, heartbeat):
+    """Events per user-minute reaching /api/cv-event when posting every change vs summaries."""
+    streams = state_stream(users, duration, fps)
+    results = {}
+    for mode in ("changes", "summaries"):
+        stand_in = bench_event_sender.stand_in = StandInServer()
+        sender = EventSender(stand_in.url, heartbeat_interval=max(heartbeat, summary_interval if mode == "summaries"
+                                                                  else 0))
+        aggregates = {stream[0]["user_email"]: FocusAggregates() for stream in streams}
+        next_summary = dict.fromkeys(aggregates, 0.0)
+
+        def on_state(state):
+            if mode == "changes":
+                sender.publish(state)
+                return
+            user_email, now = state["user_email"], state["timestamp"]
+            aggregates[user_email].add(now, state)
+            if now >= next_summary[user_email]:
+                next_summary[user_email] = now + summary_interval
+                sender.publish({**state, "summary": aggregates[user_email].summary(now)})
+
+        start = time.perf_counter()
+        bench_event_sender.drive(streams, fps, (0.0, 0.0), on_state)
+        time.sleep(1.0)  # Let the last batch go out
+        elapsed = time.perf_counter() - start
+        sender.close()
+        results[mode] = {
+            "events_per_user_minute": len(stand_in.events) / users / (elapsed / 60),
+            "posts_per_user_minute": stand_in.posts / users / (elapsed / 60),
+        }
+        stand_in.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental vs recomputed focus aggregates, and the event load "
+                                                 "summaries put on the app server")
+    parser.add_argument("--minutes", type=float, default=30.0, help="Session length for the update-cost replay")
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="Real-time seconds for the event-load replay")
+    parser.add_argument("--summary-interval", type=float, default=10.0)
+    parser.add_argument("--heartbeat", type=float, default=5.0)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = {
+        "update_cost": update_cost(args.minutes, args.fps, args.summary_interval),
+        "downstream": downstream_load(args.users, args.duration, args.fps, args.summary_interval, args.heartbeat),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    cost = results["update_cost"]
+    print(f"aggregates over a {args.minutes:.0f} min session at {args.fps:.0f} fps: incremental "
+          f"{cost['incremental_us_per_frame']:6.1f} us/frame | recount per summary "
+          f"{cost['recomputed_us_per_frame']:6.1f} us/frame")
+    for mode, r in results["downstream"].items():
+        print(f"{mode:>10}: {r['events_per_user_minute']:5.1f} events/user/min in "
+              f"{r['posts_per_user_minute']:5.1f} posts/user/min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capture import FrameGrabber, Pacer
+from latency import LatencyWindow
+from pipeline import VisionPipeline
+
+
+class SimulatedCamera:
+    """Produces frames at `fps` into a driver-style FIFO of `buffer` frames.
+
+    read() returns the oldest buffered frame, like a webcam whose driver
+    queues frames the application has not picked up yet.
+    """
+
+    def __init__(self, frames, fps=30, buffer=4):
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.queue = deque(maxlen=buffer)
+        self.cond = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._produce, daemon=True)
+        self.thread.start()
+
+    def _produce(self):
+        i = 0
+        next_time = time.perf_counter()
+        while self.running:
+            with self.cond:
+                self.queue.append((self.frames[i % len(self.frames)], time.time()))
+                self.cond.notify_all()
+            i += 1
+            next_time += self.interval
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        with self.cond:
+            self.cond.wait_for(lambda: self.queue or not self.running)
+            if not self.queue:
+                return False, None
+            frame, self.last_timestamp = self.queue.popleft()
+            return True, frame
+
+    def release(self):
+        self.running = False
+        self.thread.join()
+
+
+def load_frames(path, width=640):
+    if not path:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (width * 3 // 4, width, 3), dtype=np.uint8) for _ in range(10)]
+    if os.path.isdir(path):
+        frames = [cv2.imread(os.path.join(path, f)) for f in sorted(os.listdir(path))]
+    else:
+        cap = cv2.VideoCapture(path)
+        frames = []
+        while len(frames) < 120:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        raise SystemExit(f"Could not read any frames from {path}")
+    return frames
+
+
+def run_inline(frames, duration, camera_fps):
+    """The old loop: blocking read, process, fixed sleep(0.1)."""
+    camera = SimulatedCamera(frames, fps=camera_fps)
+    pipeline = VisionPipeline()
+    latency = LatencyWindow(size=100000)
+    processed = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        ret, frame = camera.read()
+        if not ret:
+            break
+        pipeline.process(frame, camera.last_timestamp)
+        latency.record(time.time() - camera.last_timestamp)
+        processed += 1
+        time.sleep(0.1)
+    elapsed = time.perf_counter() - start
+    camera.release()
+    pipeline.release()
+    return {"analysis_fps": processed / elapsed, "camera_frames_dropped": None,
+            "capture_to_result": latency.percentiles()}
+
+
+def run_threaded(frames, duration, camera_fps, target_fps):
+    camera = SimulatedCamera(frames, fps=camera_fps)
+    grabber = FrameGrabber(camera)
+    pipeline = VisionPipeline()
+    pacer = Pacer(target_fps)
+    latency = LatencyWindow(size=100000)
+    processed = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        frame, captured_at = grabber.read()
+        if frame is None:
+            break
+        pipeline.process(frame, captured_at)
+        latency.record(time.time() - captured_at)
+        processed += 1
+        pacer.wait()
+    elapsed = time.perf_counter() - start
+    grabber.release()
+    camera.release()
+    pipeline.release()
+    return {"analysis_fps": processed / elapsed,
+            "camera_frames_dropped": grabber.frames_dropped / max(1, grabber.frames_captured),
+            "capture_to_result": latency.percentiles()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Camera-to-result latency: inline read + sleep(0.1) vs capture thread + pacing")
+    parser.add_argument("--input", help="Video file or image directory; synthetic frames otherwise")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--camera-fps", type=float, default=30.0)
+    parser.add_argument("--fps", type=float, default=10.0, help="Target analysis rate for the threaded loop")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    frames = load_frames(args.input)
+    results = {
+        "inline_sleep": run_inline(frames, args.duration, args.camera_fps),
+        "capture_thread": run_threaded(frames, args.duration, args.camera_fps, args.fps),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for mode, r in results.items():
+        lat = r["capture_to_result"]
+        dropped = "" if r["camera_frames_dropped"] is None else f" | dropped {r['camera_frames_dropped'] * 100:.0f}% of camera frames"
+        print(f"{mode:>14}: {r['analysis_fps']:5.1f} fps analysed | capture->result p50 {lat['p50_ms']:6.1f} ms | "
+              f"p95 {lat['p95_ms']:6.1f} ms{dropped}")
+
+
+if __name__ == "__main__":
+    main()
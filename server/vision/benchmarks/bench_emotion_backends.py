@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emotion_backends import EMOTION_BACKENDS, EMOTION_LABELS, create_emotion_backend
+from face_tracker import FaceTracker
+from frame_packet import FramePacket
+
+
+def load_face_crops(path, count):
+    if not path:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (160, 140, 3), dtype=np.uint8) for _ in range(count)]
+
+    if os.path.isdir(path):
+        frames = [cv2.imread(os.path.join(path, f)) for f in sorted(os.listdir(path))]
+    else:
+        cap = cv2.VideoCapture(path)
+        frames = []
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+
+    tracker = FaceTracker()
+    packet = FramePacket()
+    crops = []
+    for frame in frames:
+        if frame is None:
+            continue
+        face = tracker.process(packet.load(frame))
+        if face.face_present:
+            x, y, w, h = face.bbox
+            crops.append(packet.rgb[y:y+h, x:x+w].copy())
+    tracker.release()
+    if not crops:
+        raise SystemExit(f"No faces found in {path}")
+    return [crops[i % len(crops)] for i in range(count)]
+
+
+def measure(backend_name, crops):
+    start = time.perf_counter()
+    backend = create_emotion_backend(backend_name)
+    load_time = time.perf_counter() - start
+
+    backend.predict(crops[0])  # warm-up
+    latencies = []
+    predictions = []
+    for crop in crops:
+        start = time.perf_counter()
+        scores = backend.predict(crop)
+        latencies.append(time.perf_counter() - start)
+        predictions.append(EMOTION_LABELS[int(np.argmax(scores))])
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "load_s": load_time,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "mean_ms": float(latencies.mean()),
+        "predictions": predictions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emotion inference latency per backend")
+    parser.add_argument("--input", help="Image directory or video with faces; synthetic crops otherwise")
+    parser.add_argument("--crops", type=int, default=100)
+    parser.add_argument("--backends", default=",".join(EMOTION_BACKENDS))
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    crops = load_face_crops(args.input, args.crops)
+    results = {}
+    for name in args.backends.split(","):
+        try:
+            results[name] = measure(name, crops)
+        except Exception as e:
+            results[name] = {"error": str(e)}
+
+    measured = [r for r in results.values() if "error" not in r]
+    if len(measured) == 2:
+        a, b = (results[n]["predictions"] for n in results)
+        agreement = sum(x == y for x, y in zip(a, b)) / len(a)
+        results["top1_agreement"] = agreement
+
+    if args.json:
+        for r in results.values():
+            if isinstance(r, dict):
+                r.pop("predictions", None)
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, r in results.items():
+        if not isinstance(r, dict):
+            continue
+        if "error" in r:
+            print(f"{name:>9}: unavailable ({r['error'][:80]})")
+        else:
+            print(f"{name:>9}: load {r['load_s']:.2f} s | p50 {r['p50_ms']:.2f} ms | "
+                  f"p95 {r['p95_ms']:.2f} ms | mean {r['mean_ms']:.2f} ms")
+    if "top1_agreement" in results:
+        print(f"Top-1 agreement: {results['top1_agreement'] * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from bench_emotion_worker import load_frames  # noqa: E402
+from synthetic_scene import FACE_IMAGE  # noqa: E402
+from emotion_backends import EMOTION_BACKENDS  # noqa: E402
+from emotion_detector import EmotionDetector  # noqa: E402
+from face_tracker import FaceTracker  # noqa: E402
+from frame_packet import FramePacket  # noqa: E402
+
+
+def still_user(frames, seconds, fps, change_every, seed=0):
+    """A user sitting still: webcam noise, a pixel or two of drift and slow lighting changes.
+
+    Every `change_every` seconds they switch to the next input frame, which
+    stands in for a change of expression.
+    """
+    rng = np.random.default_rng(seed)
+    for i in range(int(seconds * fps)):
+        t = i / fps
+        base = frames[int(t // change_every) % len(frames)]
+        dx, dy = rng.integers(-2, 3, 2)
+        frame = np.roll(base, (dy, dx), axis=(0, 1)).astype(np.float32)
+        frame *= 1.0 + 0.03 * np.sin(t / 5.0)
+        frame += rng.normal(0, 3, frame.shape)
+        yield t, np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def run(frames, args, cache_size):
+    packet = FramePacket(mirror=True)
+    tracker = FaceTracker()
+    detector = EmotionDetector(backend=args.backend, asynchronous=False, cache_size=cache_size,
+                               cache_distance=args.distance, cache_ttl=args.ttl)
+    labels = []
+    busy = 0.0
+    for t, frame in still_user(frames, args.seconds, args.fps, args.change_every):
+        packet.load(frame, t)
+        tracker.process(packet)
+        start = time.perf_counter()
+        labels.append(detector.detect_emotion(packet)["emotion"])
+        busy += time.perf_counter() - start
+    result = {
+        "model_calls": detector.inference_latency.count - (detector.cache.hits if detector.cache else 0),
+        "emotion_ms_per_second": busy / args.seconds * 1000,
+        "cache": detector.cache.stats() if detector.cache else None,
+    }
+    tracker.release()
+    detector.release()
+    return result, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emotion model calls with and without the fingerprint cache")
+    parser.add_argument("--input", default=FACE_IMAGE,
+                        help="Video file, image directory or image with a face (default: the bundled portrait)")
+    parser.add_argument("--backend", choices=EMOTION_BACKENDS, default="keras")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--change-every", type=float, default=10.0, help="Seconds between input frames")
+    parser.add_argument("--distance", type=int, default=6, help="Max fingerprint distance for a hit (bits)")
+    parser.add_argument("--ttl", type=float, default=2.0)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    frames = load_frames(args.input, 30)
+    if len(frames) == 1:
+        frames.append(frames[0][:, ::-1].copy())  # Mirrored copy as the "other expression"
+
+    uncached, expected = run(frames, args, 0)
+    cached, labels = run(frames, args, 16)
+    cached["label_agreement"] = sum(a == b for a, b in zip(expected, labels)) / len(expected)
+    results = {"uncached": uncached, "cached": cached}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for mode, r in results.items():
+        line = f"{mode:>8}: {r['model_calls']:4d} model calls | emotion {r['emotion_ms_per_second']:6.2f} ms/s"
+        if r["cache"]:
+            c = r["cache"]
+            line += (f" | hit rate {c['hit_rate'] * 100:5.1f}% | {c['model_calls_avoided']} calls avoided"
+                     f" | same label on {r['label_agreement'] * 100:5.1f}% of frames")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emotion_backends import EMOTION_BACKENDS
+from pipeline import VisionPipeline
+from synthetic_scene import FACE_IMAGE
+
+
+def load_frames(path, max_frames):
+    if os.path.isdir(path):
+        frames = [cv2.imread(os.path.join(path, f)) for f in sorted(os.listdir(path))]
+        frames = [f for f in frames if f is not None]
+    else:
+        cap = cv2.VideoCapture(path)
+        frames = []
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        raise SystemExit(f"Could not read any frames from {path}")
+    return frames
+
+
+def run(frames, backend, emotion_async, count, fps):
+    pipeline = VisionPipeline(emotion_backend=backend, emotion_async=emotion_async)
+    interval = 1.0 / fps
+    for i in range(count):
+        start = time.perf_counter()
+        pipeline.process(frames[i % len(frames)])
+        time.sleep(max(0.0, interval - (time.perf_counter() - start)))
+    stats = pipeline.latency_stats()
+    pipeline.release()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame latency with emotion inference inline vs on its worker")
+    parser.add_argument("--input", default=FACE_IMAGE,
+                        help="Video file, image directory or image with a face (default: the bundled portrait)")
+    parser.add_argument("--backend", choices=EMOTION_BACKENDS, default="keras")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fps", type=float, default=15.0, help="Frame rate to feed the pipeline at")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    frames = load_frames(args.input, args.frames)
+    results = {
+        "inline": run(frames, args.backend, False, args.frames, args.fps),
+        "worker": run(frames, args.backend, True, args.frames, args.fps),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for mode, stats in results.items():
+        frame = stats["frame"]
+        print(f"{mode:>6}: frame p50 {frame['p50_ms']:6.2f} ms | p95 {frame['p95_ms']:6.2f} ms | "
+              f"p99 {frame['p99_ms']:6.2f} ms | max {frame['max_ms']:6.2f} ms | "
+              f"emotion p50 {stats['emotion_inference']['p50_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
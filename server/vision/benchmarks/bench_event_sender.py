@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_sender import STATE_FIELDS, EventSender
+
+
+class StandInServer:
+    """Local stand-in for /api/cv-event that counts posts, events and TCP connections."""
+
+    def __init__(self):
+        self.posts = 0
+        self.connections = 0
+        self.events = []
+        self.down = False
+        self.lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections are visible
+
+            def setup(self):
+                super().setup()
+                with stand_in.lock:
+                    stand_in.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if stand_in.down:
+                    status = 503
+                else:
+                    payload = json.loads(body)
+                    with stand_in.lock:
+                        stand_in.posts += 1
+                        stand_in.events.extend(payload["events"] if "events" in payload else [payload])
+                    status = 200
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/cv-event"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def state_stream(users, duration, fps, seed=0):
+    """Per-frame detection states for each user, with realistic dwell times between changes."""
+    rng = np.random.default_rng(seed)
+    frames = int(duration * fps)
+    streams = []
+    for u in range(users):
+        state = {"emotion": "neutral", "focus": "focused", "thumbs_up": "not_detected",
+                 "wave": "not_detected", "user_email": f"user{u}@example.com", "current_tab_url": ""}
+        stream = []
+        for _ in range(frames):
+            if rng.random() < 1 / (4 * fps):
+                state["focus"] = "distracted" if state["focus"] == "focused" else "focused"
+            if rng.random() < 1 / (6 * fps):
+                state["emotion"] = rng.choice(["neutral", "happy", "sad"])
+            state["thumbs_up"] = "detected" if rng.random() < 0.01 else "not_detected"
+            stream.append(dict(state))
+        streams.append(stream)
+    return streams
+
+
+def transitions(stream):
+    seen, last = [], None
+    for state in stream:
+        signature = tuple(state.get(field) for field in STATE_FIELDS)
+        if signature != last:
+            seen.append(signature)
+            last = signature
+    return seen
+
+
+def drive(streams, fps, outage, on_state):
+    interval = 1.0 / fps
+    start = time.perf_counter()
+    for i in range(len(streams[0])):
+        now = time.perf_counter() - start
+        stand_in.down = outage[0] <= now < outage[1]
+        for stream in streams:
+            state = dict(stream[i], timestamp=time.time())
+            on_state(state)
+        time.sleep(max(0.0, start + (i + 1) * interval - time.perf_counter()))
+    stand_in.down = False
+
+
+def run_legacy(streams, fps, outage, send_interval=1.0):
+    """The old sender: requests.post of the latest state every second, per user, no session."""
+    latest = {}
+    stopped = threading.Event()
+
+    def sender(email):
+        while not stopped.wait(send_interval):
+            try:
+                requests.post(stand_in.url, json=latest[email], timeout=5)
+            except Exception:
+                pass
+
+    for stream in streams:
+        latest[stream[0]["user_email"]] = stream[0]
+    threads = [threading.Thread(target=sender, args=(email,), daemon=True) for email in latest]
+    for t in threads:
+        t.start()
+    drive(streams, fps, outage, lambda state: latest.__setitem__(state["user_email"], state))
+    stopped.set()
+    for t in threads:
+        t.join()
+
+
+def run_sender(streams, fps, outage, heartbeat, queue_path):
+    sender = EventSender(stand_in.url, heartbeat_interval=heartbeat, queue_path=queue_path, backoff_max=2.0)
+    drive(streams, fps, outage, sender.publish)
+    deadline = time.time() + 10
+    while sender.stats()["queued"] and time.time() < deadline:
+        time.sleep(0.1)
+    stats = sender.stats()
+    sender.close()
+    return stats
+
+
+def delivered_transitions(streams):
+    received = {}
+    for event in stand_in.events:
+        received.setdefault(event["user_email"], []).append(tuple(event.get(f) for f in STATE_FIELDS))
+    total = lost = 0
+    for stream in streams:
+        expected = transitions(stream)
+        got = set(received.get(stream[0]["user_email"], []))
+        total += len(expected)
+        lost += sum(1 for t in set(expected) if t not in got)
+    return total, lost
+
+
+def measure(streams, run):
+    global stand_in
+    stand_in = StandInServer()
+    start = time.perf_counter()
+    extra = run()
+    elapsed = time.perf_counter() - start
+    total, lost = delivered_transitions(streams)
+    result = {
+        "posts": stand_in.posts,
+        "posts_per_user_minute": stand_in.posts / len(streams) / (elapsed / 60),
+        "tcp_connections": stand_in.connections,
+        "events_received": len(stand_in.events),
+        "distinct_states": total,
+        "distinct_states_lost": lost,
+    }
+    if extra:
+        result["sender"] = extra
+    stand_in.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Old per-second poster vs EventSender against a local stand-in server")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--fps", type=float, default=10.0, help="Detection results per second per user")
+    parser.add_argument("--outage", default="5,10", help="Seconds (start,end) during which the endpoint returns 503")
+    parser.add_argument("--heartbeat", type=float, default=5.0)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    outage = tuple(float(x) for x in args.outage.split(","))
+    streams = state_stream(args.users, args.duration, args.fps)
+    queue_path = os.path.join(tempfile.mkdtemp(), "events.jsonl")
+
+    results = {
+        "legacy": measure(streams, lambda: run_legacy(streams, args.fps, outage)),
+        "event_sender": measure(streams,
+                                lambda: run_sender(streams, args.fps, outage, args.heartbeat, queue_path)),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, r in results.items():
+        print(f"{name:>12}: {r['posts']:4d} posts ({r['posts_per_user_minute']:5.1f}/user/min) over "
+              f"{r['tcp_connections']:4d} connections | {r['distinct_states_lost']}/{r['distinct_states']} "
+              f"state changes never delivered")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_tracker import FaceTracker
+from frame_packet import FramePacket
+
+
+def load_frames(path, count, size):
+    if path and os.path.isdir(path):
+        files = sorted(os.listdir(path))
+        frames = [cv2.imread(os.path.join(path, f)) for f in files]
+        frames = [f for f in frames if f is not None]
+    elif path:
+        cap = cv2.VideoCapture(path)
+        frames = []
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    else:
+        raise SystemExit("Pass --input with a video file or a directory of images containing a face")
+    if not frames:
+        raise SystemExit(f"No frames found in {path}")
+    frames = [cv2.resize(f, size) for f in frames]
+    return [frames[i % len(frames)] for i in range(count)]
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def run_two_models(frames, mesh_every):
+    # Previous layout: full-range FaceDetection on every frame for the emotion
+    # box, FaceMesh on every `mesh_every`-th frame for focus.
+    detection = mp.solutions.face_detection.FaceDetection(model_selection=1, min_detection_confidence=0.5)
+    face_mesh = mp.solutions.face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=False,
+                                                min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    packet = FramePacket()
+    boxes = []
+    elapsed = 0.0
+    for i, frame in enumerate(frames):
+        packet.load(frame)
+        start = time.perf_counter()
+        results = detection.process(packet.rgb)
+        if i % mesh_every == 0:
+            face_mesh.process(packet.rgb)
+        elapsed += time.perf_counter() - start
+
+        box = None
+        if results.detections:
+            h, w = packet.shape
+            rel = results.detections[0].location_data.relative_bounding_box
+            x, y = max(0, int(rel.xmin * w)), max(0, int(rel.ymin * h))
+            box = (x, y, min(int(rel.width * w), w - x), min(int(rel.height * h), h - y))
+        boxes.append(box)
+    detection.close()
+    face_mesh.close()
+    return elapsed / len(frames), boxes
+
+
+def run_shared_tracker(frames):
+    tracker = FaceTracker()
+    packet = FramePacket()
+    boxes = []
+    elapsed = 0.0
+    for frame in frames:
+        packet.load(frame)
+        start = time.perf_counter()
+        face = tracker.process(packet)
+        elapsed += time.perf_counter() - start
+        boxes.append(face.bbox if face.face_present else None)
+    tracker.release()
+    return elapsed / len(frames), boxes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face-model time per frame: FaceDetection + FaceMesh vs shared FaceMesh")
+    parser.add_argument("--input", help="Video file or image directory with a visible face")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--mesh-every", type=int, default=2,
+                        help="How often the old focus detector ran FaceMesh (150 ms interval at 10 fps = every 2nd frame)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    frames = load_frames(args.input, args.frames, (args.width, args.height))
+    two_models_time, detection_boxes = run_two_models(frames, args.mesh_every)
+    shared_time, mesh_boxes = run_shared_tracker(frames)
+
+    overlaps = [iou(a, b) for a, b in zip(detection_boxes, mesh_boxes) if a and b]
+    result = {
+        "two_models_ms": two_models_time * 1000,
+        "shared_tracker_ms": shared_time * 1000,
+        "reduction": 1 - shared_time / two_models_time,
+        "bbox_mean_iou": float(np.mean(overlaps)) if overlaps else None,
+        "frames_with_face": {"detection": sum(b is not None for b in detection_boxes),
+                             "face_mesh": sum(b is not None for b in mesh_boxes)},
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"FaceDetection + FaceMesh: {result['two_models_ms']:.2f} ms/frame")
+    print(f"Shared FaceTracker:       {result['shared_tracker_ms']:.2f} ms/frame "
+          f"({result['reduction'] * 100:.0f}% less face-model time)")
+    if overlaps:
+        print(f"Mean IoU between detector box and landmark box: {result['bbox_mean_iou']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
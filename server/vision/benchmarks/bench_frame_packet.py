@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_packet import FramePacket
+
+
+def per_detector_conversions(frame):
+    # What run_detectors used to do: mirror, then focus converts BGR->RGB and
+    # back, and emotion and gesture each convert BGR->RGB again.
+    flipped = cv2.flip(frame, 1)
+    focus_rgb = cv2.cvtColor(flipped, cv2.COLOR_BGR2RGB)
+    focus_bgr = cv2.cvtColor(focus_rgb, cv2.COLOR_RGB2BGR)
+    emotion_rgb = cv2.cvtColor(focus_bgr, cv2.COLOR_BGR2RGB)
+    gesture_rgb = cv2.cvtColor(focus_bgr, cv2.COLOR_BGR2RGB)
+    return flipped, focus_rgb, focus_bgr, emotion_rgb, gesture_rgb
+
+
+def make_packet_conversions():
+    packet = FramePacket(mirror=True)
+
+    def packet_conversions(frame):
+        packet.load(frame)
+        return packet.bgr, packet.rgb
+
+    return packet_conversions
+
+
+def count_frame_allocations(convert, frame, frames=20):
+    # Only count blocks of at least half a frame, i.e. image buffers
+    threshold = frame.nbytes // 2
+    tracemalloc.start()
+    allocated_bytes = 0
+    for _ in range(frames):
+        before = tracemalloc.take_snapshot()
+        result = convert(frame)
+        after = tracemalloc.take_snapshot()
+        for stat in after.compare_to(before, "traceback"):
+            if stat.size_diff >= threshold:
+                allocated_bytes += stat.size_diff
+        del result
+    tracemalloc.stop()
+    # Express as whole-frame buffers; block counts vary with the numpy allocator
+    return allocated_bytes / frame.nbytes / frames, allocated_bytes / frames
+
+
+def time_per_frame(convert, frame, frames):
+    for _ in range(10):
+        convert(frame)
+    start = time.perf_counter()
+    for _ in range(frames):
+        convert(frame)
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame colour conversion cost before and after FramePacket")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    frame = np.random.default_rng(0).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    variants = {
+        "per_detector": per_detector_conversions,
+        "frame_packet": make_packet_conversions(),
+    }
+
+    results = {}
+    for name, convert in variants.items():
+        convert(frame)  # let the packet allocate its buffers once
+        allocations, allocated_bytes = count_frame_allocations(convert, frame)
+        results[name] = {
+            "ms_per_frame": time_per_frame(convert, frame, args.frames) * 1000,
+            "frame_buffers_allocated": allocations,
+            "bytes_allocated": allocated_bytes,
+        }
+
+    if args.json:
+        print(json.dumps({"width": args.width, "height": args.height, "results": results}, indent=2))
+        return
+
+    print(f"{args.width}x{args.height}, {args.frames} frames")
+    for name, result in results.items():
+        print(f"{name:>13}: {result['ms_per_frame']:6.3f} ms/frame | "
+              f"{result['frame_buffers_allocated']:.1f} frame buffers "
+              f"({result['bytes_allocated'] / 1e6:.2f} MB) allocated per frame")
+    speedup = results["per_detector"]["ms_per_frame"] / results["frame_packet"]["ms_per_frame"]
+    print(f"FramePacket is {speedup:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
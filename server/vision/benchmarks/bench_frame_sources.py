@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_tracker import FaceTracker  # noqa: E402
+from frame_packet import FramePacket  # noqa: E402
+from frame_sources import REDUCE_FACTORS, UploadSource, WebcamSource  # noqa: E402
+from synthetic_scene import FACE_IMAGE  # noqa: E402
+
+SIZES = ((320, 240), (640, 480), (1280, 720), (1920, 1080))
+
+
+def scene(image, size):
+    """The input face centred in a frame of `size`, filling its height."""
+    w, h = size
+    face = cv2.resize(image, (h * image.shape[1] // image.shape[0], h))
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    x = (w - face.shape[1]) // 2
+    frame[:, max(0, x):x + face.shape[1]] = face[:, max(0, -x):max(0, -x) + w]
+    return frame
+
+
+def to_yuyv(frame):
+    """Packed YUYV 4:2:2, what an uncompressed webcam stream delivers."""
+    yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV)
+    packed = np.empty(frame.shape[:2] + (2,), dtype=np.uint8)
+    packed[..., 0] = yuv[..., 0]
+    packed[:, 0::2, 1] = ((yuv[:, 0::2, 1].astype(np.uint16) + yuv[:, 1::2, 1]) // 2).astype(np.uint8)
+    packed[:, 1::2, 1] = ((yuv[:, 0::2, 2].astype(np.uint16) + yuv[:, 1::2, 2]) // 2).astype(np.uint8)
+    return packed
+
+
+def median_ms(fn, number):
+    times = []
+    for _ in range(number):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000)
+
+
+def simulated_costs(image, number):
+    """Per-frame cost at each size of what the driver hands over (MJPG decode or YUYV conversion), the
+    packet's mirror + RGB conversion and a FaceMesh run."""
+    results = {}
+    for size in SIZES:
+        frame = scene(image, size)
+        jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1]
+        yuyv = to_yuyv(frame)
+        packet = FramePacket(mirror=True)
+        tracker = FaceTracker()
+        timestamps = iter(range(10 ** 9))
+
+        def track():
+            packet.load(frame, next(timestamps) / 15.0)
+            return tracker.process(packet)
+
+        face = track()
+        results[f"{size[0]}x{size[1]}"] = {
+            "mjpg_decode_ms": median_ms(lambda: cv2.imdecode(jpeg, cv2.IMREAD_COLOR), number),
+            "yuyv_convert_ms": median_ms(lambda: cv2.cvtColor(yuyv, cv2.COLOR_YUV2BGR_YUYV), number),
+            "packet_load_ms": median_ms(lambda: packet.load(frame, 0.0), number),
+            "facemesh_ms": median_ms(track, number),
+            "face_found": face.face_present,
+        }
+        tracker.release()
+    return results
+
+
+def upload_decode(image, size, number):
+    """Decoding one uploaded JPEG at each UploadSource reduce factor."""
+    jpeg = cv2.imencode(".jpg", scene(image, size), [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+    results = {}
+    for reduce in REDUCE_FACTORS:
+        source = UploadSource(reduce)
+        decoded = source.decode(jpeg)
+        results[reduce] = {"decode_ms": median_ms(lambda: source.decode(jpeg), number),
+                           "size": f"{decoded.shape[1]}x{decoded.shape[0]}"}
+    return results
+
+
+def camera_costs(device, fourccs, frames):
+    """Wall and CPU time per read() from a real camera at each requested size and format, with what it granted."""
+    results = {}
+    for fourcc in fourccs:
+        for width, height in SIZES:
+            source = WebcamSource(device, width, height, fourcc=fourcc)
+            if not source.isOpened():
+                raise SystemExit(f"Could not open camera {device}")
+            for _ in range(5):  # Let exposure and the driver's queue settle
+                source.read()
+            wall, cpu = time.perf_counter(), time.process_time()
+            read = sum(source.read()[0] for _ in range(frames))
+            results[f"{fourcc} {width}x{height}"] = {
+                "granted": source.granted,
+                "read_ms": (time.perf_counter() - wall) / max(1, read) * 1000,
+                "read_cpu_ms": (time.process_time() - cpu) / max(1, read) * 1000,
+            }
+            source.release()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture + decode cost per frame at different capture sizes")
+    parser.add_argument("--input", default=FACE_IMAGE, help="Image with a face (default: the bundled portrait)")
+    parser.add_argument("--number", type=int, default=30, help="Timed runs per measurement")
+    parser.add_argument("--camera", type=int, help="Also measure this webcam at each size")
+    parser.add_argument("--fourcc", default="MJPG,YUYV", help="Pixel formats to ask the camera for")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    image = cv2.imread(args.input)
+    if image is None:
+        raise SystemExit(f"Could not read {args.input}")
+    results = {
+        "simulated": simulated_costs(image, args.number),
+        "upload_decode_1280x720": upload_decode(image, (1280, 720), args.number),
+    }
+    if args.camera is not None:
+        results["camera"] = camera_costs(args.camera, args.fourcc.split(","), args.number)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for size, r in results["simulated"].items():
+        print(f"{size:>9}: MJPG decode {r['mjpg_decode_ms']:5.2f} ms | YUYV convert {r['yuyv_convert_ms']:5.2f} ms | "
+              f"mirror + RGB {r['packet_load_ms']:5.2f} ms | FaceMesh {r['facemesh_ms']:5.1f} ms"
+              f"{'' if r['face_found'] else ' (no face found)'}")
+    for reduce, r in results["upload_decode_1280x720"].items():
+        print(f"720p upload decoded at 1/{reduce}: {r['decode_ms']:5.2f} ms -> {r['size']}")
+    for name, r in results.get("camera", {}).items():
+        granted = r["granted"]
+        print(f"camera {name:>14}: got {granted['width']}x{granted['height']} {granted['fourcc']} at "
+              f"{granted['fps']} fps | read {r['read_ms']:5.1f} ms ({r['read_cpu_ms']:5.2f} ms CPU)")
+
+
+if __name__ == "__main__":
+    main()
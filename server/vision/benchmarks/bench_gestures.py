@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gesture_detector import GestureDetector, WaveDetector  # noqa: E402
+from landmarks import NUM_HAND_LANDMARKS, landmark_lists_to_array  # noqa: E402
+
+FPS = 15.0
+
+
+class LegacyGestureRules:
+    """The previous per-attribute rules, one hand at a time, kept here as the baseline."""
+
+    def __init__(self):
+        import mediapipe as mp
+        self.mp_hands = mp.solutions.hands
+        self.previous_x = deque(maxlen=6)
+
+    def recognize(self, landmarks):
+        wrist = landmarks.landmark[self.mp_hands.HandLandmark.WRIST]
+        thumb_tip = landmarks.landmark[self.mp_hands.HandLandmark.THUMB_TIP]
+        index_tip = landmarks.landmark[self.mp_hands.HandLandmark.INDEX_FINGER_TIP]
+        middle_tip = landmarks.landmark[self.mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
+        self.previous_x.append(wrist.x)
+        fingers_extended = self.count_extended_fingers(landmarks)
+        if len(self.previous_x) == self.previous_x.maxlen:
+            if abs(self.previous_x[-1] - self.previous_x[0]) > 0.04 and fingers_extended >= 4:
+                return "Wave"
+        if fingers_extended == 1 and thumb_tip.y < wrist.y:
+            return "Thumbs Up"
+        if fingers_extended == 2 and index_tip.y < wrist.y and middle_tip.y < wrist.y:
+            if abs(index_tip.x - middle_tip.x) > 0.03:
+                return "Peace"
+        return "Hand Detected"
+
+    def count_extended_fingers(self, landmarks):
+        tips = [
+            (self.mp_hands.HandLandmark.THUMB_TIP, self.mp_hands.HandLandmark.THUMB_IP),
+            (self.mp_hands.HandLandmark.INDEX_FINGER_TIP, self.mp_hands.HandLandmark.INDEX_FINGER_PIP),
+            (self.mp_hands.HandLandmark.MIDDLE_FINGER_TIP, self.mp_hands.HandLandmark.MIDDLE_FINGER_PIP),
+            (self.mp_hands.HandLandmark.RING_FINGER_TIP, self.mp_hands.HandLandmark.RING_FINGER_PIP),
+            (self.mp_hands.HandLandmark.PINKY_TIP, self.mp_hands.HandLandmark.PINKY_PIP)
+        ]
+        return sum(landmarks.landmark[tip].y < landmarks.landmark[pip].y for tip, pip in tips)
+
+
+def to_landmark_list(points):
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in points:
+        landmark_list.landmark.add(x=float(x), y=float(y), z=float(z))
+    return landmark_list
+
+
+def rule_cost(hand_count, rng, poses=64, repeat=9, number=500):
+    """Microseconds per processed frame for the gesture rules on `hand_count` hands, landmarks conversion included.
+
+    Frames cycle through random hand poses, so every rule branch (and the wave check on open hands) is
+    taken about as often as chance has it. Legacy and array rules take turns, and the best round counts.
+    """
+    frames = [[to_landmark_list(rng.uniform(0.2, 0.8, (NUM_HAND_LANDMARKS, 3))) for _ in range(hand_count)]
+              for _ in range(poses)]
+    legacy = [LegacyGestureRules() for _ in range(hand_count)]
+    detector = GestureDetector(max_hands=hand_count)
+    labels = [str(i) for i in range(hand_count)]
+    points = detector.points[:hand_count]
+    clock = iter(range(10 ** 9))
+
+    def legacy_frame(hands):
+        return [rules.recognize(hand) for rules, hand in zip(legacy, hands)]
+
+    def array_frame(hands):
+        landmark_lists_to_array(hands, out=points.reshape(-1, 3))
+        return detector._recognize_gesture(points, labels, next(clock) / FPS)
+
+    best = {"legacy_us": float("inf"), "array_us": float("inf")}
+    for _ in range(repeat):
+        for key, fn in (("legacy_us", legacy_frame), ("array_us", array_frame)):
+            start = time.perf_counter()
+            for i in range(number):
+                fn(frames[i % poses])
+            best[key] = min(best[key], (time.perf_counter() - start) / number * 1e6)
+    detector.release()
+    return best
+
+
+def wrist_traces(rng, seconds=4.0):
+    """Wrist x over time for motions that are and aren't waves."""
+    t = np.arange(0, seconds, 1 / FPS)
+    noise = rng.normal(0, 0.003, t.shape)
+    spike = noise.copy()
+    spike[len(t) // 2] += 0.06
+    return {
+        "still hand (no)": 0.5 + noise,
+        "one jittery frame (no)": 0.5 + spike,
+        "hand moving across (no)": 0.3 + 0.12 * t + noise,
+        "wave 2 Hz (yes)": 0.5 + 0.05 * np.sin(2 * np.pi * 2.0 * t) + noise,
+        "slow wave 0.7 Hz (yes)": 0.5 + 0.06 * np.sin(2 * np.pi * 0.7 * t) + noise,
+    }, t
+
+
+def wave_detection(rng):
+    """Fraction of frames each wave rule reports a wave on, per motion."""
+    traces, t = wrist_traces(rng)
+    results = {}
+    for name, xs in traces.items():
+        previous_x = deque(maxlen=6)
+        wave = WaveDetector()
+        legacy_hits = array_hits = 0
+        for timestamp, x in zip(t, xs):
+            previous_x.append(x)
+            legacy_hits += len(previous_x) == previous_x.maxlen and abs(previous_x[-1] - previous_x[0]) > 0.04
+            wave.add(x, timestamp)
+            array_hits += wave.is_waving(timestamp)
+        results[name] = {"legacy": legacy_hits / len(t), "array": array_hits / len(t)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gesture rule cost with 1 and 2 hands, and wave detection "
+                                                 "on synthetic wrist motion")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = {
+        "rule_cost": {f"{n} hand{'s' if n > 1 else ''}": rule_cost(n, rng) for n in (1, 2)},
+        "wave_frames": wave_detection(rng),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, r in results["rule_cost"].items():
+        print(f"{name:>8}: per-attribute rules {r['legacy_us']:6.1f} us/frame | "
+              f"array rules {r['array_us']:6.1f} us/frame")
+    print("frames reported as a wave:")
+    for name, r in results["wave_frames"].items():
+        print(f"{name:>24}: first-vs-last rule {r['legacy'] * 100:5.1f}% | swing counting {r['array'] * 100:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
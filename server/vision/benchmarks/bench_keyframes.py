@@ -0,0 +1,140 @@
+import argparse
+import json
+import math
+import os
+import sys
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from bench_emotion_worker import load_frames  # noqa: E402
+from bench_roi import letterbox  # noqa: E402
+from face_tracker import FaceTracker  # noqa: E402
+from focus_detector import SimpleFocusDetector  # noqa: E402
+from frame_packet import FramePacket  # noqa: E402
+from landmarks import LEFT_EYE_CORNER, RIGHT_EYE_CORNER  # noqa: E402
+from synthetic_scene import FACE_IMAGE  # noqa: E402
+
+
+# Seconds of every 6 s the face is gone for, per scenario
+SCENARIOS = {"face stays": None, "face leaves": (3.0, 5.0)}
+
+
+def swaying_frames(frames, count, fps, sway=30, size=(640, 480), away=None, period=6.0):
+    """(frame, face in it) for the input frames swaying `sway` px and zooming smoothly, blanked out from
+    `away[0]` to `away[1]` seconds of every `period`."""
+    boxed = [letterbox(f, size) for f in frames]
+    w, h = size
+    for i in range(count):
+        t = i / fps
+        if away is not None and away[0] <= t % period < away[1]:
+            yield np.zeros_like(boxed[0]), False
+            continue
+        scale = 1.0 + 0.1 * math.sin(2 * math.pi * t / 5.0)
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), 0, scale)
+        matrix[0, 2] += sway * math.sin(2 * math.pi * t / 4.0)
+        matrix[1, 2] += sway / 3 * math.sin(2 * math.pi * t / 2.7)
+        yield cv2.warpAffine(boxed[i % len(boxed)], matrix, size), True
+
+
+class Config:
+    def __init__(self, name, keyframe_every, predict, focus_interval):
+        self.name = name
+        self.packet = FramePacket(mirror=True)
+        self.tracker = FaceTracker(interval=focus_interval * keyframe_every if keyframe_every else 0.0,
+                                   predict=predict)
+        self.focus = SimpleFocusDetector()
+        self.focus.frame_interval = focus_interval
+        self.face_mesh_runs = 0
+        self.points, self.states = [], []
+
+    def step(self, frame, timestamp):
+        self.packet.load(frame, timestamp)
+        face = self.tracker.process(self.packet)
+        self.face_mesh_runs += face.fresh
+        _, state = self.focus.process_frame(self.packet)
+        self.points.append(None if face.points is None or face.bbox is None else face.points.copy())
+        self.states.append(bool(state["is_focused"]))
+
+    def release(self):
+        self.tracker.release()
+
+
+def landmark_error(reference, points):
+    """Mean landmark error over frames where both have a face, as a fraction of the inter-ocular distance."""
+    errors = []
+    for want, got in zip(reference, points):
+        if want is None or got is None:
+            continue
+        interocular = np.linalg.norm(want[LEFT_EYE_CORNER, :2] - want[RIGHT_EYE_CORNER, :2])
+        errors.append(np.linalg.norm(want[:, :2] - got[:, :2], axis=1).mean() / interocular)
+    return float(np.mean(errors)) if errors else None
+
+
+def run_scenario(frames, args, away):
+    # FaceMesh on every frame is the reference; "baseline" runs it once per focus update, as scheduled today
+    configs = [Config("every frame", 0, False, args.focus_interval),
+               Config("baseline", 1, False, args.focus_interval)]
+    for n in (int(n) for n in args.keyframe_every.split(",")):
+        configs += [Config(f"hold 1/{n}", n, False, args.focus_interval),
+                    Config(f"predict 1/{n}", n, True, args.focus_interval)]
+
+    present = []
+    for i, (frame, face_in_frame) in enumerate(swaying_frames(frames, args.frames, args.fps, args.sway, away=away)):
+        present.append(face_in_frame)
+        for config in configs:
+            config.step(frame, i / args.fps)
+
+    truth = configs[0]
+    seconds = args.frames / args.fps
+    absent_frames = present.count(False)
+    results = {}
+    for config in configs:
+        results[config.name] = {
+            "face_mesh_per_s": config.face_mesh_runs / seconds,
+            "landmark_error_iod": landmark_error(truth.points, config.points),
+            "focus_agreement": sum(a == b for a, b in zip(truth.states, config.states)) / len(config.states),
+            "focus_changes": sum(a != b for a, b in zip(config.states, config.states[1:])),
+            # Frames with nobody in view still reported as focused
+            "absent_focused": (sum(state for state, here in zip(config.states, present) if not here) / absent_frames
+                               if absent_frames else None),
+        }
+    for config in configs:
+        config.release()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FaceMesh on keyframes only: holding the last landmarks vs "
+                                                 "predicting them in between")
+    parser.add_argument("--input", default=FACE_IMAGE,
+                        help="Video file, image directory or image with a face (default: the bundled portrait)")
+    parser.add_argument("--frames", type=int, default=270)
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--sway", type=float, default=30, help="Side-to-side head motion in pixels")
+    parser.add_argument("--focus-interval", type=float, default=0.15)
+    parser.add_argument("--keyframe-every", default="2,3", help="Comma-separated keyframe ratios to try")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    frames = load_frames(args.input, 1)
+    results = {scenario: run_scenario(frames, args, away) for scenario, away in SCENARIOS.items()}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for scenario, configs in results.items():
+        print(f"{scenario}:")
+        for name, r in configs.items():
+            error = "n/a" if r["landmark_error_iod"] is None else f"{r['landmark_error_iod'] * 100:5.2f}%"
+            absent = "" if r["absent_focused"] is None else f" | focused while away {r['absent_focused'] * 100:5.1f}%"
+            print(f"{name:>14}: FaceMesh {r['face_mesh_per_s']:5.2f}/s | landmark error {error} of IOD | "
+                  f"focus agrees {r['focus_agreement'] * 100:5.1f}% | {r['focus_changes']} focus changes{absent}")
+
+
+if __name__ == "__main__":
+    main()
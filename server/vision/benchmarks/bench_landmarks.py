@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from landmarks import NUM_FACE_LANDMARKS, LandmarkArray, compute_ear, compute_gaze, landmarks_to_array
+
+
+def to_landmark_list(points):
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in points:
+        landmark_list.landmark.add(x=float(x), y=float(y), z=float(z))
+    return landmark_list
+
+
+def best_time(fn, repeat=5, number=200):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Landmark conversion and EAR/gaze scoring cost")
+    parser.add_argument("--landmarks", help="Optional .npy of recorded (N, 468, 3) landmarks to rescore")
+    parser.add_argument("--batch", type=int, default=100_000, help="Synthetic batch size when no file is given")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.landmarks:
+        batch = LandmarkArray(np.load(args.landmarks))
+    else:
+        base = rng.uniform(0.2, 0.8, (NUM_FACE_LANDMARKS, 3))
+        batch = LandmarkArray(base + rng.normal(0, 0.01, (args.batch, NUM_FACE_LANDMARKS, 3)))
+
+    landmark_list = to_landmark_list(batch[0])
+    single = batch.data[:1]
+
+    results = {
+        "convert_list_comprehension_us": best_time(
+            lambda: np.array([(lm.x, lm.y, lm.z) for lm in landmark_list.landmark])) * 1e6,
+        "convert_landmarks_to_array_us": best_time(lambda: landmarks_to_array(landmark_list)) * 1e6,
+        "score_single_frame_us": best_time(lambda: (compute_ear(single), compute_gaze(single))) * 1e6,
+    }
+
+    start = time.perf_counter()
+    compute_ear(batch)
+    compute_gaze(batch)
+    batch_time = time.perf_counter() - start
+    results["batch_frames"] = len(batch)
+    results["batch_frames_per_second"] = len(batch) / batch_time
+    results["batch_input_mb"] = batch.data.nbytes / 1e6
+    results["batch_speedup_vs_per_frame"] = results["batch_frames_per_second"] * results["score_single_frame_us"] / 1e6
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Landmark conversion: list comprehension {results['convert_list_comprehension_us']:.1f} us, "
+          f"landmarks_to_array {results['convert_landmarks_to_array_us']:.1f} us")
+    print(f"Per-frame EAR + gaze (N=1): {results['score_single_frame_us']:.1f} us")
+    print(f"Batch rescoring: {len(batch)} frames ({results['batch_input_mb']:.0f} MB) at "
+          f"{results['batch_frames_per_second']:,.0f} frames/s "
+          f"({results['batch_speedup_vs_per_frame']:.0f}x per-frame calls)")
+
+
+if __name__ == "__main__":
+    main()
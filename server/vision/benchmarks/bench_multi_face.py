@@ -0,0 +1,120 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from bench_emotion_worker import load_frames  # noqa: E402
+from face_tracker import FaceTracker  # noqa: E402
+from frame_packet import FramePacket  # noqa: E402
+from pipeline import VisionPipeline  # noqa: E402
+from synthetic_scene import FACE_IMAGE  # noqa: E402
+
+
+def face_crop(frame, zoom=2.6):
+    """Square crop around the input's face, `zoom` face widths wide."""
+    tracker = FaceTracker()
+    face = tracker.process(FramePacket(mirror=False).load(frame, 0.0))
+    tracker.release()
+    if not face.face_present:
+        raise SystemExit("No face found in the input")
+    x, y, w, h = face.bbox
+    half = int(max(w, h) * zoom / 2)
+    cx, cy = x + w // 2, y + h // 2
+    padded = cv2.copyMakeBorder(frame, half, half, half, half, cv2.BORDER_CONSTANT)
+    return padded[cy:cy + 2 * half, cx:cx + 2 * half]
+
+
+def room_frames(crop, people, count, fps, size=(640, 480), sway=12):
+    """A shared camera view: `people` copies of the face in a 2x2 grid, each swaying on its own."""
+    w, h = size
+    cell = min(w // 2, h // 2)
+    tile = cv2.resize(crop, (cell, cell))
+    for i in range(count):
+        t = i / fps
+        frame = np.zeros((h, w, 3), dtype=np.uint8)
+        for person in range(people):
+            row, col = divmod(person, 2)
+            dx = int(sway * math.sin(2 * math.pi * t / (3.0 + person)))
+            x = min(max(0, col * (w // 2) + (w // 2 - cell) // 2 + dx), w - cell)
+            y = row * (h // 2) + (h // 2 - cell) // 2
+            frame[y:y + cell, x:x + cell] = tile
+        yield frame
+
+
+def cpu_per_frame(pipelines, frames, fps, settle):
+    """CPU ms per frame (all threads, MediaPipe's included) for running every pipeline on each frame
+    after the first `settle`, and the track IDs the first pipeline saw on those frames."""
+    for i, frame in enumerate(frames[:settle]):
+        for pipeline in pipelines:
+            pipeline.process(frame, i / fps)
+    track_ids = []
+    start = time.process_time()
+    for i, frame in enumerate(frames[settle:], settle):
+        for pipeline in pipelines:
+            pipeline.process(frame, i / fps)
+        track_ids.append([face.track_id for face in pipelines[0].packet.faces])
+    return (time.process_time() - start) / (len(frames) - settle) * 1000, track_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-face mode vs one pipeline per person on a shared camera")
+    parser.add_argument("--input", default=FACE_IMAGE,
+                        help="Video file, image directory or image with a face (default: the bundled portrait)")
+    parser.add_argument("--people", default="1,2,3,4", help="Comma-separated people counts to try (at most 4)")
+    parser.add_argument("--frames", type=int, default=90)
+    parser.add_argument("--settle", type=int, default=60,
+                        help="Untimed frames first: MediaPipe picks up additional faces over a few seconds")
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    crop = face_crop(load_frames(args.input, 1)[0])
+    # The faces are copies of one face, so the emotion cache would share their results; keep it out of both
+    stages = {"focus": {}, "emotion": {"cache_size": 0}}
+    results = {}
+    for people in (int(n) for n in args.people.split(",")):
+        frames = list(room_frames(crop, people, args.settle + args.frames, args.fps))
+
+        multi = VisionPipeline(emotion_async=False, stages={**stages, "focus": {"max_faces": people}})
+        multi.warm_up()
+        multi_ms, track_ids = cpu_per_frame([multi], frames, args.fps, args.settle)
+        multi.release()
+
+        # Without multi-face mode each person needs a pipeline of their own, all fed the same camera
+        separate = [VisionPipeline(emotion_async=False, stages=stages) for _ in range(people)]
+        for pipeline in separate:
+            pipeline.warm_up()
+        separate_ms, _ = cpu_per_frame(separate, frames, args.fps, args.settle)
+        for pipeline in separate:
+            pipeline.release()
+
+        results[people] = {
+            "multi_face_cpu_ms": multi_ms,
+            "pipeline_per_person_cpu_ms": separate_ms,
+            "people_tracked": float(np.mean([len(ids) for ids in track_ids])),
+            # Each track ID beyond one per person means someone lost theirs
+            "track_id_switches": max(0, len({i for ids in track_ids for i in ids}) - people),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    single = results[min(results)]["multi_face_cpu_ms"] / min(results)
+    for people, r in results.items():
+        print(f"{people} people: multi-face {r['multi_face_cpu_ms']:6.1f} ms CPU/frame "
+              f"({r['multi_face_cpu_ms'] / single:4.2f}x one person) | one pipeline each "
+              f"{r['pipeline_per_person_cpu_ms']:6.1f} ms | tracked {r['people_tracked']:.2f} people, "
+              f"{r['track_id_switches']} ID switches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import cv2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from synthetic_scene import SyntheticScene  # noqa: E402
+
+GOLDEN_DIR = os.path.join(BENCH_DIR, "golden")
+STAGES = ("focus", "emotion", "gesture", "pipeline")
+FLOAT_TOLERANCE = 0.01
+
+
+def iter_frames(source, max_frames, width=640):
+    """BGR frames from a video file, an image directory or the scripted SyntheticScene ("synthetic")."""
+    if source == "synthetic":
+        yield from SyntheticScene(width).frames(max_frames)
+        return
+
+    if os.path.isdir(source):
+        paths = sorted(os.path.join(source, f) for f in os.listdir(source))
+        count = 0
+        while paths and count < max_frames:
+            for path in paths:
+                frame = cv2.imread(path)
+                if frame is None:
+                    continue
+                yield frame
+                count += 1
+                if count >= max_frames:
+                    return
+        return
+
+    cap = cv2.VideoCapture(source)
+    try:
+        for _ in range(max_frames):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+def run_stage(stage, source, max_frames, fps, emotion_backend):
+    """Runs one stage over the source in this (fresh) process and returns its measurements."""
+    from emotion_detector import EmotionDetector
+    from face_tracker import FaceTracker
+    from focus_detector import SimpleFocusDetector
+    from frame_packet import FramePacket
+    from gesture_detector import GestureDetector
+    from latency import LatencyWindow
+    from pipeline import VisionPipeline
+
+    packet = FramePacket(mirror=True)
+    face_tracker = focus_detector = emotion_detector = gesture_detector = pipeline = None
+    if stage == "pipeline":
+        pipeline = VisionPipeline(emotion_backend=emotion_backend, emotion_async=False)
+    if stage in ("focus", "emotion"):
+        face_tracker = FaceTracker()
+    if stage == "focus":
+        focus_detector = SimpleFocusDetector()
+    if stage == "emotion":
+        # Inline inference so every frame's result is deterministic
+        emotion_detector = EmotionDetector(backend=emotion_backend, asynchronous=False)
+    if stage == "gesture":
+        gesture_detector = GestureDetector()
+
+    timings = {}
+
+    def timed(name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.setdefault(name, LatencyWindow(size=max_frames)).record(time.perf_counter() - start)
+        return result
+
+    outputs = []
+    busy = 0.0
+    cpu_start = time.process_time()
+    for i, frame in enumerate(iter_frames(source, max_frames)):
+        timestamp = i / fps  # Replay clock: detector intervals depend only on the frame index
+        start = time.perf_counter()
+        if pipeline is not None:
+            result = timed("frame", pipeline.process, frame, timestamp)
+            outputs.append({k: result[k] for k in ("focus", "emotion", "thumbs_up", "wave")})
+        else:
+            timed("packet", packet.load, frame, timestamp)
+            if face_tracker is not None:
+                timed("face", face_tracker.process, packet)
+            if focus_detector is not None:
+                _, state = timed("focus", focus_detector.process_frame, packet)
+                outputs.append({"is_focused": bool(state["is_focused"]), "gaze_direction": state["gaze_direction"],
+                                "eye_aspect_ratio": round(float(state["eye_aspect_ratio"]), 4),
+                                "gaze_score": round(float(state["gaze_score"]), 4)})
+            if emotion_detector is not None:
+                state = timed("emotion", emotion_detector.detect_emotion, packet)
+                outputs.append({"emotion": state["emotion"]})
+            if gesture_detector is not None:
+                state = timed("gesture", gesture_detector.detect_gesture, packet)
+                outputs.append({"gesture": state["gesture"]})
+        busy += time.perf_counter() - start
+    cpu_time = time.process_time() - cpu_start
+
+    for component in (pipeline, face_tracker, focus_detector, emotion_detector, gesture_detector):
+        if component is not None:
+            component.release()
+
+    return {
+        "frames": len(outputs),
+        "fps": len(outputs) / busy if busy else 0.0,
+        "cpu_seconds": cpu_time,
+        "cpu_ms_per_frame": cpu_time / max(1, len(outputs)) * 1000,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "latency_ms": {name: window.percentiles() for name, window in timings.items()},
+        "outputs": outputs,
+    }
+
+
+def run_isolated(*args):
+    # A fresh process per stage keeps peak RSS and model state from leaking between stages
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_stage, args)
+
+
+def compare_outputs(expected, actual):
+    mismatches = []
+    for i, (want, got) in enumerate(zip(expected, actual)):
+        for key, value in want.items():
+            other = got.get(key)
+            if isinstance(value, float) and isinstance(other, (int, float)):
+                if abs(value - other) > FLOAT_TOLERANCE:
+                    mismatches.append((i, key, value, other))
+            elif value != other:
+                mismatches.append((i, key, value, other))
+    if len(expected) != len(actual):
+        mismatches.append((min(len(expected), len(actual)), "frames", len(expected), len(actual)))
+    return mismatches
+
+
+def golden_path(source):
+    name = "synthetic" if source == "synthetic" else os.path.splitext(os.path.basename(os.path.normpath(source)))[0]
+    return os.path.join(GOLDEN_DIR, f"{name}.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded or synthetic frames through the detectors, "
+                                                 "no webcam or display needed")
+    parser.add_argument("--input", default="synthetic", help="Video file, image directory or 'synthetic'")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--fps", type=float, default=15.0, help="Frame rate the replay clock assumes")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--emotion-backend", default="keras")
+    parser.add_argument("--golden", help="Golden results file (default: benchmarks/golden/<input name>.json)")
+    parser.add_argument("--update-golden", action="store_true", help="Store this run's outputs as the golden results")
+    parser.add_argument("--max-mismatch", type=float, default=0.0,
+                        help="Fraction of frames allowed to differ from golden before exiting non-zero")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for stage in stages:
+        results[stage] = run_isolated(stage, args.input, args.frames, args.fps, args.emotion_backend)
+        if not args.json:
+            r = results[stage]
+            lat = " | ".join(f"{name} p50 {p['p50_ms']:.2f} p95 {p['p95_ms']:.2f} p99 {p['p99_ms']:.2f} ms"
+                             for name, p in r["latency_ms"].items())
+            print(f"{stage:>8}: {r['fps']:7.1f} fps | {r['cpu_ms_per_frame']:6.2f} ms CPU/frame | "
+                  f"peak RSS {r['peak_rss_mb']:6.0f} MB | {lat}")
+
+    path = args.golden or golden_path(args.input)
+    params = {"input": os.path.basename(os.path.normpath(args.input)), "frames": args.frames, "fps": args.fps,
+              "emotion_backend": args.emotion_backend}
+    failed = False
+
+    if args.update_golden:
+        golden = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                golden = json.load(f)
+        golden["params"] = params
+        golden.setdefault("stages", {}).update({stage: r["outputs"] for stage, r in results.items()})
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(golden, f, indent=1)
+        if not args.json:
+            print(f"Golden results written to {path}")
+    elif os.path.exists(path):
+        with open(path) as f:
+            golden = json.load(f)
+        if golden.get("params") != params:
+            print(f"⚠️ Golden file {path} was recorded with {golden.get('params')}; not comparing", file=sys.stderr)
+        else:
+            for stage, r in results.items():
+                if stage not in golden["stages"]:
+                    continue
+                mismatches = compare_outputs(golden["stages"][stage], r["outputs"])
+                frames_off = len({m[0] for m in mismatches})
+                r["golden"] = {"mismatched_frames": frames_off,
+                               "mismatch_rate": frames_off / max(1, len(r["outputs"])),
+                               "first_mismatches": [list(m) for m in mismatches[:5]]}
+                if r["golden"]["mismatch_rate"] > args.max_mismatch:
+                    failed = True
+                if not args.json:
+                    status = "OK" if r["golden"]["mismatch_rate"] <= args.max_mismatch else "MISMATCH"
+                    print(f"{stage:>8}: {frames_off}/{len(r['outputs'])} frames differ from golden [{status}]")
+                    for m in mismatches[:5]:
+                        print(f"          frame {m[0]} {m[1]}: expected {m[2]!r}, got {m[3]!r}")
+
+    report = {"params": params, "stages": {stage: {k: v for k, v in r.items() if k != "outputs"}
+                                           for stage, r in results.items()}}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from bench_pipeline import iter_frames  # noqa: E402
+from pipeline import VisionPipeline  # noqa: E402
+from process_pipeline import ProcessPipeline  # noqa: E402
+
+
+def worker_cpu(pipeline):
+    """CPU seconds used so far by the pipeline's worker processes (Linux /proc)."""
+    total = 0.0
+    for worker in getattr(pipeline, "workers", {}).values():
+        with open(f"/proc/{worker.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        total += (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return total
+
+
+def run(mode, frames, fps, emotion_backend):
+    if mode == "process":
+        pipeline = ProcessPipeline(emotion_backend=emotion_backend)
+    else:
+        pipeline = VisionPipeline(emotion_backend=emotion_backend)
+    pipeline.process(frames[0], 0.0)  # Warm-up: first-frame setup
+
+    cpu_start, workers_start = time.process_time(), worker_cpu(pipeline)
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        # Back to back as fast as the pipeline allows; the detectors' clock still advances at `fps`
+        pipeline.process(frame, (i + 1) / fps)
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start + worker_cpu(pipeline) - workers_start
+    stats = pipeline.latency_stats()
+    pipeline.release()
+    return {
+        "fps": len(frames) / wall,
+        "cores_used": cpu / wall,
+        "frame_ms": stats["frame"],
+        "cpu_ms_per_frame": cpu / len(frames) * 1000,
+        "stages_ms": stats.get("stages"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="One stream through the threaded pipeline vs one process per detector")
+    parser.add_argument("--input", default="synthetic", help="Video file, image directory or 'synthetic'")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--fps", type=float, default=15.0, help="Frame rate the detector clock assumes")
+    parser.add_argument("--emotion-backend", default="keras")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    frames = list(iter_frames(args.input, args.frames))
+    results = {mode: run(mode, frames, args.fps, args.emotion_backend) for mode in ("thread", "process")}
+    results["cpu_count"] = os.cpu_count()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['cpu_count']} CPU(s)")
+    for mode in ("thread", "process"):
+        r = results[mode]
+        print(f"{mode:>8}: {r['fps']:6.1f} fps | {r['cores_used']:4.2f} cores busy | "
+              f"frame p50 {r['frame_ms']['p50_ms']:6.2f} p95 {r['frame_ms']['p95_ms']:6.2f} ms | "
+              f"{r['cpu_ms_per_frame']:6.2f} ms CPU/frame")
+        if r["stages_ms"]:
+            print("          worker p50: " + " | ".join(f"{stage} {p['p50_ms']:.2f} ms"
+                                                    for stage, p in r["stages_ms"].items()))
+
+
+if __name__ == "__main__":
+    main()
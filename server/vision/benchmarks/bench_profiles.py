@@ -0,0 +1,81 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from bench_pipeline import iter_frames  # noqa: E402
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_profile(spec, source, max_frames, fps):
+    """Builds and warms one pipeline definition in this (fresh) process, then replays frames through it."""
+    baseline_rss = rss_mb()
+    start = time.perf_counter()
+    from pipeline import VisionPipeline
+    from pipeline_config import load_pipeline_config
+
+    pipeline = VisionPipeline(emotion_async=False, stages=load_pipeline_config(spec))
+    pipeline.warm_up()
+    startup = time.perf_counter() - start
+    startup_rss = rss_mb()
+
+    frames = list(iter_frames(source, max_frames))
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        pipeline.process(frame, i / fps)
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    pipeline.release()
+    return {
+        "stages": list(pipeline.stages),
+        "modules": sorted(m for m in ("tensorflow", "mediapipe", "deepface") if m in sys.modules),
+        "startup_s": startup,
+        "startup_rss_mb": startup_rss - baseline_rss,
+        "peak_rss_mb": rss_mb(),
+        "fps": len(frames) / wall,
+        "cpu_ms_per_frame": cpu / len(frames) * 1000,
+    }
+
+
+def run_isolated(*args):
+    # A fresh process per profile so imports and models from one don't count towards the next
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_profile, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start-up time, memory and CPU of pipeline definitions "
+                                                 "(VISION_PIPELINE values)")
+    parser.add_argument("--profiles", nargs="+", default=["focus", "full"],
+                        help="Profile names, comma-separated stage lists or JSON files")
+    parser.add_argument("--input", default="synthetic", help="Video file, image directory or 'synthetic'")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--fps", type=float, default=15.0, help="Frame rate the replay clock assumes")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = {spec: run_isolated(spec, args.input, args.frames, args.fps) for spec in args.profiles}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for spec, r in results.items():
+        print(f"{spec:>14}: start-up {r['startup_s']:5.2f} s, +{r['startup_rss_mb']:4.0f} MB "
+              f"(peak RSS {r['peak_rss_mb']:4.0f} MB) | {r['fps']:6.1f} fps | "
+              f"{r['cpu_ms_per_frame']:6.2f} ms CPU/frame | loads {', '.join(r['modules']) or 'nothing heavy'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from bench_emotion_worker import load_frames  # noqa: E402
+from face_tracker import FaceTracker  # noqa: E402
+from frame_packet import FramePacket  # noqa: E402
+from gesture_detector import GestureDetector  # noqa: E402
+from landmarks import LEFT_EYE_CORNER, RIGHT_EYE_CORNER  # noqa: E402
+from latency import LatencyWindow  # noqa: E402
+from synthetic_scene import FACE_IMAGE  # noqa: E402
+
+RESOLUTIONS = {"480p": (640, 480), "720p": (1280, 720), "1080p": (1920, 1080)}
+
+
+def letterbox(frame, size):
+    w, h = size
+    scale = min(w / frame.shape[1], h / frame.shape[0])
+    resized = cv2.resize(frame, (round(frame.shape[1] * scale), round(frame.shape[0] * scale)))
+    canvas = np.zeros((h, w, 3), dtype=np.uint8)
+    y, x = (h - resized.shape[0]) // 2, (w - resized.shape[1]) // 2
+    canvas[y:y + resized.shape[0], x:x + resized.shape[1]] = resized
+    return canvas
+
+
+def moving_frames(frames, size, count, seed=0):
+    """The input frames at `size`, drifting a few pixels per frame like someone shifting in their seat."""
+    rng = np.random.default_rng(seed)
+    boxed = [letterbox(f, size) for f in frames]
+    offset = np.zeros(2, dtype=int)
+    for i in range(count):
+        offset = np.clip(offset + rng.integers(-3, 4, 2), -40, 40)
+        yield np.roll(boxed[i % len(boxed)], tuple(offset), axis=(0, 1))
+
+
+class Runner:
+    def __init__(self, count, roi):
+        self.roi = roi
+        self.packet = FramePacket(mirror=True)
+        self.tracker = FaceTracker(roi=roi)
+        self.gestures = GestureDetector(roi=roi)
+        self.face_latency, self.hands_latency = LatencyWindow(count), LatencyWindow(count)
+        self.points, self.labels = [], []
+
+    def step(self, frame, timestamp):
+        self.packet.load(frame, timestamp)
+        start = time.perf_counter()
+        face = self.tracker.process(self.packet)
+        self.face_latency.record(time.perf_counter() - start)
+        start = time.perf_counter()
+        self.labels.append(self.gestures.detect_gesture(self.packet)["gesture"])
+        self.hands_latency.record(time.perf_counter() - start)
+        self.points.append(face.points.copy() if face.face_present else None)
+
+    def finish(self):
+        result = {
+            "face_ms": self.face_latency.percentiles(),
+            "hands_ms": self.hands_latency.percentiles(),
+            "face_roi": self.tracker.roi.stats() if self.roi else None,
+            "hands_roi": self.gestures.roi.stats() if self.roi else None,
+        }
+        self.tracker.release()
+        self.gestures.release()
+        return result
+
+
+def compare(size, full_points, roi_points, full_labels, roi_labels):
+    w, h = size
+    errors = []
+    for full, roi in zip(full_points, roi_points):
+        if full is None or roi is None:
+            continue
+        scale = np.array([w, h])
+        interocular = np.linalg.norm((full[LEFT_EYE_CORNER, :2] - full[RIGHT_EYE_CORNER, :2]) * scale)
+        errors.append(np.linalg.norm((full[:, :2] - roi[:, :2]) * scale, axis=1).mean() / interocular)
+    found = sum(p is not None for p in full_points)
+    return {
+        "face_found_full": found,
+        "face_found_roi": sum(p is not None for p in roi_points),
+        "landmark_error_iod": float(np.mean(errors)) if errors else None,  # Mean error / inter-ocular distance
+        "landmark_error_iod_p95": float(np.percentile(errors, 95)) if errors else None,
+        "gesture_agreement": sum(a == b for a, b in zip(full_labels, roi_labels)) / len(full_labels),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FaceMesh/Hands on the full frame vs a downscaled crop around "
+                                                 "the last face/hand")
+    parser.add_argument("--input", default=FACE_IMAGE,
+                        help="Video file, image directory or image with a face (default: the bundled portrait)")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--resolutions", default="480p,720p,1080p")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    frames = load_frames(args.input, args.frames)
+    results = {}
+    for name in args.resolutions.split(","):
+        size = RESOLUTIONS[name]
+        full, roi = Runner(args.frames, roi=False), Runner(args.frames, roi=True)
+        # Both in lockstep so background load hits them equally
+        for i, frame in enumerate(moving_frames(frames, size, args.frames)):
+            full.step(frame, i / args.fps)
+            roi.step(frame, i / args.fps)
+        results[name] = {"full": full.finish(), "roi": roi.finish(),
+                         "accuracy": compare(size, full.points, roi.points, full.labels, roi.labels)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, r in results.items():
+        acc = r["accuracy"]
+        error = "n/a" if acc["landmark_error_iod"] is None else f"{acc['landmark_error_iod'] * 100:.2f}%"
+        print(f"{name:>6}: face p50 {r['full']['face_ms']['p50_ms']:6.2f} -> {r['roi']['face_ms']['p50_ms']:6.2f} ms"
+              f" ({r['roi']['face_roi']['pixel_fraction'] * 100:5.1f}% of pixels) | "
+              f"hands p50 {r['full']['hands_ms']['p50_ms']:6.2f} -> {r['roi']['hands_ms']['p50_ms']:6.2f} ms | "
+              f"faces {acc['face_found_full']}/{acc['face_found_roi']} | landmark error {error} of IOD | "
+              f"gestures agree {acc['gesture_agreement'] * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from bench_pipeline import iter_frames  # noqa: E402
+from pipeline import VisionPipeline  # noqa: E402
+
+
+def run(source, frames, fps, budget, emotion_backend):
+    # Inline emotion inference so its CPU time lands in this thread's budget
+    pipeline = VisionPipeline(emotion_backend=emotion_backend, emotion_async=False, cpu_budget=budget)
+    runs = {"face_mesh": 0, "gesture": 0, "emotion": 0}
+    count = 0
+    busy = 0.0
+    for i, frame in enumerate(iter_frames(source, frames)):
+        timestamp = i / fps  # Replay clock, so every budget sees the same frame times
+        start = time.perf_counter()
+        pipeline.process(frame, timestamp)
+        busy += time.perf_counter() - start
+        runs["face_mesh"] += pipeline.packet.face.fresh
+        runs["gesture"] += pipeline.gesture_detector.last_processed_time == timestamp
+        count += 1
+    runs["emotion"] = pipeline.emotion_detector.inference_latency.count
+    stats = pipeline.latency_stats()
+    pipeline.release()
+
+    duration = count / fps
+    return {
+        "budget": budget,
+        "frames": count,
+        "cpu_share": busy / duration,
+        "frame_ms": stats["frame"],
+        "runs_per_second": {stage: n / duration for stage, n in runs.items()},
+        "schedule": stats["schedule"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay frames under different per-stream CPU budgets and "
+                                                 "report how often each detector got to run")
+    parser.add_argument("--input", default="synthetic", help="Video file, image directory or 'synthetic'")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--budgets", default="none,0.5,0.25,0.1", help="Comma-separated; 'none' = fixed intervals")
+    parser.add_argument("--emotion-backend", default="keras")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    for value in args.budgets.split(","):
+        budget = None if value == "none" else float(value)
+        r = run(args.input, args.frames, args.fps, budget, args.emotion_backend)
+        results.append(r)
+        if not args.json:
+            rates = " | ".join(f"{stage} {rate:5.2f}/s" for stage, rate in r["runs_per_second"].items())
+            print(f"budget {value:>5}: CPU {r['cpu_share'] * 100:5.1f}% of a core | "
+                  f"frame p95 {r['frame_ms']['p95_ms']:6.2f} ms | {rates}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import VisionPipeline  # noqa: E402
+from session_log import (FOCUSED, SessionLog, SessionLogWriter, dequantize_landmarks, frame_record,  # noqa: E402
+                         open_session_log)
+from synthetic_scene import FACE_IMAGE  # noqa: E402
+
+FPS = 15.0
+
+
+def json_line(pipeline, result, timestamp, frame, landmarks):
+    """What a JSON-lines log would write per frame: the same fields as a session log record."""
+    focus = pipeline.focus_detector.last_output_state
+    scores = pipeline.emotion_detector.last_scores
+    entry = {**result, "received_at": timestamp, "frame": frame, "ear": focus["eye_aspect_ratio"],
+             "gaze_score": focus["gaze_score"], "gaze_direction": focus["gaze_direction"],
+             "emotion_scores": scores.tolist() if scores is not None else None}
+    if landmarks:
+        entry["landmarks"] = np.round(pipeline.packet.face.points, 5).tolist()
+    return json.dumps(entry) + "\n"
+
+
+def logging_cost(pipeline, result, directory, landmarks, number):
+    """Detection-thread microseconds per frame: session log vs writing JSON lines inline."""
+    writer = SessionLogWriter(max_queued=number)  # The loop outpaces any real frame rate; keep every record
+    log = SessionLog(os.path.join(directory, f"bench-{int(landmarks)}.vlog"), landmarks=landmarks)
+    start = time.perf_counter()
+    for i in range(number):
+        writer.append(log, frame_record(i / FPS, i, result, pipeline.frame_detail(landmarks)))
+    binary_us = (time.perf_counter() - start) / number * 1e6
+    writer.close_log(log)
+    writer.close()
+
+    path = os.path.join(directory, f"bench-{int(landmarks)}.jsonl")
+    with open(path, "w") as f:
+        start = time.perf_counter()
+        for i in range(number):
+            f.write(json_line(pipeline, result, i / FPS, i, landmarks))
+            f.flush()
+        json_us = (time.perf_counter() - start) / number * 1e6
+    return {
+        "session_log_us": binary_us,
+        "json_lines_us": json_us,
+        "session_log_bytes_per_frame": os.path.getsize(log.path) / number,
+        "json_lines_bytes_per_frame": os.path.getsize(path) / number,
+        "records_dropped": writer.records_dropped,
+    }, log.path, path
+
+
+def read_cost(log_path, json_path):
+    """Milliseconds to load a log and compute per-minute focus ratio and mean EAR from it."""
+    start = time.perf_counter()
+    records = open_session_log(log_path)
+    minute = ((records["timestamp"] - records["timestamp"][0]) // 60).astype(np.int64)
+    focused = np.bincount(minute, (records["flags"] & FOCUSED) > 0) / np.bincount(minute)
+    ear = np.bincount(minute, records["ear"]) / np.bincount(minute)
+    if "landmarks" in records.dtype.names:
+        dequantize_landmarks(records["landmarks"][-1])
+    binary_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with open(json_path) as f:
+        entries = [json.loads(line) for line in f]
+    minute = np.array([int((e["received_at"] - entries[0]["received_at"]) // 60) for e in entries])
+    json_focused = np.bincount(minute, [e["focus"] == "focused" for e in entries]) / np.bincount(minute)
+    json_ear = np.bincount(minute, [e["ear"] for e in entries]) / np.bincount(minute)
+    json_ms = (time.perf_counter() - start) * 1000
+    assert np.allclose(focused, json_focused) and np.allclose(ear, json_ear, atol=1e-5)
+    return {"session_log_ms": binary_ms, "json_lines_ms": json_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame logging cost, size and read time: binary session "
+                                                 "log vs JSON lines")
+    parser.add_argument("--input", default=FACE_IMAGE, help="Image with a face (default: the bundled portrait)")
+    parser.add_argument("--frames", type=int, default=27000, help="Frames to log (27000 = 30 min at 15 fps)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    frame = cv2.imread(args.input)
+    if frame is None:
+        raise SystemExit(f"Could not read {args.input}")
+    # One real frame gives the detectors the state a record is filled from
+    pipeline = VisionPipeline(emotion_async=False, stages={"focus": {}, "emotion": {}})
+    result = pipeline.process(frame, 0.0)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for landmarks in (False, True):
+            name = "with landmarks" if landmarks else "without landmarks"
+            results[name], log_path, json_path = logging_cost(pipeline, result, directory, landmarks, args.frames)
+            results[name]["read"] = read_cost(log_path, json_path)
+    pipeline.release()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    hour = 3600 * FPS / 2 ** 20
+    for name, r in results.items():
+        print(f"{name}: detection thread {r['session_log_us']:6.1f} us/frame (JSON lines {r['json_lines_us']:6.1f}) | "
+              f"{r['session_log_bytes_per_frame'] * hour:6.1f} MB/hour (JSON lines "
+              f"{r['json_lines_bytes_per_frame'] * hour:6.1f}) | read + per-minute stats of {args.frames} frames "
+              f"{r['read']['session_log_ms']:7.1f} ms (JSON lines {r['read']['json_lines_ms']:7.1f})")
+
+
+if __name__ == "__main__":
+    main()
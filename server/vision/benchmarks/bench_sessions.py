@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sessions import SessionManager
+
+
+def load_jpeg_frames(video_path, max_frames=120, width=640):
+    frames = []
+    if video_path:
+        cap = cv2.VideoCapture(video_path)
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if not frames:
+            raise SystemExit(f"Could not read any frames from {video_path}")
+    else:
+        rng = np.random.default_rng(0)
+        for _ in range(30):
+            frames.append(rng.integers(0, 255, (width * 3 // 4, width, 3), dtype=np.uint8))
+
+    encoded = []
+    for frame in frames:
+        h, w = frame.shape[:2]
+        if w != width:
+            frame = cv2.resize(frame, (width, int(h * width / w)))
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        encoded.append(buf.tobytes())
+    return encoded
+
+
+def run_level(num_sessions, jpeg_frames, fps, duration, workers):
+    manager = SessionManager(max_workers=workers, max_sessions=num_sessions, remote_url=None)
+    sessions = [manager.create(f"bench{i}@example.com") for i in range(num_sessions)]
+
+    interval = 1.0 / fps
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    next_tick = start
+    tick = 0
+    while time.perf_counter() - start < duration:
+        frame = jpeg_frames[tick % len(jpeg_frames)]
+        for vision_session in sessions:
+            vision_session.submit_jpeg(frame)
+        tick += 1
+        next_tick += interval
+        time.sleep(max(0.0, next_tick - time.perf_counter()))
+    elapsed = time.perf_counter() - start
+    cpu_used = time.process_time() - cpu_start
+
+    per_session_fps = [s.frames_processed / elapsed for s in sessions]
+    dropped = sum(s.frames_dropped for s in sessions)
+    received = sum(s.frames_received for s in sessions)
+    manager.shutdown()
+
+    return {
+        "sessions": num_sessions,
+        "target_fps": fps,
+        "mean_fps": float(np.mean(per_session_fps)),
+        "min_fps": float(np.min(per_session_fps)),
+        "drop_rate": dropped / received if received else 0.0,
+        "cpu_cores_used": cpu_used / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how many vision sessions one node sustains per core")
+    parser.add_argument("--sessions", default="1,2,4,8,16", help="Comma-separated session counts to try")
+    parser.add_argument("--fps", type=float, default=5.0, help="Upload rate per session")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Shared worker pool size")
+    parser.add_argument("--video", help="Optional video file to use instead of synthetic frames")
+    parser.add_argument("--sustained", type=float, default=0.9,
+                        help="Fraction of target fps a level must reach to count as sustained")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    jpeg_frames = load_jpeg_frames(args.video)
+    cores = os.cpu_count() or 1
+    results = []
+
+    for num_sessions in [int(n) for n in args.sessions.split(",")]:
+        result = run_level(num_sessions, jpeg_frames, args.fps, args.duration, args.workers)
+        result["sustained"] = result["min_fps"] >= args.fps * args.sustained
+        results.append(result)
+        if not args.json:
+            print(f"{num_sessions:3d} sessions | mean {result['mean_fps']:5.2f} fps | "
+                  f"min {result['min_fps']:5.2f} fps | dropped {result['drop_rate'] * 100:5.1f}% | "
+                  f"{result['cpu_cores_used']:.2f} cores | {'OK' if result['sustained'] else 'saturated'}")
+
+    sustained = [r["sessions"] for r in results if r["sustained"]]
+    summary = {
+        "cores": cores,
+        "workers": args.workers,
+        "max_sustained_sessions": max(sustained) if sustained else 0,
+        "sessions_per_core": (max(sustained) / cores) if sustained else 0.0,
+        "levels": results,
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"\n{summary['max_sustained_sessions']} sessions sustained at {args.fps} fps on {cores} cores "
+              f"({summary['sessions_per_core']:.2f} sessions/core)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+VISION_DIR = os.path.dirname(BENCH_DIR)
+
+# Runs in a fresh interpreter so every figure includes imports and model loading
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+import cv2
+import numpy as np
+sys.path.insert(0, {vision_dir!r})
+import app
+app.start_session_manager()
+imported = time.perf_counter() - start
+if app.session_manager.event_sender is not None:
+    app.session_manager.event_sender.close(0)
+    app.session_manager.event_sender = None
+client = app.app.test_client()
+frame = cv2.imread({image!r}) if {image!r} else np.zeros((480, 640, 3), np.uint8)
+jpeg = cv2.imencode('.jpg', frame)[1].tobytes()
+
+ready = None
+if {wait_ready!r}:
+    while client.get('/ready').status_code != 200:
+        time.sleep(0.01)
+    ready = time.perf_counter() - start
+
+def first_result():
+    t = time.perf_counter()
+    client.post('/login', data={{'email': 'bench@example.com'}})
+    client.post('/api/frame', data=jpeg, content_type='image/jpeg')
+    while client.get('/api/state').get_json().get('version', 0) < 1:
+        time.sleep(0.002)
+    elapsed = time.perf_counter() - t
+    client.get('/logout')
+    return elapsed
+
+first = first_result()
+time.sleep(0.5)  # Let the logged-out pipeline be reset and pooled
+second = first_result()
+app.session_manager.shutdown()
+print("RESULT " + json.dumps({{"import_s": imported, "ready_s": ready, "first_login_s": first,
+                               "second_login_s": second, "process_to_first_result_s": imported + (ready or 0) + first}}))
+"""
+
+
+def run(warm, wait_ready, image, pipeline_mode):
+    env = dict(os.environ, VISION_WARM_PIPELINES=str(warm), VISION_PIPELINE_MODE=pipeline_mode)
+    code = CHILD.format(vision_dir=VISION_DIR, image=image, wait_ready=wait_ready)
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, cwd=VISION_DIR)
+    for line in out.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise RuntimeError(f"Startup run failed:\n{out.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time, time to /ready and time to the first result after login")
+    parser.add_argument("--image", default="", help="Face image to upload (default: a blank frame)")
+    parser.add_argument("--pipeline-mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = {
+        # Models load on the first login
+        "lazy": run(0, False, args.image, args.pipeline_mode),
+        # Models load in the background at start-up; log in once /ready says so
+        "warm": run(1, True, args.image, args.pipeline_mode),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, r in results.items():
+        ready = "     -" if r["ready_s"] is None else f"{r['ready_s']:6.2f}"
+        print(f"{name:>5}: import {r['import_s']:5.2f} s | /ready {ready} s | "
+              f"first login -> result {r['first_login_s']:6.3f} s | "
+              f"next login {r['second_login_s']:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+from werkzeug.serving import make_server
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as vision_app
+from pipeline import utc_timestamp
+from sessions import SessionManager
+
+EMAIL = "viewer-bench@example.com"
+
+
+class NullPipeline:
+    """Stands in for the detectors; the benchmark publishes state itself."""
+
+    def release(self):
+        pass
+
+
+class Viewers:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.latencies = []
+        self.stopped = threading.Event()
+
+    def observed(self, token, publish_times):
+        sent = publish_times.get(token)
+        if sent is not None:
+            with self.lock:
+                self.latencies.append(time.perf_counter() - sent)
+
+
+def poll_viewer(base_url, auth_token, viewers, publish_times, interval):
+    http = requests.Session()
+    http.headers["Authorization"] = f"Bearer {auth_token}"
+    last_token = None
+    time.sleep(random.uniform(0, interval))  # dashboards don't open in lockstep
+    while not viewers.stopped.is_set():
+        start = time.perf_counter()
+        try:
+            data = http.get(f"{base_url}/api/state", timeout=5).json()
+        except requests.RequestException:
+            continue
+        with viewers.lock:
+            viewers.requests += 1
+        token = data.get("current_tab_url")
+        if token != last_token:
+            viewers.observed(token, publish_times)
+            last_token = token
+        viewers.stopped.wait(max(0.0, interval - (time.perf_counter() - start)))
+
+
+def stream_viewer(base_url, auth_token, viewers, publish_times):
+    with viewers.lock:
+        viewers.requests += 1
+    response = requests.get(f"{base_url}/api/state/stream", headers={"Authorization": f"Bearer {auth_token}"},
+                            stream=True, timeout=30)
+    for line in response.iter_lines():
+        if viewers.stopped.is_set():
+            break
+        if line.startswith(b"data: "):
+            token = json.loads(line[6:]).get("current_tab_url")
+            if token is not None:
+                viewers.observed(token, publish_times)
+    response.close()
+
+
+def run_mode(mode, base_url, vision_session, viewer_count, duration, change_interval, frame_fps):
+    viewers = Viewers()
+    publish_times = {}
+    if mode == "poll":
+        targets = [lambda: poll_viewer(base_url, vision_session.token, viewers, publish_times, 1.0)] * viewer_count
+    else:
+        targets = [lambda: stream_viewer(base_url, vision_session.token, viewers, publish_times)] * viewer_count
+    threads = [threading.Thread(target=t, daemon=True) for t in targets]
+    for t in threads:
+        t.start()
+    time.sleep(1.0)  # let streams connect before measuring
+
+    with viewers.lock:
+        viewers.requests = 0
+        viewers.latencies.clear()
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    next_change = start
+    change = 0
+    while time.perf_counter() - start < duration:
+        now = time.perf_counter()
+        updates = {"timestamp": utc_timestamp()}
+        if now >= next_change:
+            change += 1
+            updates["current_tab_url"] = f"bench://{mode}/{change}"
+            publish_times[updates["current_tab_url"]] = time.perf_counter()
+            next_change += change_interval
+        # Every processed frame publishes; unchanged frames must not reach viewers
+        vision_session.state_stream.publish(vision_session.state.publish(updates))
+        time.sleep(1.0 / frame_fps)
+    elapsed = time.perf_counter() - start
+    cpu_used = time.process_time() - cpu_start
+
+    viewers.stopped.set()
+    # Wake streaming viewers so they notice the stop flag
+    vision_session.state_stream.publish(vision_session.state.publish({"current_tab_url": "bench://stop"}))
+    for t in threads:
+        t.join(timeout=5)
+
+    latencies = np.array(viewers.latencies) * 1000 if viewers.latencies else np.zeros(1)
+    return {
+        "viewers": viewer_count,
+        "requests_per_second": viewers.requests / elapsed,
+        "updates_observed": len(viewers.latencies),
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p95_ms": float(np.percentile(latencies, 95)),
+        "cpu_cores_used": cpu_used / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Polling /api/state vs the /api/state/stream push endpoint")
+    parser.add_argument("--viewers", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--change-interval", type=float, default=0.5, help="Seconds between state changes")
+    parser.add_argument("--frame-fps", type=float, default=10.0, help="Publishes per second, changed or not")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    vision_app.session_manager = SessionManager(max_workers=1, remote_url=None, pipeline_factory=NullPipeline)
+    vision_session = vision_app.session_manager.create(EMAIL)
+
+    server = make_server("127.0.0.1", 0, vision_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    results = {}
+    for mode in ("poll", "stream"):
+        results[mode] = run_mode(mode, base_url, vision_session, args.viewers, args.duration,
+                                 args.change_interval, args.frame_fps)
+
+    vision_app.session_manager.shutdown()
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for mode, r in results.items():
+        print(f"{mode:>6}: {r['viewers']} viewers | {r['requests_per_second']:6.1f} requests/s | "
+              f"change->viewer p50 {r['latency_p50_ms']:6.1f} ms | p95 {r['latency_p95_ms']:6.1f} ms | "
+              f"{r['cpu_cores_used']:.2f} cores (server + viewers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import os
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+# Head and shoulders from NASA's public-domain portrait of Eileen Collins (scikit-image's "astronaut")
+FACE_IMAGE = os.path.join(BENCH_DIR, "data", "astronaut.jpg")
+
+WIDTH, HEIGHT = 640, 480
+BACKGROUND = (96, 104, 112)
+SKIN = (120, 150, 200)
+
+# Face poses: (head turn, x of the photo's left edge) on a 640-wide frame
+FACE_POSES = {"front": (0.0, 90), "turned": (0.45, 0)}
+
+# The scene loops every SCENE_FRAMES frames (10 s at 15 fps). Each segment: (first frame, face pose, hand pose).
+SCENE_FRAMES = 150
+SCRIPT = (
+    (0, "front", None),  # At the screen
+    (30, "front", "open"),  # Raises a hand
+    (45, "front", "wave"),
+    (75, "turned", None),  # Looks away
+    (90, "front", "thumbs_up"),
+    (110, None, None),  # Leaves
+    (130, "front", None),  # Comes back
+)
+
+# Hand poses: (fingers up, thumb joints, size, rotation in degrees). Fingers are index to little; the drawing
+# is tuned so MediaPipe Hands finds it at the detector's 0.7 confidence and its rules read the intended gesture.
+HAND_POSES = {
+    "open": ((1, 1, 1, 1), ((-0.42, -0.5), (-0.6, -0.1), (-0.75, 0.3)), 120, 0.0),
+    "thumbs_up": ((0, 0, 0, 0), ((-0.42, -0.3), (-0.66, 0.15), (-0.7, 0.6)), 115, 10.0),
+}
+HAND_POSES["wave"] = HAND_POSES["open"]
+# Base x, length and width of each finger in palm widths
+FINGERS = ((-0.33, 0.78, 0.2), (-0.11, 0.9, 0.21), (0.11, 0.86, 0.21), (0.32, 0.66, 0.19))
+SPREAD = 0.08
+
+
+def _capsule(mask, a, b, radius):
+    cv2.line(mask, a, b, 255, max(1, int(2 * radius)), cv2.LINE_AA)
+    cv2.circle(mask, a, int(radius), 255, -1, cv2.LINE_AA)
+    cv2.circle(mask, b, int(radius), 255, -1, cv2.LINE_AA)
+
+
+def hand_sprite(pose):
+    """A shaded hand as (BGR, alpha) on a square canvas with the palm's top centre in the middle."""
+    fingers, thumb, size, angle = HAND_POSES[pose]
+    side = int(size * 4.2)
+    centre = side // 2
+    rotation = cv2.getRotationMatrix2D((0, 0), angle, 1)[:, :2]
+
+    def point(x, y):
+        p = rotation @ np.array((x, -y))
+        return int(round(centre + p[0] * size)), int(round(centre + p[1] * size))
+
+    shape = (side, side)
+    palm = np.zeros(shape, np.uint8)
+    for outline in ([(-0.46, 0.02), (0.44, 0.02), (0.42, -0.55), (0.3, -0.9), (-0.3, -0.9), (-0.46, -0.5)],
+                    [(-0.3, -0.85), (0.3, -0.85), (0.34, -2.0), (-0.34, -2.0)]):  # Palm, then wrist
+        cv2.fillPoly(palm, [np.array([point(*p) for p in outline], np.int32)], 255, cv2.LINE_AA)
+    # (mask, creases, nail centre, nail radius); drawn in order, each over the last
+    parts = [(palm, [], None, 0)]
+    for i, (up, (x, length, width)) in enumerate(zip(fingers, FINGERS)):
+        mask = np.zeros(shape, np.uint8)
+        radius = width * size / 2
+        tilt = (i - 1.5) * SPREAD
+        if up:
+            _capsule(mask, point(x, -0.02), point(x + tilt * length, length), radius)
+            creases = [(x + tilt * length * f, length * f) for f in (0.35, 0.68)]
+            parts.append((mask, [(cx, cy, width) for cx, cy in creases], (x + tilt * length * 0.9, length * 0.9),
+                          radius))
+        else:  # Curled over the palm
+            _capsule(mask, point(x, 0.02), point(x, 0.12), radius * 1.05)
+            parts.append((mask, [(x, 0.0, width)], None, 0))
+    mask = np.zeros(shape, np.uint8)
+    _capsule(mask, point(*thumb[0]), point(*thumb[1]), 0.15 * size)
+    _capsule(mask, point(*thumb[1]), point(*thumb[2]), 0.12 * size)
+    parts.append((mask, [], thumb[2], 0.12 * size))
+
+    skin = np.array(SKIN, np.float32)
+    crease_color = tuple(float(c) * 0.7 for c in skin)
+    nail_color = tuple(min(255.0, float(c) * 1.12 + 12) for c in skin)
+    texture = cv2.GaussianBlur(np.random.default_rng(7).normal(0, 1, shape).astype(np.float32), (0, 0), 1.2) * 4
+    color = np.zeros(shape + (3,), np.float32)
+    alpha = np.zeros(shape + (1,), np.float32)
+    for mask, creases, nail, nail_radius in parts:
+        # Each part is shaded like a cylinder, so overlapping fingers stay apart
+        distance = cv2.distanceTransform((mask > 127).astype(np.uint8), cv2.DIST_L2, 5)
+        shade = 0.6 + 0.4 * np.sqrt(distance / max(float(distance.max()), 1.0))
+        part = shade[..., None] * skin + texture[..., None]
+        for cx, cy, width in creases:
+            cv2.line(part, point(cx - width * 0.35, cy), point(cx + width * 0.35, cy), crease_color, 1, cv2.LINE_AA)
+        if nail is not None:
+            cv2.ellipse(part, point(*nail), (int(nail_radius * 0.6), int(nail_radius * 0.75)), -angle, 0, 360,
+                        nail_color, -1, cv2.LINE_AA)
+        a = cv2.GaussianBlur(mask, (3, 3), 0)[..., None] / 255.0
+        color = color * (1 - a) + part * a
+        alpha = np.maximum(alpha, a)
+    return color, alpha
+
+
+def turned(face, amount):
+    """The face warped as if the head were turned to one side."""
+    h, w = face.shape[:2]
+    shift = amount * w
+    corners = np.float32([[0, 0], [w, 0], [w, h], [0, h]])
+    warped = np.float32([[shift, -0.15 * shift], [w, 0], [w, h], [shift, h]])
+    return cv2.warpPerspective(face, cv2.getPerspectiveTransform(corners, warped), (w, h),
+                               borderMode=cv2.BORDER_REPLICATE)
+
+
+class SyntheticScene:
+    """A scripted webcam-like scene whose face and hand MediaPipe actually detects.
+
+    A face photo sits at the screen while a drawn hand is raised, waves
+    and gives a thumbs up; the face turns away, leaves and comes back
+    (see SCRIPT). Backgrounds and hand sprites are rendered once, so a
+    frame costs a copy and a small blend, and every run gives the same
+    pixels.
+    """
+
+    def __init__(self, width=WIDTH):
+        face = cv2.imread(FACE_IMAGE)
+        if face is None:
+            raise FileNotFoundError(FACE_IMAGE)
+        scale = width / WIDTH
+        self.width, self.height = width, int(HEIGHT * scale)
+        face = cv2.resize(face, (int(face.shape[1] * scale), int(face.shape[0] * scale)))
+        self.faces = {pose: (turned(face, turn) if turn else face, int(x * scale))
+                      for pose, (turn, x) in FACE_POSES.items()}
+        self.face_y = int(100 * scale)
+        self.blank = np.full((self.height, self.width, 3), BACKGROUND, np.uint8)
+        self.hands = {pose: self._sprite(*hand_sprite(pose), scale) for pose in HAND_POSES}
+        self.hand_centre = (int(480 * scale), int(330 * scale))
+
+    @staticmethod
+    def _sprite(color, alpha, scale):
+        """A hand cropped to its pixels as (color * alpha, 255 - alpha, x and y offset from its centre), in
+        integers, so pasting it is one multiply-add."""
+        if scale != 1:
+            size = (int(color.shape[1] * scale), int(color.shape[0] * scale))
+            color, alpha = cv2.resize(color, size), cv2.resize(alpha, size)[..., None]
+        alpha = np.rint(alpha * 255).astype(np.uint16)
+        ys, xs = np.nonzero(alpha[..., 0])
+        crop = np.s_[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+        premultiplied = np.rint(color * alpha).astype(np.uint16)[crop]
+        return premultiplied, 255 - alpha[crop], xs.min() - color.shape[1] // 2, ys.min() - color.shape[0] // 2
+
+    @staticmethod
+    def segment(index):
+        index %= SCENE_FRAMES
+        for start, face, hand in reversed(SCRIPT):
+            if index >= start:
+                return face, hand
+
+    def frame(self, index):
+        face_pose, hand_pose = self.segment(index)
+        frame = self.blank.copy()
+        if face_pose is not None:
+            face, x = self.faces[face_pose]
+            # A little sway, so consecutive frames are never identical
+            x = max(0, x + int(round(4 * np.sin(index / 7))))
+            y = self.face_y
+            frame[y:y + face.shape[0], x:x + face.shape[1]] = face
+        if hand_pose is not None:
+            premultiplied, inverse, dx, dy = self.hands[hand_pose]
+            x0, y0 = self.hand_centre[0] + dx, self.hand_centre[1] + dy
+            if hand_pose == "wave":
+                x0 += int(round(0.07 * self.width * np.sin(2 * np.pi * index / 10)))  # 1.5 swings per second
+            # Clip the sprite to the frame
+            fx0, fy0 = max(0, x0), max(0, y0)
+            fx1, fy1 = min(self.width, x0 + inverse.shape[1]), min(self.height, y0 + inverse.shape[0])
+            sprite = np.s_[fy0 - y0:fy1 - y0, fx0 - x0:fx1 - x0]
+            region = frame[fy0:fy1, fx0:fx1]
+            region[:] = (region * inverse[sprite] + premultiplied[sprite]) // 255
+        return frame
+
+    def frames(self, count):
+        for i in range(count):
+            yield self.frame(i)
@@ -1,9 +1,13 @@
+import sys
 import cv2
 import time
 
-def test_camera():
+from frame_sources import open_source
+
+def test_camera(source="0"):
     print("Opening camera...")
-    cap = cv2.VideoCapture(0)
+    # Prints the size, frame rate and pixel format the camera granted
+    cap = open_source(source)
     
     if not cap.isOpened():
         print("Error: Could not open camera.")
@@ -32,4 +36,4 @@ def test_camera():
     return True
 
 if __name__ == "__main__":
-    test_camera()
\ No newline at end of file
+    test_camera(sys.argv[1] if len(sys.argv) > 1 else "0")
\ No newline at end of file
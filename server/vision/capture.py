@@ -0,0 +1,102 @@
+import threading
+import time
+
+import cv2
+
+import metrics
+
+
+class FrameGrabber:
+    """Reads a cv2.VideoCapture source on its own thread.
+
+    Only the newest frame is kept: a frame that is overwritten before
+    anyone reads it counts as dropped, so the analysis loop never works
+    through a backlog of stale driver-buffered frames.
+    """
+
+    def __init__(self, source=0):
+        # A device index / path, or anything with VideoCapture's read()/isOpened()/release()
+        self.cap = source if hasattr(source, "read") else cv2.VideoCapture(source)
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self._frame = None
+        self._timestamp = 0.0
+        self._frame_id = 0
+        self._read_id = 0
+        self._cond = threading.Condition()
+        self._running = self.cap.isOpened()
+        self.thread = None
+        if self._running:
+            self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+            self.thread.start()
+
+    def isOpened(self):
+        return self._running
+
+    def _capture_loop(self):
+        while self._running:
+            with metrics.timer("capture"):
+                ret, frame = self.cap.read()
+            timestamp = time.time()
+            with self._cond:
+                if not ret:
+                    print("❌ Failed to grab frame")
+                    self._running = False
+                    self._cond.notify_all()
+                    break
+                metrics.FRAMES_RECEIVED.inc()
+                if self._frame_id > self._read_id:
+                    self.frames_dropped += 1
+                    metrics.FRAMES_DROPPED.inc()
+                self._frame = frame
+                self._timestamp = timestamp
+                self._frame_id += 1
+                self.frames_captured += 1
+                self._cond.notify_all()
+
+    def read(self):
+        """Newest frame not returned before, with its capture time.
+
+        Waits as long as the capture thread runs, so a slow first frame or a
+        stalled camera doesn't end the stream; (None, None) once the source
+        is exhausted or released.
+        """
+        with self._cond:
+            waited = 0
+            while self._frame_id <= self._read_id and self._running:
+                if not self._cond.wait(timeout=1.0):
+                    waited += 1
+                    if waited == 5:
+                        print("⏳ Still waiting for a frame from the source...")
+            if self._frame_id <= self._read_id:
+                return None, None
+            self._read_id = self._frame_id
+            return self._frame, self._timestamp
+
+    def release(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.cap.release()
+
+
+class Pacer:
+    """Paces a loop to `fps` iterations per second.
+
+    Sleeps only for what is left of the current slot; when an iteration
+    overruns, the schedule restarts from now instead of bursting to catch up.
+    """
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps else 0.0
+        self.next_time = time.perf_counter()
+
+    def wait(self):
+        self.next_time += self.interval
+        delay = self.next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self.next_time = time.perf_counter()
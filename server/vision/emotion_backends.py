@@ -0,0 +1,138 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from landmarks import MODEL_IMPORT_LOCK
+
+# Class order shared by DeepFace and the bundled FER model
+EMOTION_LABELS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "emotion_model.hdf5")
+
+# model path -> SharedKerasModel; every session's backend reuses one model and trace
+_SHARED_MODELS = {}
+_SHARED_MODELS_LOCK = threading.Lock()
+
+
+class SharedKerasModel:
+    """One loaded Keras model and its traced tf.functions, shared per model path."""
+
+    def __init__(self, model_path):
+        with MODEL_IMPORT_LOCK:  # Not while MediaPipe's import hides TensorFlow
+            import tensorflow as tf
+            try:
+                import tf_keras as keras  # Keras 2 reader for the legacy HDF5 format
+            except ImportError:
+                from tensorflow import keras
+
+        self.model = keras.models.load_model(model_path, compile=False)
+        self.input_shape = self.model.input_shape
+        _, height, width, channels = self.input_shape
+        if channels != 1:
+            raise ValueError(f"Expected a grayscale emotion model, got {channels} input channels")
+
+        self._lock = threading.Lock()
+        # No Python control flow to convert; autograph would walk the whole Keras model (seconds)
+        self.infer = tf.function(
+            lambda x: self.model(x, training=False),
+            input_signature=[tf.TensorSpec((1, height, width, 1), tf.float32)],
+            autograph=False
+        )
+        self.infer(np.zeros((1, height, width, 1), dtype=np.float32))  # Trace now rather than on the first face
+        self._infer_batch = None  # Multi-face batches get their own trace, on first use
+
+    @property
+    def infer_batch(self):
+        with self._lock:
+            if self._infer_batch is None:
+                import tensorflow as tf
+                _, height, width, _ = self.input_shape
+                self._infer_batch = tf.function(
+                    lambda x: self.model(x, training=False),
+                    input_signature=[tf.TensorSpec((None, height, width, 1), tf.float32)],
+                    autograph=False
+                )
+            return self._infer_batch
+
+
+def shared_keras_model(model_path=DEFAULT_MODEL_PATH):
+    """Loads and traces `model_path` on first use; later callers get the same SharedKerasModel."""
+    model_path = os.path.abspath(model_path)
+    with _SHARED_MODELS_LOCK:
+        if model_path not in _SHARED_MODELS:
+            _SHARED_MODELS[model_path] = SharedKerasModel(model_path)
+        return _SHARED_MODELS[model_path]
+
+
+class KerasEmotionBackend:
+    """Runs the bundled emotion_model.hdf5 in-process.
+
+    The model is loaded and traced once per model path and shared by every
+    instance; each instance keeps its own grayscale and input-tensor buffers.
+    """
+
+    name = "keras"
+
+    def __init__(self, model_path=DEFAULT_MODEL_PATH):
+        self.shared = shared_keras_model(model_path)
+        self.model = self.shared.model
+        _, self.height, self.width, _ = self.shared.input_shape
+
+        self._gray = np.empty((self.height, self.width), dtype=np.uint8)
+        self._input = np.empty((1, self.height, self.width, 1), dtype=np.float32)
+
+    def _prepare(self, face_rgb, out):
+        gray = cv2.cvtColor(face_rgb, cv2.COLOR_RGB2GRAY)
+        cv2.resize(gray, (self.width, self.height), dst=self._gray, interpolation=cv2.INTER_AREA)
+        # Scale to [-1, 1] as the model was trained
+        np.multiply(self._gray, 2.0 / 255.0, out=out, casting='unsafe')
+        out -= 1.0
+
+    def predict(self, face_rgb):
+        self._prepare(face_rgb, self._input[0, :, :, 0])
+        # Percentages, like DeepFace, so the same thresholds apply
+        return self.shared.infer(self._input).numpy()[0] * 100.0
+
+    def predict_batch(self, face_rgbs):
+        """Scores for several faces in one model call -> (faces, classes)."""
+        if len(face_rgbs) == 1:
+            return self.predict(face_rgbs[0])[None]
+        batch = np.empty((len(face_rgbs),) + self._input.shape[1:], dtype=np.float32)
+        for face_rgb, face_input in zip(face_rgbs, batch):
+            self._prepare(face_rgb, face_input[:, :, 0])
+        return self.shared.infer_batch(batch).numpy() * 100.0
+
+
+class DeepFaceEmotionBackend:
+    name = "deepface"
+
+    def __init__(self):
+        with MODEL_IMPORT_LOCK:
+            from deepface import DeepFace
+        self.deepface = DeepFace
+
+    def predict(self, face_rgb):
+        face_bgr = cv2.cvtColor(face_rgb, cv2.COLOR_RGB2BGR)
+        result = self.deepface.analyze(face_bgr, actions=["emotion"], enforce_detection=False, silent=True)
+        emotion_data = result[0] if isinstance(result, list) else result
+        raw_emotions = emotion_data['emotion']
+        return np.array([raw_emotions.get(label, 0) for label in EMOTION_LABELS], dtype=np.float32)
+
+    def predict_batch(self, face_rgbs):
+        return np.stack([self.predict(face_rgb) for face_rgb in face_rgbs])
+
+
+EMOTION_BACKENDS = {
+    KerasEmotionBackend.name: KerasEmotionBackend,
+    DeepFaceEmotionBackend.name: DeepFaceEmotionBackend,
+}
+
+
+def create_emotion_backend(backend):
+    if not isinstance(backend, str):
+        return backend
+    if backend not in EMOTION_BACKENDS:
+        raise ValueError(f"Unknown emotion backend {backend!r}, expected one of {', '.join(EMOTION_BACKENDS)}")
+    return EMOTION_BACKENDS[backend]()
@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+_HASH_SIZE = 8
+_BIT_WEIGHTS = 1 << np.arange(_HASH_SIZE * _HASH_SIZE, dtype=np.uint64)
+
+
+def face_fingerprint(face_rgb):
+    """64-bit difference hash of the grayscale crop.
+
+    The crop is averaged down to 9x8 and each bit says whether a pixel is
+    brighter than its right-hand neighbour, so sensor noise, small shifts
+    and lighting drift leave most bits alone while a new expression
+    (mouth, brows) flips several.
+    """
+    gray = cv2.cvtColor(face_rgb, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (_HASH_SIZE + 1, _HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(_BIT_WEIGHTS[bits].sum())
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class EmotionCache:
+    """Small LRU of model scores keyed by face fingerprint.
+
+    A lookup hits when a stored fingerprint is within `max_distance` bits.
+    Entries expire `ttl` seconds after the model produced them, hits
+    included, so a slowly changing expression is re-classified at least
+    that often. Times are the frame timestamps, like the detectors' clocks.
+    """
+
+    def __init__(self, capacity=16, max_distance=6, ttl=2.0):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # fingerprint -> (scores, stored at)
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint, now):
+        with self._lock:
+            best, best_distance = None, self.max_distance + 1
+            for key, (_, stored_at) in list(self._entries.items()):
+                if now - stored_at > self.ttl:
+                    del self._entries[key]
+                    continue
+                distance = hamming(key, fingerprint)
+                if distance < best_distance:
+                    best, best_distance = key, distance
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best)
+            return self._entries[best][0]
+
+    def put(self, fingerprint, scores, now):
+        with self._lock:
+            self._entries[fingerprint] = (scores, now)
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "model_calls_avoided": self.hits,
+        }
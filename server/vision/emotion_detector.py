@@ -1,151 +1,276 @@
-import cv2
 import numpy as np
+import threading
 import time
-from deepface import DeepFace
 from collections import deque
-import mediapipe as mp
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import render
+from emotion_backends import EMOTION_LABELS, create_emotion_backend
+from emotion_cache import EmotionCache, face_fingerprint
+from latency import LatencyWindow
 
 class EmotionDetector:
-    def __init__(self):
-        self.mp_face_detection = mp.solutions.face_detection
-        self.face_detection = self.mp_face_detection.FaceDetection(model_selection=1, min_detection_confidence=0.5)
+    def __init__(self, render_mode=render.RENDER_OFF, backend="keras", asynchronous=True, cache_size=16,
+                 cache_distance=6, cache_ttl=2.0):
+        self.render_mode = render.parse_render_mode(render_mode)
+        # Loaded once here; "deepface" selects the old DeepFace.analyze path
+        self.backend = create_emotion_backend(backend)
+        self.process_interval = 0.4
+        self.track_timeout = 2.0  # Multi-face: forget a person's emotion once unseen this long
+        self.emotion_history = deque(maxlen=3)  # Shorter history for more responsiveness
+        self._cache_options = (cache_size, cache_distance, cache_ttl)
+
+        # Inference runs on its own worker so it never stalls focus/gesture tracking.
+        # Crops wait in a single slot (newest wins) while the worker is busy.
+        self.asynchronous = asynchronous
+        self._lock = threading.Lock()
+        self._pending_job = None
+        self._busy = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="emotion") if asynchronous else None
+        self.reset()
+        print(f"[EmotionDetector] Initialized with {self.backend.name} backend")
+
+    def reset(self):
+        """Drops queued crops and per-user state so the detector can serve a new session."""
+        if self._executor is not None:
+            with self._lock:
+                self._pending_job = None
+            # The worker is single-threaded: once this no-op runs, any in-flight crop is done
+            self._executor.submit(lambda: None).result()
         self.last_face_position = None
         self.last_processed_time = 0
-        self.process_interval = 0.4
         self.last_emotion = {"emotion": "Neutral", "confidence": 0.7}
-        self.emotion_history = deque(maxlen=3)  # Shorter history for more responsiveness
-        self.debug = True
-        print("[EmotionDetector] Initialized with DeepFace backend")
+        self.emotion_history.clear()
+        self._tracks = {}  # Multi-face: track id -> (emotion history, last emotion, last seen)
+        self.track_emotions = {}
+        self.last_scores = None  # Model scores behind the last result (the session log records them)
+        self.track_scores = {}
+        self.inference_latency = LatencyWindow()
+        self.crops_dropped = 0
+        # A still face gives near-identical crops; reuse their scores instead of re-running the model
+        cache_size, cache_distance, cache_ttl = self._cache_options
+        self.cache = EmotionCache(cache_size, cache_distance, cache_ttl) if cache_size else None
+
+    def warm_up(self, faces=1):
+        """One inference on blank crops, so lazily loaded backends (and batches of `faces`) are ready before the first face."""
+        blank = np.zeros((64, 64, 3), dtype=np.uint8)
+        self.backend.predict(blank)
+        if faces > 1:
+            self.backend.predict_batch([blank] * faces)
 
-    def detect_emotion(self, frame):
-        current_time = time.time()
+    def detect_emotion(self, packet):
+        current_time = packet.timestamp
         process_now = current_time - self.last_processed_time >= self.process_interval
         
-        # Always track faces with MediaPipe in every frame
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_detection.process(frame_rgb)
-
-        if results.detections:
-            detection = results.detections[0]
-            h, w, _ = frame.shape
-            bbox = detection.location_data.relative_bounding_box
-            x = max(0, int(bbox.xmin * w))
-            y = max(0, int(bbox.ymin * h))
-            width = min(int(bbox.width * w), w - x)
-            height = min(int(bbox.height * h), h - y)
-            self.last_face_position = (x, y, width, height)
+        # Face box comes from the shared FaceTracker stage, derived from the FaceMesh landmarks
+        if packet.face is not None and packet.face.face_present:
+            self.last_face_position = packet.face.bbox
         
         # Process emotion only at the specified interval
         if process_now and self.last_face_position:
             self.last_processed_time = current_time
             x, y, width, height = self.last_face_position
-            face_img = frame[y:y+height, x:x+width]
-            
-            if face_img.size == 0:
-                # Still draw the previous emotion box
-                if self.debug and self.last_emotion.get("face_position"):
-                    x, y, width, height = self.last_emotion["face_position"]
-                    self._draw_emotion_box(frame, x, y, width, height, 
-                                          self.last_emotion["emotion"], 
-                                          self.last_emotion["confidence"])
+            if width <= 0 or height <= 0:
                 return self.last_emotion
 
-            try:
-                result = DeepFace.analyze(face_img, actions=["emotion"], enforce_detection=False, silent=True)
-                emotion_data = result[0] if isinstance(result, list) else result
-                
-                # Get raw emotion scores
-                raw_emotions = emotion_data['emotion']
-                if self.debug:
-                    print(f"[DEBUG] Raw emotion scores: {raw_emotions}")
-                
-                # Get the three emotions we care about
-                happy_score = raw_emotions.get("happy", 0) 
-                sad_score = raw_emotions.get("sad", 0)
-                neutral_score = raw_emotions.get("neutral", 0)
-                
-                # SIMPLE MOUTH-BASED DETECTION
-                # Boost happy for smiles
-                if happy_score > 30:  # Even moderate smiles
-                    happy_score *= 2.0
-                    
-                # Increase sad sensitivity (less dampening)
-                sad_score *= 0.7  # Was 0.4, now more sensitive
-                
-                # Slightly reduce neutral to make emotions more detectable
-                neutral_score *= 0.9
-                
-                # Calculate normalized scores
-                total = happy_score + sad_score + neutral_score
-                if total > 0:
-                    happy_norm = happy_score / total
-                    sad_norm = sad_score / total
-                    neutral_norm = neutral_score / total
-                else:
-                    happy_norm = sad_norm = neutral_norm = 1/3
-                
-                # Simple decision logic
-                if happy_norm > 0.5:  # Clear happiness
-                    dominant_emotion = "Happy"
-                    confidence = happy_norm
-                elif sad_norm > 0.4:  # More sensitive to sadness
-                    dominant_emotion = "Sad"
-                    confidence = sad_norm
-                else:
-                    dominant_emotion = "Neutral"
-                    confidence = neutral_norm
-                
-                # Add to history
-                self.emotion_history.append(dominant_emotion)
-                
-                if self.debug:
-                    print(f"[DEBUG] Emotion history: {list(self.emotion_history)}")
-                
-                # Very simple stability - just need 2 consecutive detections
-                if len(self.emotion_history) >= 2:
-                    last_two = list(self.emotion_history)[-2:]
-                    if last_two[0] == last_two[1]:  # Two consecutive same emotions
-                        final_emotion = last_two[0]
-                    else:
-                        # Stick with current emotion unless we've detected something different
-                        # for the past two frames
-                        final_emotion = self.last_emotion["emotion"]
-                        
-                        # Special case: if previously Neutral and now detecting emotions, be responsive
-                        if final_emotion == "Neutral" and dominant_emotion != "Neutral":
-                            final_emotion = dominant_emotion
-                else:
-                    final_emotion = dominant_emotion
+            # Crop from the clean RGB view so earlier detectors' overlays never reach the model
+            face_img = packet.rgb[y:y+height, x:x+width]
+            if self.asynchronous:
+                # The packet buffers are overwritten by the next frame
+                self._submit(self._classify, face_img.copy(), current_time)
+            else:
+                self._classify(face_img, current_time)
+        elif not process_now:
+            metrics.STAGE_SKIPPED.inc(label="emotion")
+
+        return self.last_emotion
 
-                self.last_emotion = {
-                    "emotion": final_emotion,
-                    "confidence": confidence,
-                    "face_position": self.last_face_position
-                }
+    def detect_emotions(self, packet):
+        """Multi-face mode: crops every face in `packet.faces` and classifies them in one batch.
 
-            except Exception as e:
-                print(f"[EmotionDetector] DeepFace error: {e}")
+        Returns {track id: emotion} for the people seen recently; results
+        land once the (possibly background) batch finishes.
+        """
+        current_time = packet.timestamp
+        if packet.face is not None and packet.face.face_present:
+            self.last_face_position = packet.face.bbox
+        if current_time - self.last_processed_time < self.process_interval:
+            metrics.STAGE_SKIPPED.inc(label="emotion")
+            return self.track_emotions
+
+        faces = [f for f in packet.faces if f.face_present and f.bbox[2] > 0 and f.bbox[3] > 0]
+        if faces:
+            self.last_processed_time = current_time
+            crops = [packet.rgb[y:y+height, x:x+width] for x, y, width, height in (f.bbox for f in faces)]
+            track_ids = [f.track_id for f in faces]
+            if self.asynchronous:
+                self._submit(self._classify_tracks, [crop.copy() for crop in crops], track_ids, current_time)
+            else:
+                self._classify_tracks(crops, track_ids, current_time)
+        return self.track_emotions
+
+    def _submit(self, job, *args):
+        with self._lock:
+            if self._pending_job is not None:
+                self.crops_dropped += 1
+                metrics.EMOTION_CROPS_DROPPED.inc()
+            self._pending_job = (job, args)
+            if self._busy:
+                return
+            self._busy = True
+        self._executor.submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                pending = self._pending_job
+                self._pending_job = None
+                if pending is None:
+                    self._busy = False
+                    return
+            job, args = pending
+            job(*args)
+
+    def _predict(self, face_img, timestamp):
+        if self.cache is None:
+            with metrics.timer("emotion_inference"):
+                return self.backend.predict(face_img)
+        fingerprint = face_fingerprint(face_img)
+        scores = self.cache.get(fingerprint, timestamp)
+        if scores is not None:
+            metrics.EMOTION_CACHE_LOOKUPS.inc(label="hit")
+            return scores
+        metrics.EMOTION_CACHE_LOOKUPS.inc(label="miss")
+        with metrics.timer("emotion_inference"):
+            scores = self.backend.predict(face_img)
+        self.cache.put(fingerprint, scores, timestamp)
+        return scores
+
+    def _predict_batch(self, face_imgs, timestamp):
+        if self.cache is None:
+            with metrics.timer("emotion_inference"):
+                return list(self.backend.predict_batch(face_imgs))
+        fingerprints = [face_fingerprint(face_img) for face_img in face_imgs]
+        scores = [self.cache.get(fingerprint, timestamp) for fingerprint in fingerprints]
+        misses = [i for i, face_scores in enumerate(scores) if face_scores is None]
+        metrics.EMOTION_CACHE_LOOKUPS.inc(len(scores) - len(misses), label="hit")
+        metrics.EMOTION_CACHE_LOOKUPS.inc(len(misses), label="miss")
+        if misses:
+            # Only the faces the cache doesn't know go to the model, all in one call
+            with metrics.timer("emotion_inference"):
+                fresh = self.backend.predict_batch([face_imgs[i] for i in misses])
+            for i, face_scores in zip(misses, fresh):
+                scores[i] = face_scores
+                self.cache.put(fingerprints[i], face_scores, timestamp)
+        return scores
+
+    def _classify(self, face_img, timestamp):
+        start = time.perf_counter()
+        try:
+            scores = self._predict(face_img, timestamp)
+            emotion = self._smooth(scores, self.emotion_history, self.last_emotion)
+            emotion["face_position"] = self.last_face_position
+            self.last_emotion = emotion
+            self.last_scores = scores
+        except Exception as e:
+            print(f"[EmotionDetector] {self.backend.name} error: {e}")
+        self.inference_latency.record(time.perf_counter() - start)
+
+    def _classify_tracks(self, face_imgs, track_ids, timestamp):
+        start = time.perf_counter()
+        try:
+            scores = self._predict_batch(face_imgs, timestamp)
+            for track_id, face_scores in zip(track_ids, scores):
+                history, previous, _ = self._tracks.get(track_id) or (deque(maxlen=self.emotion_history.maxlen),
+                                                                       {"emotion": "Neutral", "confidence": 0.7},
+                                                                       timestamp)
+                self._tracks[track_id] = (history, self._smooth(face_scores, history, previous), timestamp)
+            self._tracks = {track_id: track for track_id, track in self._tracks.items()
+                            if timestamp - track[2] <= self.track_timeout}
+            self.track_emotions = {track_id: track[1] for track_id, track in self._tracks.items()}
+            self.track_scores = dict(zip(track_ids, scores))
+        except Exception as e:
+            print(f"[EmotionDetector] {self.backend.name} error: {e}")
+        self.inference_latency.record(time.perf_counter() - start)
+
+    @staticmethod
+    def _smooth(scores, emotion_history, last_emotion):
+        """Turns one face's model scores into its next {"emotion", "confidence"}, given its recent results."""
+        # Get raw emotion scores
+        raw_emotions = dict(zip(EMOTION_LABELS, scores.tolist()))
         
-        # Always draw the emotion box in every frame, even if we didn't process a new emotion
-        if self.debug and self.last_face_position and self.last_emotion:
-            # Use the current face position with the last detected emotion
-            x, y, width, height = self.last_face_position
-            self._draw_emotion_box(frame, x, y, width, height, 
-                                  self.last_emotion["emotion"], 
-                                  self.last_emotion["confidence"])
+        # Get the three emotions we care about
+        happy_score = raw_emotions.get("happy", 0) 
+        sad_score = raw_emotions.get("sad", 0)
+        neutral_score = raw_emotions.get("neutral", 0)
+        
+        # SIMPLE MOUTH-BASED DETECTION
+        # Boost happy for smiles
+        if happy_score > 30:  # Even moderate smiles
+            happy_score *= 2.0
+            
+        # Increase sad sensitivity (less dampening)
+        sad_score *= 0.7  # Was 0.4, now more sensitive
+        
+        # Slightly reduce neutral to make emotions more detectable
+        neutral_score *= 0.9
+        
+        # Calculate normalized scores
+        total = happy_score + sad_score + neutral_score
+        if total > 0:
+            happy_norm = happy_score / total
+            sad_norm = sad_score / total
+            neutral_norm = neutral_score / total
+        else:
+            happy_norm = sad_norm = neutral_norm = 1/3
+        
+        # Simple decision logic
+        if happy_norm > 0.5:  # Clear happiness
+            dominant_emotion = "Happy"
+            confidence = happy_norm
+        elif sad_norm > 0.4:  # More sensitive to sadness
+            dominant_emotion = "Sad"
+            confidence = sad_norm
+        else:
+            dominant_emotion = "Neutral"
+            confidence = neutral_norm
+        
+        # Add to history
+        emotion_history.append(dominant_emotion)
+        metrics.EMOTION_RESULTS.inc(label=dominant_emotion)
+        
+        # Very simple stability - just need 2 consecutive detections
+        if len(emotion_history) >= 2:
+            last_two = list(emotion_history)[-2:]
+            if last_two[0] == last_two[1]:  # Two consecutive same emotions
+                final_emotion = last_two[0]
+            else:
+                # Stick with current emotion unless we've detected something different
+                # for the past two frames
+                final_emotion = last_emotion["emotion"]
+                
+                # Special case: if previously Neutral and now detecting emotions, be responsive
+                if final_emotion == "Neutral" and dominant_emotion != "Neutral":
+                    final_emotion = dominant_emotion
+        else:
+            final_emotion = dominant_emotion
 
-        return self.last_emotion
+        return {"emotion": final_emotion, "confidence": confidence}
 
-    def _draw_emotion_box(self, frame, x, y, w, h, emotion, confidence):
-        colors = {
-            "Happy": (0, 255, 0),  # Green
-            "Sad": (255, 0, 0),    # Blue (BGR format)
-            "Neutral": (255, 255, 255)  # White
-        }
-        color = colors.get(emotion, (255, 255, 255))
-        cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
-        label = f"{emotion}: {confidence:.2f}"
-        cv2.putText(frame, label, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    def draw(self, frame):
+        if self.render_mode == render.RENDER_OFF or not self.last_face_position:
+            return frame
+        # Use the current face position with the last detected emotion
+        x, y, width, height = self.last_face_position
+        render.draw_emotion_box(frame, x, y, width, height,
+                                self.last_emotion["emotion"],
+                                self.last_emotion["confidence"])
+        return frame
 
     def release(self):
-        self.face_detection.close()
\ No newline at end of file
+        # FaceMesh belongs to the shared FaceTracker
+        if self._executor is not None:
+            with self._lock:
+                self._pending_job = None
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,248 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# Fields whose change is worth telling the remote server about
+STATE_FIELDS = ("emotion", "focus", "thumbs_up", "wave", "current_tab_url", "people", "summary")
+
+
+class EventSender:
+    """Posts detection state to the remote server for every session.
+
+    One thread and one pooled HTTP session serve all users. A user's state
+    is queued when one of STATE_FIELDS changes, or as a heartbeat when
+    nothing has changed for `heartbeat_interval` seconds. Events arriving
+    within `batch_window` are coalesced into one post per user. Failed
+    posts stay queued (bounded by `max_queue`, oldest dropped first) and
+    are retried with exponential backoff; with `queue_path` set, the queue
+    survives restarts. While a backlog is saved, new events are appended
+    to the file as they are queued, so a crash loses at most the events
+    of one batch window that were queued while the endpoint was healthy.
+    """
+
+    def __init__(self, url, heartbeat_interval=5.0, batch_window=0.25, max_batch=20,
+                 max_queue=1000, queue_path=None, backoff_base=0.5, backoff_max=30.0, timeout=5.0):
+        self.url = url
+        self.heartbeat_interval = heartbeat_interval
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.queue_path = queue_path
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self.http = requests.Session()
+        self.http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+        self.queue = deque(maxlen=max_queue)
+        self.events_queued = 0
+        self.events_sent = 0
+        self.events_dropped = 0
+        self.posts = 0
+        self.failures = 0
+
+        self._latest = {}  # user_email -> (signature, state, last queued time)
+        self._first_queued_at = None
+        self._retry_at = 0.0
+        self._attempt = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._queue_saved = False  # queue_path holds the current backlog
+
+        self._load_queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        print(f"Starting event sender, posting to {url}")
+
+    def publish(self, state):
+        """Record a user's latest state; queues an event only if it changed."""
+        user_email = state.get("user_email")
+        signature = tuple(state.get(field) for field in STATE_FIELDS)
+        now = time.time()
+        with self._cond:
+            previous = self._latest.get(user_email)
+            if previous is not None and previous[0] == signature:
+                self._latest[user_email] = (signature, dict(state), previous[2])
+                return False
+            self._latest[user_email] = (signature, dict(state), now)
+            self._enqueue_locked(dict(state), now)
+            self._cond.notify()
+        return True
+
+    def forget(self, user_email):
+        with self._cond:
+            self._latest.pop(user_email, None)
+
+    def _enqueue_locked(self, event, now):
+        if len(self.queue) == self.queue.maxlen:
+            self.events_dropped += 1
+            metrics.EVENTS_DROPPED.inc()
+        self.queue.append(event)
+        self.events_queued += 1
+        if self._first_queued_at is None:
+            self._first_queued_at = now
+        if self._queue_saved:
+            self._append_saved_locked(event)
+
+    def _queue_heartbeats_locked(self, now):
+        if self._attempt:
+            return  # endpoint is down; queued transitions are enough to replay
+        for user_email, (signature, state, queued_at) in self._latest.items():
+            if now - queued_at >= self.heartbeat_interval:
+                self._latest[user_email] = (signature, state, now)
+                self._enqueue_locked(dict(state), now)
+
+    def _next_wakeup_locked(self, now):
+        wakeups = [now + self.heartbeat_interval]
+        if self._latest:
+            wakeups.append(min(queued_at for _, _, queued_at in self._latest.values()) + self.heartbeat_interval)
+        if self.queue:
+            wakeups.append(max(self._retry_at, self._first_queued_at + self.batch_window))
+        return min(wakeups)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.time()
+                self._queue_heartbeats_locked(now)
+                ready = self.queue and now >= self._retry_at and now - self._first_queued_at >= self.batch_window
+                if not ready:
+                    self._cond.wait(max(0.0, self._next_wakeup_locked(now) - now))
+                    continue
+                batch = [self.queue.popleft() for _ in range(min(self.max_batch, len(self.queue)))]
+                self._first_queued_at = now if self.queue else None
+
+            unsent = self._post_batch(batch)
+
+            with self._cond:
+                if unsent:
+                    # Put failed events back at the front in order, keeping the newest if the queue filled up meanwhile
+                    for event in reversed(unsent):
+                        if len(self.queue) == self.queue.maxlen:
+                            self.events_dropped += 1
+                            metrics.EVENTS_DROPPED.inc()
+                            continue
+                        self.queue.appendleft(event)
+                    if self._first_queued_at is None:
+                        self._first_queued_at = time.time()
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** self._attempt)
+                    self._retry_at = time.time() + delay * random.uniform(0.5, 1.0)
+                    self._attempt += 1
+                    self._save_queue_locked()
+                else:
+                    if self._attempt:
+                        print(f"✅ Event endpoint back after {self._attempt} failed attempts")
+                        self._attempt = 0
+                        self._retry_at = 0.0
+                    if self._queue_saved:
+                        self._save_queue_locked()
+
+    def _post_batch(self, batch):
+        by_user = {}
+        for event in batch:
+            by_user.setdefault(event.get("user_email"), []).append(event)
+
+        unsent = []
+        for events in by_user.values():
+            if unsent:
+                unsent.extend(events)  # endpoint is down; don't hammer it for every user
+                continue
+            # A lone event keeps the original single-state payload
+            payload = events[0] if len(events) == 1 else {"events": events}
+            self.posts += 1
+            try:
+                with metrics.timer("send"):
+                    response = self.http.post(self.url, json=payload, timeout=self.timeout)
+                if response.status_code >= 500:
+                    raise requests.HTTPError(f"{response.status_code}")
+                if response.status_code != 200:
+                    # Rejected (e.g. unknown user); retrying will not help
+                    print(f"❌ Failed to send data: {response.status_code}")
+                self.events_sent += len(events)
+                metrics.EVENTS_SENT.inc(len(events))
+            except Exception as e:
+                self.failures += 1
+                metrics.EVENT_POST_FAILURES.inc()
+                if self._attempt == 0:
+                    print(f"Error sending data, queueing events for retry: {e}")
+                unsent.extend(events)
+        return unsent
+
+    def _load_queue(self):
+        if not self.queue_path or not os.path.exists(self.queue_path):
+            return
+        try:
+            with open(self.queue_path) as f:
+                events = [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError) as e:
+            print(f"Could not read event queue {self.queue_path}: {e}")
+            return
+        now = time.time()
+        for event in events:
+            self._enqueue_locked(event, now)
+        self._queue_saved = bool(events)
+        if events:
+            print(f"Replaying {len(events)} queued events from {self.queue_path}")
+
+    def _save_queue_locked(self):
+        if not self.queue_path:
+            return
+        try:
+            if not self.queue:
+                if os.path.exists(self.queue_path):
+                    os.remove(self.queue_path)
+                self._queue_saved = False
+                return
+            tmp_path = self.queue_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                for event in self.queue:
+                    f.write(json.dumps(event) + "\n")
+            os.replace(tmp_path, self.queue_path)
+            self._queue_saved = True
+        except OSError as e:
+            print(f"Could not write event queue {self.queue_path}: {e}")
+
+    def _append_saved_locked(self, event):
+        # Events dropped from a full queue stay in the file until the next rewrite;
+        # loading keeps only the newest max_queue, as the queue would
+        try:
+            with open(self.queue_path, "a") as f:
+                f.write(json.dumps(event) + "\n")
+        except OSError as e:
+            print(f"Could not write event queue {self.queue_path}: {e}")
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queued": len(self.queue),
+                "events_queued": self.events_queued,
+                "events_sent": self.events_sent,
+                "events_dropped": self.events_dropped,
+                "posts": self.posts,
+                "failures": self.failures,
+            }
+
+    def close(self, flush_timeout=2.0):
+        deadline = time.time() + flush_timeout
+        with self._cond:
+            # Give queued events one last chance unless the endpoint is down
+            while self.queue and self._attempt == 0 and time.time() < deadline:
+                self._first_queued_at = 0.0  # skip the batch window
+                self._cond.notify()
+                self._cond.wait(0.05)
+            self._stopped = True
+            self._save_queue_locked()
+            self._cond.notify()
+        self.thread.join(timeout=flush_timeout)
+        self.http.close()
@@ -0,0 +1,198 @@
+import numpy as np
+
+import metrics
+from landmark_filter import LandmarkPredictor
+from landmarks import NUM_FACE_LANDMARKS, array_to_landmarks, landmark_lists_to_array, mediapipe_solutions
+from roi import RoiTracker
+
+
+class FaceObservation:
+    """What the face tracking stage publishes for one face in one frame.
+
+    `landmarks` is the raw MediaPipe landmark list (used for drawing),
+    `points` the same 468 landmarks as a float32 (468, 3) array in normalised
+    coordinates and `bbox` a pixel (x, y, width, height) box around them.
+    `fresh` is False when the tracker reused an earlier result, and
+    `predicted` is True when `points` and `bbox` were extrapolated from the
+    last keyframe rather than measured (`landmarks` then stays the
+    keyframe's). `track_id` stays the same for one person across frames.
+    """
+
+    def __init__(self, landmarks=None, points=None, bbox=None, timestamp=0.0, fresh=False, predicted=False,
+                 track_id=None):
+        self.landmarks = landmarks
+        self.points = points
+        self.bbox = bbox
+        self.timestamp = timestamp
+        self.fresh = fresh
+        self.predicted = predicted
+        self.track_id = track_id
+
+    @property
+    def face_present(self):
+        return self.bbox is not None
+
+
+class FaceTracks:
+    """Keeps an ID on each face while FaceMesh returns them in any order.
+
+    A face takes the ID of the nearest track (closest pairs first) when its
+    centre is within `max_jump` face sizes of where that track was last seen;
+    other faces start new tracks. A track that isn't seen for `max_missing`
+    seconds is dropped, so a person who leaves and comes back gets a new ID.
+    """
+
+    def __init__(self, max_jump=1.0, max_missing=1.0):
+        self.max_jump = max_jump
+        self.max_missing = max_missing
+        self.reset()
+
+    def reset(self):
+        self.next_id = 0
+        self.centres = {}  # track id -> (x, y, size, last seen)
+
+    def assign(self, faces, timestamp):
+        """Track IDs for an (F, 468, 3) array of faces."""
+        self.centres = {track_id: track for track_id, track in self.centres.items()
+                        if timestamp - track[3] <= self.max_missing}
+        centres = faces[:, :, :2].mean(axis=1)
+        sizes = np.ptp(faces[:, :, 0], axis=1)
+        ids = [None] * len(faces)
+        if self.centres:
+            track_ids = list(self.centres)
+            tracks = np.array([self.centres[track_id][:3] for track_id in track_ids])
+            # Distance in units of the smaller of the two face sizes
+            distance = (np.linalg.norm(centres[:, None] - tracks[None, :, :2], axis=2) /
+                        np.maximum(np.minimum(sizes[:, None], tracks[None, :, 2]), 1e-6))
+            for flat in np.argsort(distance, axis=None):
+                face, track = divmod(int(flat), len(track_ids))
+                if distance[face, track] > self.max_jump:
+                    break
+                if ids[face] is None and track_ids[track] not in ids:
+                    ids[face] = track_ids[track]
+        for face, (centre, size) in enumerate(zip(centres.tolist(), sizes.tolist())):
+            if ids[face] is None:
+                ids[face] = self.next_id
+                self.next_id += 1
+            self.centres[ids[face]] = (centre[0], centre[1], size, timestamp)
+        return ids
+
+
+class FaceTracker:
+    """Face backbone shared by the focus and emotion detectors.
+
+    Runs FaceMesh at most once per frame (or once per `interval` seconds)
+    and attaches the result to the packet: `packet.faces` lists every
+    tracked face in track ID order and `packet.face` is the first of them,
+    the person tracked longest (an empty observation without a face). With
+    `roi` on, FaceMesh only sees a downscaled crop around the last faces;
+    landmarks are always reported in whole-frame coordinates.
+
+    With `predict` on, FaceMesh runs are keyframes: on the frames in between
+    a LandmarkPredictor per face extrapolates the landmarks, so consumers
+    can keep scoring at their own rate while FaceMesh runs less often.
+    """
+
+    def __init__(self, interval=0.0, bbox_margin=0.1, roi=False, infer_size=256, predict=False, max_faces=1):
+        self.interval = interval
+        self.bbox_margin = bbox_margin
+        self.max_faces = max_faces
+        self.roi = RoiTracker(margin=0.5, infer_size=infer_size) if roi else None
+        self.predict = predict
+        self.predictors = {}  # track id -> LandmarkPredictor, for the faces of the last keyframe
+        self.tracks = FaceTracks()
+        self.face_mesh = mediapipe_solutions().face_mesh.FaceMesh(
+            max_num_faces=max_faces,
+            refine_landmarks=False,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        self.reset()
+
+    def reset(self):
+        """Forgets the last faces so the tracker can serve a new session."""
+        self.last_processed_time = float("-inf")  # First frame always runs FaceMesh
+        self.last_observations = []
+        self.tracks.reset()
+        self.predictors.clear()
+        if self.roi is not None:
+            self.roi.reset()
+
+    def process(self, packet):
+        current_time = packet.timestamp
+        if current_time - self.last_processed_time < self.interval:
+            metrics.STAGE_SKIPPED.inc(label="face_mesh")
+            no_face = FaceObservation(timestamp=self.last_processed_time, fresh=False)
+            return self._publish(packet, self._reuse(packet), no_face)
+
+        self.last_processed_time = current_time
+        image, region = self.roi.prepare(packet.rgb) if self.roi is not None else (packet.rgb, None)
+        with metrics.timer("face_mesh"):
+            results = self.face_mesh.process(image)
+            if not results.multi_face_landmarks and self.roi is not None and self.roi.moved:
+                results = self.face_mesh.process(image)
+
+        observations = []
+        points = None
+        if results.multi_face_landmarks:
+            faces = results.multi_face_landmarks[:self.max_faces]
+            # The face box comes from the mesh; this is our "face detection" stage
+            with metrics.timer("face_box"):
+                points = landmark_lists_to_array(faces).reshape(len(faces), NUM_FACE_LANDMARKS, 3)
+                if region is not None:
+                    for landmarks, face_points in zip(faces, points):
+                        RoiTracker.to_frame(face_points, region, packet.width, packet.height)
+                        array_to_landmarks(face_points, landmarks)
+                track_ids = self.tracks.assign(points, current_time)
+                for landmarks, face_points, track_id in zip(faces, points, track_ids):
+                    bbox = self._bbox_from_points(face_points, packet.width, packet.height)
+                    observations.append(FaceObservation(landmarks, face_points, bbox, current_time, fresh=True,
+                                                        track_id=track_id))
+            observations.sort(key=lambda observation: observation.track_id)
+        if self.roi is not None:
+            self.roi.update(None if points is None else points.reshape(-1, 3), packet.width, packet.height)
+        if self.predict:
+            # A face missing from this keyframe gets a new predictor when it comes back
+            self.predictors = {o.track_id: self.predictors.get(o.track_id) or LandmarkPredictor()
+                               for o in observations}
+            for observation in observations:
+                self.predictors[observation.track_id].update(observation.points, current_time)
+
+        self.last_observations = observations
+        return self._publish(packet, observations, FaceObservation(timestamp=current_time, fresh=True))
+
+    def _reuse(self, packet):
+        """Observations for a frame FaceMesh skips: predicted from the last keyframe, or just repeated."""
+        current_time = packet.timestamp
+        observations = []
+        for last in self.last_observations:
+            if self.predict:
+                points = self.predictors[last.track_id].predict(current_time)
+                bbox = self._bbox_from_points(points, packet.width, packet.height)
+                observations.append(FaceObservation(last.landmarks, points, bbox, current_time, predicted=True,
+                                                    track_id=last.track_id))
+            else:
+                observations.append(FaceObservation(last.landmarks, last.points, last.bbox, last.timestamp,
+                                                    fresh=False, track_id=last.track_id))
+        return observations
+
+    @staticmethod
+    def _publish(packet, observations, no_face):
+        packet.faces = observations
+        packet.face = observations[0] if observations else no_face
+        return packet.face
+
+    def _bbox_from_points(self, points, w, h):
+        x_min, y_min = points[:, 0].min(), points[:, 1].min()
+        x_max, y_max = points[:, 0].max(), points[:, 1].max()
+        pad_x = (x_max - x_min) * self.bbox_margin
+        pad_y = (y_max - y_min) * self.bbox_margin
+
+        x = max(0, int((x_min - pad_x) * w))
+        y = max(0, int((y_min - pad_y) * h))
+        width = min(int((x_max + pad_x) * w), w) - x
+        height = min(int((y_max + pad_y) * h), h) - y
+        return x, y, width, height
+
+    def release(self):
+        self.face_mesh.close()
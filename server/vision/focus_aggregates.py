@@ -0,0 +1,118 @@
+import threading
+
+import numpy as np
+
+from landmarks import GAZE_DIRECTIONS
+from session_log import EMOTION_STATES
+
+# Count columns: frames, focused frames, one per gaze direction (plus "none"
+# when no focus update has a direction) and one per emotion
+_FRAMES, _FOCUSED = 0, 1
+_GAZE = 2
+_GAZE_NAMES = GAZE_DIRECTIONS + ("none",)
+_EMOTION = _GAZE + len(_GAZE_NAMES)
+_COLUMNS = _EMOTION + len(EMOTION_STATES)
+_GAZE_CODES = {direction: i for i, direction in enumerate(GAZE_DIRECTIONS)}
+_EMOTION_CODES = {emotion: i for i, emotion in enumerate(EMOTION_STATES)}
+
+
+def _sample_table():
+    # One frame's counts for every (focused, gaze, emotion) combination, so an update is a single row add
+    table = np.zeros((2, len(_GAZE_NAMES), len(EMOTION_STATES) + 1, _COLUMNS), dtype=np.int64)
+    table[..., _FRAMES] = 1
+    table[1, ..., _FOCUSED] = 1
+    for gaze in range(len(_GAZE_NAMES)):
+        table[:, gaze, :, _GAZE + gaze] = 1
+    for emotion in range(len(EMOTION_STATES)):
+        table[:, :, emotion, _EMOTION + emotion] = 1
+    return table
+
+
+_SAMPLES = _sample_table()
+
+
+def window_name(seconds):
+    return f"{seconds // 60}m" if seconds % 60 == 0 else f"{seconds}s"
+
+
+class FocusAggregates:
+    """Sliding-window focus, gaze and emotion counts for one session.
+
+    Frames are counted into `bucket`-second buckets in a ring as long as
+    the longest window. Each window keeps running totals: a frame adds
+    its counts to them, and a bucket that leaves a window is subtracted
+    from that window's totals, so updates cost the same however long the
+    windows are. Windows are bucket-aligned, so the newest bucket may be
+    partly filled.
+    """
+
+    def __init__(self, windows=(10, 60, 300), bucket=1.0):
+        self.windows = tuple(windows)
+        self.bucket = bucket
+        self._spans = [max(1, int(round(w / bucket))) for w in self.windows]  # Window lengths in buckets
+        self._ring = np.zeros((max(self._spans), _COLUMNS), dtype=np.int64)
+        self._totals = np.zeros((len(self.windows), _COLUMNS), dtype=np.int64)
+        self._current = None  # Newest bucket number
+        self.streak_start = None  # When the current run of distracted frames began
+        self.last_timestamp = 0.0
+        self.longest_streak = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, timestamp, result, focus_state=None):
+        """Counts one processed frame; `focus_state` (for the gaze direction) may be None."""
+        focused = result["focus"] == "focused"
+        direction = focus_state["gaze_direction"] if focus_state is not None else None
+        sample = _SAMPLES[int(focused), _GAZE_CODES.get(direction, -1), _EMOTION_CODES.get(result["emotion"], -1)]
+        with self._lock:
+            self._advance(int(timestamp // self.bucket))
+            # A frame older than the newest bucket (clock step back) is counted in the newest
+            self._ring[self._current % len(self._ring)] += sample
+            self._totals += sample
+            self.last_timestamp = max(self.last_timestamp, timestamp)
+            if focused:
+                self.streak_start = None
+            else:
+                if self.streak_start is None:
+                    self.streak_start = timestamp
+                self.longest_streak = max(self.longest_streak, timestamp - self.streak_start)
+
+    def _advance(self, bucket):
+        if self._current is None or bucket - self._current >= len(self._ring):
+            # First frame, or everything has expired
+            self._ring[:] = 0
+            self._totals[:] = 0
+            self._current = bucket
+            return
+        ring = self._ring
+        for new in range(self._current + 1, bucket + 1):
+            for totals, span in zip(self._totals, self._spans):
+                # Subtract the bucket that leaves this window (an already cleared slot if it was never filled)
+                totals -= ring[(new - span) % len(ring)]
+            ring[new % len(ring)] = 0
+        self._current = max(self._current, bucket)
+
+    def summary(self, now=None):
+        """Rolled-up figures per window as of `now` (default: the newest frame's time)."""
+        with self._lock:
+            now = self.last_timestamp if now is None else now
+            if self._current is not None:
+                self._advance(int(now // self.bucket))
+            totals = self._totals.copy()
+            streak = now - self.streak_start if self.streak_start is not None else 0.0
+            longest = max(self.longest_streak, streak)
+
+        windows = {}
+        for seconds, counts in zip(self.windows, totals.tolist()):
+            frames = counts[_FRAMES]
+            share = (lambda n: round(n / frames, 3)) if frames else (lambda n: 0.0)
+            windows[window_name(seconds)] = {
+                "frames": frames,
+                "focus_ratio": share(counts[_FOCUSED]),
+                "gaze": {name: share(n) for name, n in zip(_GAZE_NAMES, counts[_GAZE:_EMOTION])},
+                "emotions": {name: share(n) for name, n in zip(EMOTION_STATES, counts[_EMOTION:])},
+            }
+        return {
+            "windows": windows,
+            "distraction_streak_s": round(streak, 2),
+            "longest_distraction_streak_s": round(longest, 2),
+        }
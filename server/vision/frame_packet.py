@@ -0,0 +1,63 @@
+import time
+
+import cv2
+
+import metrics
+
+
+class FramePacket:
+    """Per-frame context shared by every detector.
+
+    The BGR frame is mirrored and converted to RGB exactly once per frame,
+    into buffers owned by the packet and reused for the next frame of the
+    same size. `bgr` is the frame detectors may draw on; `rgb` is the clean,
+    read-only model input.
+    """
+
+    def __init__(self, mirror=True):
+        self.mirror = mirror
+        self.bgr = None
+        self.rgb = None
+        self.height = 0
+        self.width = 0
+        self.timestamp = 0.0
+        self.frame_id = -1
+        self.face = None  # FaceObservation, published by the face tracking stage
+        self.faces = []  # Every tracked face (multi-face mode), `face` being the first
+
+    @property
+    def shape(self):
+        return self.height, self.width
+
+    def load(self, frame, timestamp=None):
+        h, w = frame.shape[:2]
+        if self.bgr is None or self.bgr.shape != frame.shape:
+            self.bgr = frame.copy()
+            self.rgb = frame.copy()
+        self.rgb.flags.writeable = True
+
+        with metrics.timer("color_convert"):
+            if self.mirror:
+                cv2.flip(frame, 1, dst=self.bgr)  # Mirror image for natural interaction
+            else:
+                self.bgr[...] = frame
+            cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        self.rgb.flags.writeable = False  # Lets MediaPipe use the buffer without copying
+
+        self.height, self.width = h, w
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.frame_id += 1
+        self.face = None
+        self.faces = []
+        return self
+
+    def attach(self, rgb, timestamp, frame_id):
+        """Use an RGB frame converted elsewhere (e.g. in shared memory) without copying it."""
+        self.rgb = rgb
+        self.bgr = None
+        self.height, self.width = rgb.shape[:2]
+        self.timestamp = timestamp
+        self.frame_id = frame_id
+        self.face = None
+        self.faces = []
+        return self
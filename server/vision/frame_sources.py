@@ -0,0 +1,240 @@
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import metrics
+
+# Every source looks like a cv2.VideoCapture (read() -> (ok, frame),
+# isOpened(), release()), so FrameGrabber and the replay loops take any of them.
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+# cv2.imdecode flags that decode a JPEG straight to 1/n size, skipping most of the IDCT work
+_REDUCED_DECODE = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4,
+                   8: cv2.IMREAD_REDUCED_COLOR_8}
+REDUCE_FACTORS = tuple(_REDUCED_DECODE)
+
+
+def fourcc_name(code):
+    code = int(code)
+    return "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)).strip("\0") if code > 0 else ""
+
+
+class WebcamSource:
+    """A camera opened at a requested size, frame rate and pixel format.
+
+    Drivers silently fall back to what they support, so after asking,
+    `granted` holds what the camera reports and the first frame's real
+    size; any difference from the request is printed. Asking for MJPG at
+    the size the detectors need avoids decoding full-size YUYV frames.
+    """
+
+    def __init__(self, device=0, width=None, height=None, fps=None, fourcc=None, api=cv2.CAP_ANY):
+        self.device = device
+        self.requested = {key: value for key, value in
+                          (("width", width), ("height", height), ("fps", fps), ("fourcc", fourcc)) if value}
+        self.cap = cv2.VideoCapture(device, api)
+        self.granted = {}
+        self._checked_frame = False
+        if self.cap.isOpened():
+            self._negotiate()
+
+    def _negotiate(self):
+        # Pixel format first: many V4L2 drivers only list their larger sizes under MJPG
+        if "fourcc" in self.requested:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.requested["fourcc"]))
+        if "width" in self.requested:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.requested["width"])
+        if "height" in self.requested:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.requested["height"])
+        if "fps" in self.requested:
+            self.cap.set(cv2.CAP_PROP_FPS, self.requested["fps"])
+        self.granted = {
+            "width": int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": round(self.cap.get(cv2.CAP_PROP_FPS), 2),
+            "fourcc": fourcc_name(self.cap.get(cv2.CAP_PROP_FOURCC)),
+        }
+        self._report()
+
+    def _report(self):
+        refused = {key: (value, self.granted.get(key)) for key, value in self.requested.items()
+                   if self.granted.get(key) != value}
+        if refused:
+            print(f"⚠️ [WebcamSource] Camera {self.device} did not grant " +
+                  ", ".join(f"{key} {asked} (got {got})" for key, (asked, got) in refused.items()))
+        print(f"[WebcamSource] Capturing {self.granted['width']}x{self.granted['height']} at "
+              f"{self.granted['fps']} fps, {self.granted['fourcc'] or 'default format'}")
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if ret and not self._checked_frame:
+            # Some backends report the requested size whatever they deliver
+            self._checked_frame = True
+            height, width = frame.shape[:2]
+            if (width, height) != (self.granted["width"], self.granted["height"]):
+                self.granted.update(width=width, height=height)
+                self._report()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class _Paced:
+    """Spaces reads `1 / fps` apart, so a file plays back like a live camera."""
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps else 0.0
+        self.next_time = None
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.perf_counter()
+        if self.next_time is None or now - self.next_time > self.interval:
+            self.next_time = now  # First frame, or the reader fell behind: restart the schedule
+        elif self.next_time > now:
+            time.sleep(self.next_time - now)
+        self.next_time += self.interval
+
+
+class VideoFileSource:
+    """Frames from a video file; `realtime` plays them at the file's frame rate, `loop` rewinds at the end."""
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._pace = _Paced(self.fps if realtime else 0)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        self._pace.wait()
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirSource:
+    """The images in a directory in name order, `fps` apart if set."""
+
+    def __init__(self, path, fps=None, loop=False):
+        self.path = path
+        self.loop = loop
+        self.files = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                      if name.lower().endswith(IMAGE_EXTENSIONS)]
+        self.index = 0
+        self._pace = _Paced(fps)
+
+    def isOpened(self):
+        return bool(self.files)
+
+    def read(self):
+        self._pace.wait()
+        while self.files:
+            if self.index == len(self.files):
+                if not self.loop:
+                    return False, None
+                self.index = 0
+            frame = cv2.imread(self.files[self.index])
+            self.index += 1
+            if frame is not None:
+                return True, frame
+            print(f"❌ Could not read {self.files[self.index - 1]}")
+        return False, None
+
+    def release(self):
+        self.files = []
+
+
+class UploadSource:
+    """Encoded frames pushed by another thread (e.g. HTTP uploads), newest wins.
+
+    Frames are kept encoded until taken, so a frame that is replaced
+    before anyone reads it is never decoded. `reduce` (1, 2, 4 or 8)
+    decodes JPEGs straight to 1/n size.
+    """
+
+    def __init__(self, reduce=1):
+        if reduce not in REDUCE_FACTORS:
+            raise ValueError(f"reduce must be one of {', '.join(map(str, REDUCE_FACTORS))}")
+        self.decode_flag = _REDUCED_DECODE[reduce]
+        self.last_timestamp = 0.0
+        self._data = None
+        self._timestamp = 0.0
+        self._cond = threading.Condition()
+        self._open = True
+
+    @property
+    def pending(self):
+        return self._data is not None
+
+    def push(self, data, timestamp=None):
+        """Stores a frame for the reader; True if it replaced one nobody had taken yet."""
+        with self._cond:
+            replaced = self._data is not None
+            self._data = data
+            self._timestamp = time.time() if timestamp is None else timestamp
+            self._cond.notify()
+        return replaced
+
+    def take(self):
+        """The pending encoded frame and its push time, or (None, None); doesn't block."""
+        with self._cond:
+            data, self._data = self._data, None
+            return data, (self._timestamp if data is not None else None)
+
+    def decode(self, data):
+        with metrics.timer("decode"):
+            return cv2.imdecode(np.frombuffer(data, np.uint8), self.decode_flag)
+
+    def isOpened(self):
+        return self._open
+
+    def read(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._data is not None or not self._open, timeout)
+        data, timestamp = self.take()
+        if data is None:
+            return False, None
+        self.last_timestamp = timestamp
+        frame = self.decode(data)
+        return frame is not None, frame
+
+    def release(self):
+        with self._cond:
+            self._open = False
+            self._data = None
+            self._cond.notify_all()
+
+
+def open_source(spec="0", width=None, height=None, fps=None, fourcc=None, loop=False, realtime=True, reduce=1):
+    """A frame source from a config string.
+
+    "0" or "webcam:0" opens that camera (with the requested width, height,
+    fps and fourcc), "upload" an UploadSource, a directory an
+    ImageDirSource paced to `fps`, and anything else a VideoFileSource.
+    """
+    spec = str(spec)
+    if spec.isdigit() or spec.startswith("webcam:"):
+        return WebcamSource(int(spec.rpartition(":")[2] or 0), width, height, fps, fourcc)
+    if spec == "upload":
+        return UploadSource(reduce)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, fps, loop)
+    return VideoFileSource(spec, realtime, loop)
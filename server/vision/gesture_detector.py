@@ -1,148 +1,176 @@
-import cv2
-import mediapipe as mp
 import numpy as np
-import time
-from collections import deque
+
+import metrics
+import render
+from landmarks import (HAND_GESTURES, HAND_RULE_TABLE, NUM_HAND_LANDMARKS, WRIST, array_to_landmarks,
+                       hand_rule_codes, landmark_lists_to_array, mediapipe_solutions)
+from roi import RoiTracker
+
+
+class WaveDetector:
+    """Spots a wave in one hand's wrist x-positions.
+
+    The last `capacity` samples live in a fixed NumPy ring buffer. A wave
+    is the wrist swinging side to side: over the last `window` seconds the
+    mean-removed x has to go past +`amplitude` and -`amplitude` with at
+    least `min_swings` changes of side. One jittery frame only pokes out
+    on one side, and a slow wave still counts as long as two swings fit
+    in the window.
+    """
+
+    def __init__(self, capacity=48, window=2.0, amplitude=0.02, min_swings=2):
+        self.capacity = capacity
+        self.window = window
+        self.amplitude = amplitude
+        self.min_swings = min_swings
+        # Every sample is written twice, capacity apart, so the last `capacity`
+        # samples are always one contiguous, oldest-first slice
+        self.x = np.zeros(2 * capacity, dtype=np.float32)
+        self.t = np.full(2 * capacity, -np.inf)
+        self.next = 0
+
+    def add(self, x, timestamp):
+        self.x[self.next] = self.x[self.next + self.capacity] = x
+        self.t[self.next] = self.t[self.next + self.capacity] = timestamp
+        self.next = (self.next + 1) % self.capacity
+
+    def is_waving(self, now):
+        end = self.next + self.capacity
+        start = self.next + int(self.t[self.next:end].searchsorted(now - self.window, side="right"))
+        if end - start < 2 * self.min_swings:
+            return False
+        x = self.x[start:end]
+        deviation = x - float(np.add.reduce(x)) / len(x)
+        # Side (above the mean or not) of every sample clear of the +-amplitude band, oldest first
+        side = deviation[np.abs(deviation) > self.amplitude] > 0
+        return np.count_nonzero(side[1:] != side[:-1]) >= self.min_swings
+
 
 class GestureDetector:
-    def __init__(self):
-        self.mp_hands = mp.solutions.hands
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
+    """Thumbs up, peace and wave from MediaPipe Hands, for up to `max_hands` hands.
+
+    Each processed frame's hands are converted once into an (H, 21, 3)
+    array and the finger and gesture rules run on all of them at once.
+    Every hand (told apart by handedness) gets its own WaveDetector. The
+    reported gesture is the strongest any hand shows: wave, then thumbs
+    up, then peace.
+    """
+
+    def __init__(self, render_mode=render.RENDER_OFF, roi=False, infer_size=256, max_hands=1):
+        self.render_mode = render.parse_render_mode(render_mode)
+        self.mp_hands = mediapipe_solutions().hands
+        self.max_hands = max_hands
         
         self.hands = self.mp_hands.Hands(
-            max_num_hands=1,
+            max_num_hands=max_hands,
             min_detection_confidence=0.7,
             min_tracking_confidence=0.7
         )
         
-        # Changed from 12 to 6 for faster reaction
-        self.previous_x = deque(maxlen=6) 
-        self.direction_changes = 0
-        self.last_direction = None
-        self.wave_threshold = 0.05
-        self.direction_threshold = 3
-        
-        self.last_processed_time = 0
+        self.points = np.empty((max_hands, NUM_HAND_LANDMARKS, 3), dtype=np.float32)
+        self.waves = {}  # Handedness label -> WaveDetector
         self.process_interval = 0.05
-        
-        self.last_gesture = {"gesture": "No Hand", "confidence": 0.0}
         self.gesture_hold_time = 1.0
+        # Hands move fast, so the crop around the last hand is wider than the face's
+        self.roi = RoiTracker(margin=1.0, infer_size=infer_size) if roi else None
+        self.reset()
+
+    def reset(self):
+        """Clears tracking and gesture state so the detector can serve a new session."""
+        self.waves.clear()
+        self.last_processed_time = 0
+        self.last_gesture = {"gesture": "No Hand", "confidence": 0.0, "hands": 0}
         self.last_detection_time = 0
-        
-        self.debug = True
+        self.last_hand_landmarks = []
+        if self.roi is not None:
+            self.roi.reset()
     
-    def detect_gesture(self, frame):
-        current_time = time.time()
+    def detect_gesture(self, packet):
+        # Frame time rather than wall time, so recorded video replays deterministically
+        current_time = packet.timestamp
         
         if current_time - self.last_detection_time < self.gesture_hold_time and self.last_gesture["gesture"] in ["Wave", "Thumbs Up", "Peace"]:
-            if self.debug:
-                self._draw_debug_info(frame, self.last_gesture)
             return self.last_gesture
         
         if current_time - self.last_processed_time < self.process_interval:
+            metrics.STAGE_SKIPPED.inc(label="hands")
             return self.last_gesture
         
         self.last_processed_time = current_time
         
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb)
+        image, region = self.roi.prepare(packet.rgb) if self.roi is not None else (packet.rgb, None)
+        with metrics.timer("hands"):
+            results = self.hands.process(image)
+            if not results.multi_hand_landmarks and self.roi is not None and self.roi.moved:
+                results = self.hands.process(image)
         
         if not results.multi_hand_landmarks:
-            self.previous_x.clear()
-            self.direction_changes = 0
-            self.last_direction = None
-            self.last_gesture = {"gesture": "No Hand", "confidence": 0.0}
+            if self.roi is not None:
+                self.roi.update(None, packet.width, packet.height)
+            self.waves.clear()
+            self.last_hand_landmarks = []
+            self.last_gesture = {"gesture": "No Hand", "confidence": 0.0, "hands": 0}
             return self.last_gesture
         
-        hand_landmarks = results.multi_hand_landmarks[0]
-        if self.debug:
-            self._draw_landmarks(frame, hand_landmarks)
+        hand_landmarks = results.multi_hand_landmarks[:self.max_hands]
+        hands = self.points[:len(hand_landmarks)]
+        landmark_lists_to_array(hand_landmarks, out=hands.reshape(-1, 3))
+        if self.roi is not None:
+            if region != (0, 0, packet.width, packet.height):
+                for i, landmarks in enumerate(hand_landmarks):
+                    RoiTracker.to_frame(hands[i], region, packet.width, packet.height)
+                    array_to_landmarks(hands[i], landmarks)
+            self.roi.update(hands.reshape(-1, 3), packet.width, packet.height)
+        self.last_hand_landmarks = hand_landmarks
         
-        gesture_result = self._recognize_gesture(hand_landmarks, frame.shape[1], frame.shape[0])
+        labels = self._hand_labels(results.multi_handedness, len(hand_landmarks))
+        gesture_result = self._recognize_gesture(hands, labels, current_time)
         
         if gesture_result["gesture"] in ["Wave", "Thumbs Up", "Peace"]:
             self.last_detection_time = current_time
         
         self.last_gesture = gesture_result
         
-        if self.debug:
-            self._draw_debug_info(frame, gesture_result)
-        
         return gesture_result
-    
-    def _recognize_gesture(self, landmarks, width, height):
-        wrist = landmarks.landmark[self.mp_hands.HandLandmark.WRIST]
-        thumb_tip = landmarks.landmark[self.mp_hands.HandLandmark.THUMB_TIP]
-        index_tip = landmarks.landmark[self.mp_hands.HandLandmark.INDEX_FINGER_TIP]
-        middle_tip = landmarks.landmark[self.mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-        ring_tip = landmarks.landmark[self.mp_hands.HandLandmark.RING_FINGER_TIP]
-        pinky_tip = landmarks.landmark[self.mp_hands.HandLandmark.PINKY_TIP]
-        
-        self.previous_x.append(wrist.x)
-        
-        fingers_extended = self._count_extended_fingers(landmarks)
-        
-        # --- New simple wave detection ---
-        if len(self.previous_x) == self.previous_x.maxlen:
-            movement = self.previous_x[-1] - self.previous_x[0]
-            if abs(movement) > 0.04 and fingers_extended >= 4:
-                return {"gesture": "Wave", "confidence": 1.0}
-        # -------------------------------
 
-        if fingers_extended == 1 and thumb_tip.y < wrist.y:
-            return {"gesture": "Thumbs Up", "confidence": 0.9}
-        
-        if fingers_extended == 2 and index_tip.y < wrist.y and middle_tip.y < wrist.y:
-            if abs(index_tip.x - middle_tip.x) > 0.03:
-                return {"gesture": "Peace", "confidence": 0.9}
-        
-        return {"gesture": "Hand Detected", "confidence": 1.0}
+    @staticmethod
+    def _hand_labels(handedness, count):
+        labels = []
+        for i in range(count):
+            label = handedness[i].classification[0].label if handedness and i < len(handedness) else str(i)
+            labels.append(label if label not in labels else f"{label}{i}")
+        return labels
     
-    def _count_extended_fingers(self, landmarks):
-        tips = [
-            (self.mp_hands.HandLandmark.THUMB_TIP, self.mp_hands.HandLandmark.THUMB_IP),
-            (self.mp_hands.HandLandmark.INDEX_FINGER_TIP, self.mp_hands.HandLandmark.INDEX_FINGER_PIP),
-            (self.mp_hands.HandLandmark.MIDDLE_FINGER_TIP, self.mp_hands.HandLandmark.MIDDLE_FINGER_PIP),
-            (self.mp_hands.HandLandmark.RING_FINGER_TIP, self.mp_hands.HandLandmark.RING_FINGER_PIP),
-            (self.mp_hands.HandLandmark.PINKY_TIP, self.mp_hands.HandLandmark.PINKY_PIP)
-        ]
-        
-        extended_count = 0
-        for tip_idx, pip_idx in tips:
-            if landmarks.landmark[tip_idx].y < landmarks.landmark[pip_idx].y:
-                extended_count += 1
-        
-        return extended_count
-    
-    def _draw_landmarks(self, frame, hand_landmarks):
-        self.mp_drawing.draw_landmarks(
-            frame,
-            hand_landmarks,
-            self.mp_hands.HAND_CONNECTIONS,
-            self.mp_drawing_styles.get_default_hand_landmarks_style(),
-            self.mp_drawing_styles.get_default_hand_connections_style()
-        )
+    def _recognize_gesture(self, hands, labels, current_time):
+        extended, gestures = HAND_RULE_TABLE.take(hand_rule_codes(hands), axis=0).T.tolist()
+        
+        waving = False
+        for label in list(self.waves):
+            if label not in labels:
+                del self.waves[label]  # Hand left the frame: its trace is stale
+        for label, wrist_x, fingers in zip(labels, hands[:, WRIST, 0].tolist(), extended):
+            wave = self.waves.get(label)
+            if wave is None:
+                wave = self.waves[label] = WaveDetector()
+            wave.add(wrist_x, current_time)
+            # Only an open hand waves
+            waving = waving or (fingers >= 4 and wave.is_waving(current_time))
+        
+        if waving:
+            return {"gesture": "Wave", "confidence": 1.0, "hands": len(hands)}
+        best = max(gestures)
+        if best:
+            return {"gesture": HAND_GESTURES[best], "confidence": 0.9, "hands": len(hands)}
+        return {"gesture": "Hand Detected", "confidence": 1.0, "hands": len(hands)}
     
-    def _draw_debug_info(self, frame, gesture_result):
-        h, w = frame.shape[:2]
-        
-        if gesture_result["gesture"] == "Wave":
-            color = (0, 255, 255)
-        elif gesture_result["gesture"] == "Thumbs Up":
-            color = (0, 255, 0)
-        elif gesture_result["gesture"] == "Peace":
-            color = (255, 0, 255)
-        elif gesture_result["gesture"] == "Hand Detected":
-            color = (255, 255, 255)
-        else:
-            color = (128, 128, 128)
-        
-        cv2.putText(frame, f"Gesture: {gesture_result['gesture']}", 
-                   (20, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-        
-        cv2.putText(frame, f"Confidence: {gesture_result['confidence']:.2f}", 
-                   (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+    def draw(self, frame):
+        if self.render_mode == render.RENDER_OFF or self.last_gesture["gesture"] == "No Hand":
+            return frame
+        if self.render_mode == render.RENDER_FULL:
+            for hand_landmarks in self.last_hand_landmarks:
+                render.draw_hand_landmarks(frame, hand_landmarks)
+        render.draw_gesture_status(frame, self.last_gesture)
+        return frame
     
     def release(self):
-        self.hands.close()
\ No newline at end of file
+        self.hands.close()
@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """One-Euro filter (Casiez et al.) over a whole array of signals at once.
+
+    Smooths jitter while the signal changes slowly and follows it closely
+    when it changes fast: the cutoff frequency grows with the filtered
+    rate of change (`min_cutoff` + `beta` * |derivative|).
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.derivative = None
+        self.timestamp = None
+
+    def update(self, signal, timestamp):
+        if self.value is None or timestamp <= self.timestamp:
+            self.value = signal.copy()
+            self.derivative = np.zeros_like(signal)
+            self.timestamp = timestamp
+            return self.value
+
+        dt = timestamp - self.timestamp
+        self.derivative += _alpha(self.d_cutoff, dt) * ((signal - self.value) / dt - self.derivative)
+        cutoff = self.min_cutoff + self.beta * np.abs(self.derivative)
+        self.value += (signal - self.value) / (1.0 + 1.0 / (2 * math.pi * cutoff * dt))
+        self.timestamp = timestamp
+        return self.value
+
+
+class LandmarkPredictor:
+    """Fills in landmarks between FaceMesh keyframes.
+
+    The face is extrapolated as a whole: its centre and size, measured on
+    consecutive keyframes, give a velocity and a zoom rate that go through
+    a OneEuroFilter, and the latest keyframe's landmarks are moved and
+    scaled along them (constant-velocity model). Moving points one by one
+    would extrapolate their jitter too and deform the eyes that focus
+    scoring measures. Extrapolation stops after `max_horizon` seconds so a
+    stalled tracker can't fling the face off screen. The defaults smooth
+    lightly: at a few keyframes per second heavier smoothing lags more
+    than jitter costs.
+    """
+
+    def __init__(self, min_cutoff=5.0, beta=2.0, d_cutoff=1.0, max_horizon=0.5):
+        self.motion = OneEuroFilter(min_cutoff, beta, d_cutoff)
+        self.max_horizon = max_horizon
+        self.reset()
+
+    def reset(self):
+        self.motion.reset()
+        self._points = None
+        self._pose = None
+        self._timestamp = None
+
+    @staticmethod
+    def _measure(points):
+        """(x, y, z, log size) of a face: its centre and the log of its RMS radius in the image plane."""
+        centre = points.mean(axis=0)
+        size = np.sqrt(((points[:, :2] - centre[:2]) ** 2).sum(axis=1).mean())
+        return np.append(centre, np.log(max(size, 1e-6)))
+
+    def update(self, points, timestamp):
+        """Feeds a keyframe's (N, 3) landmarks; None means the face was lost."""
+        if points is None:
+            self.reset()
+            return
+        pose = self._measure(points)
+        if self._pose is not None and timestamp > self._timestamp:
+            self.motion.update((pose - self._pose) / (timestamp - self._timestamp), timestamp)
+        self._points = points
+        self._pose = pose
+        self._timestamp = timestamp
+
+    def predict(self, timestamp):
+        """Landmarks expected at `timestamp`, or None without a tracked face."""
+        if self._points is None:
+            return None
+        if self.motion.value is None:
+            return self._points.copy()  # One keyframe so far: nothing to extrapolate with
+        dt = min(max(0.0, timestamp - self._timestamp), self.max_horizon)
+        shift = self.motion.value * dt
+        centre = self._pose[:3]
+        # z shares x's scale, so the whole offset from the centre is scaled
+        return centre + shift[:3] + (self._points - centre) * np.exp(shift[3])
@@ -0,0 +1,255 @@
+import sys
+import threading
+
+import numpy as np
+
+NUM_FACE_LANDMARKS = 468
+
+# FaceMesh landmark indices used by the focus scoring
+LEFT_EYE = np.array([33, 160, 158, 133, 153, 144])
+RIGHT_EYE = np.array([362, 385, 387, 263, 373, 380])
+NOSE = 1
+LEFT_EYE_CORNER = 33
+RIGHT_EYE_CORNER = 263
+CHIN = 152
+FOREHEAD = 10
+LEFT_EAR = 234
+RIGHT_EAR = 454
+
+GAZE_DIRECTIONS = ("CENTER", "DOWN", "UP", "RIGHT", "LEFT")
+GAZE_CENTER, GAZE_DOWN, GAZE_UP, GAZE_RIGHT, GAZE_LEFT = range(len(GAZE_DIRECTIONS))
+
+DEFAULT_FOCUS_CONFIG = {
+    'min_eye_aspect_ratio': 0.18,
+    'gaze_direction_threshold': 0.60,
+    'vertical_gaze_weight': 2.5,
+    'downward_threshold': 0.25,
+    'upward_threshold': 0.18,
+    'horizontal_gaze_weight': 2.0,
+    'center_weight': 2.5
+}
+
+
+def landmarks_to_array(landmark_list, out=None):
+    """Convert a MediaPipe landmark list into a float32 (N, 3) array."""
+    return landmark_lists_to_array([landmark_list], out=out)
+
+
+def landmark_lists_to_array(landmark_lists, out=None):
+    """Convert several MediaPipe landmark lists (hands, faces) into one float32 (sum of N, 3) array."""
+    points = np.array([(lm.x, lm.y, lm.z) for landmark_list in landmark_lists for lm in landmark_list.landmark],
+                      dtype=np.float32).reshape(-1, 3)
+    if out is None:
+        return points
+    out[:] = points
+    return out
+
+
+def array_to_landmarks(points, landmark_list):
+    """Write a float32 (N, 3) array back into a MediaPipe landmark list, in place."""
+    for lm, (x, y, z) in zip(landmark_list.landmark, points.tolist()):
+        lm.x, lm.y, lm.z = x, y, z
+    return landmark_list
+
+
+class LandmarkArray:
+    """Landmarks for N frames (or faces) in one contiguous float32 (N, 468, 3) array."""
+
+    def __init__(self, data):
+        data = np.ascontiguousarray(data, dtype=np.float32)
+        if data.ndim == 2:
+            data = data[None]
+        if data.ndim != 3 or data.shape[2] != 3:
+            raise ValueError(f"Expected an (N, landmarks, 3) array, got shape {data.shape}")
+        self.data = data
+
+    @classmethod
+    def from_mediapipe(cls, landmark_lists):
+        data = np.empty((len(landmark_lists), NUM_FACE_LANDMARKS, 3), dtype=np.float32)
+        for i, landmark_list in enumerate(landmark_lists):
+            landmarks_to_array(landmark_list, out=data[i])
+        return cls(data)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+
+# Gather order for the gaze landmarks, so one fancy-index pulls them all
+_GAZE_POINTS = np.array([NOSE, LEFT_EYE_CORNER, RIGHT_EYE_CORNER, CHIN, FOREHEAD, LEFT_EAR, RIGHT_EAR])
+_EYES = np.stack([LEFT_EYE, RIGHT_EYE])
+
+
+def _as_batch(landmarks):
+    if isinstance(landmarks, LandmarkArray):
+        return landmarks.data
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    return landmarks[None] if landmarks.ndim == 2 else landmarks
+
+
+def _distance(a, b):
+    d = a - b
+    return np.sqrt((d * d).sum(axis=-1))
+
+
+def compute_ear(landmarks):
+    """Average eye aspect ratio of both eyes for each of N frames -> (N,)."""
+    eyes = _as_batch(landmarks)[:, _EYES]  # (N, 2, 6, 3)
+    v1 = _distance(eyes[:, :, 1], eyes[:, :, 5])
+    v2 = _distance(eyes[:, :, 2], eyes[:, :, 4])
+    h = _distance(eyes[:, :, 0], eyes[:, :, 3])
+    ear = np.divide(v1 + v2, 2.0 * h, out=np.zeros_like(h), where=h != 0)
+    return ear.mean(axis=1)
+
+
+def compute_gaze(landmarks, config=DEFAULT_FOCUS_CONFIG):
+    """Head-pose gaze score and direction for each of N frames.
+
+    Returns a dict of (N,) arrays: score, direction (index into
+    GAZE_DIRECTIONS), v_ratio, h_ratio and angle.
+    """
+    points = _as_batch(landmarks)[:, _GAZE_POINTS, :2].astype(np.float64)  # (N, 7, 2)
+    # Every distance the score needs is measured from the nose: one pass for all of them
+    from_nose = points - points[:, :1]
+    dist = np.sqrt(np.einsum('nij,nij->ni', from_nose, from_nose))
+    left_eye_dist, right_eye_dist, left_ear_dist, right_ear_dist = dist[:, 1], dist[:, 2], dist[:, 5], dist[:, 6]
+
+    xs = points[..., 0].T
+    ys = points[..., 1].T
+    nose_x, left_eye_x, right_eye_x = xs[:3]
+    nose_y, left_eye_y, right_eye_y, chin_y, forehead_y = ys[:5]
+
+    nose_offset_x = np.abs(nose_x - 0.5)
+    nose_offset_y = np.abs(nose_y - 0.5)
+
+    ear_ratio = np.divide(left_ear_dist, right_ear_dist,
+                          out=np.full_like(right_ear_dist, np.inf), where=right_ear_dist != 0)
+    horizontal_score = 1.0 - np.minimum(1.0, np.abs(ear_ratio - 1.0) * config['horizontal_gaze_weight'])
+    horizontal_score = np.where(nose_offset_x > 0.15, horizontal_score * 0.5, horizontal_score)
+
+    symmetry_score = 1.0 - np.minimum(1.0, np.abs(left_eye_dist - right_eye_dist) * 10)
+    eye_level_score = 1.0 - np.minimum(1.0, np.abs(left_eye_y - right_eye_y) * 20)
+    center_score = 1.0 - np.minimum(1.0, (nose_offset_x + nose_offset_y) * config['center_weight'])
+
+    vertical_ratio = (nose_y - forehead_y) / np.maximum(0.001, chin_y - forehead_y)
+
+    eye_center_x = (left_eye_x + right_eye_x) / 2
+    eye_center_y = (left_eye_y + right_eye_y) / 2
+    gaze_angle = np.degrees(np.arctan2(eye_center_y - nose_y, eye_center_x - nose_x))
+    # Eyes higher than the forehead is a strong indicator of looking up
+    eyes_above_forehead = eye_center_y < forehead_y
+
+    looking_down = vertical_ratio > 0.60
+    looking_up = vertical_ratio < 0.43  # More sensitive for upward detection
+
+    down_score = np.maximum(0, 1.0 - ((vertical_ratio - 0.60) / 0.40) * config['vertical_gaze_weight'])
+    down_score = np.where(down_score < config['downward_threshold'], 0.0, down_score)
+    up_score = np.maximum(0, 1.0 - ((0.43 - vertical_ratio) / 0.43) * (config['vertical_gaze_weight'] * 1.5))
+    up_score = np.where((up_score < config['upward_threshold']) | eyes_above_forehead, 0.0, up_score)
+    vertical_gaze_score = np.where(looking_down, down_score, np.where(looking_up, up_score, 1.0))
+
+    score = (
+        center_score * 0.25 +
+        symmetry_score * 0.05 +
+        horizontal_score * 0.30 +
+        eye_level_score * 0.05 +
+        vertical_gaze_score * 0.35
+    )
+
+    # Checked in priority order: later assignments must not override earlier ones
+    direction = np.full(score.shape, GAZE_CENTER, dtype=np.int8)
+    direction[ear_ratio > 1.20] = GAZE_LEFT
+    direction[ear_ratio < 0.80] = GAZE_RIGHT
+    direction[looking_up | eyes_above_forehead] = GAZE_UP
+    direction[looking_down] = GAZE_DOWN
+
+    return {
+        'score': score,
+        'direction': direction,
+        'v_ratio': vertical_ratio,
+        'h_ratio': ear_ratio,
+        'angle': gaze_angle,
+    }
+
+
+def looking_at_screen(ear, gaze, config=DEFAULT_FOCUS_CONFIG):
+    # Always flag upward gaze as not focused
+    return ((ear > config['min_eye_aspect_ratio']) &
+            (gaze['score'] > config['gaze_direction_threshold']) &
+            (gaze['direction'] != GAZE_UP))
+
+
+NUM_HAND_LANDMARKS = 21
+
+# MediaPipe Hands landmark indices
+WRIST = 0
+THUMB_TIP = 4
+INDEX_TIP = 8
+MIDDLE_TIP = 12
+# Each fingertip and the joint it must be above (smaller y) to count as extended
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])
+FINGER_JOINTS = np.array([3, 6, 10, 14, 18])  # Thumb IP, then the other fingers' PIP
+
+# Weakest first, so the strongest of several hands is the max
+HAND_GESTURES = ("Hand Detected", "Peace", "Thumbs Up")
+HAND_DETECTED, PEACE, THUMBS_UP = range(len(HAND_GESTURES))
+
+
+# Every hand rule is one landmark coordinate exceeding another by a margin. Bit i of a hand's rule code
+# is rule i, so a single gather and comparison gives each hand a code, and tables indexed by the code
+# give its finger count and gesture. Rules 0-4: fingertip above its joint (image y grows downwards);
+# 5-7: thumb, index and middle tip above the wrist; 8-9: index and middle tips spread apart in x.
+_X, _Y = 0, 1
+_RULES = ([(3 * joint + _Y, 3 * tip + _Y, 0.0) for tip, joint in zip(FINGER_TIPS, FINGER_JOINTS)] +
+          [(3 * WRIST + _Y, 3 * tip + _Y, 0.0) for tip in (THUMB_TIP, INDEX_TIP, MIDDLE_TIP)] +
+          [(3 * INDEX_TIP + _X, 3 * MIDDLE_TIP + _X, 0.03), (3 * MIDDLE_TIP + _X, 3 * INDEX_TIP + _X, 0.03)])
+_RULE_INDEX = np.array([[left for left, _, _ in _RULES], [right for _, right, _ in _RULES]])
+_RULE_MARGIN = np.array([[margin] for _, _, margin in _RULES], dtype=np.float32)
+_RULE_BITS = 1 << np.arange(len(_RULES))
+
+
+def _rule_table():
+    bits = (np.arange(1 << len(_RULES))[:, None] & _RULE_BITS) > 0
+    extended = bits[:, :5].sum(axis=1)
+    thumbs_up = (extended == 1) & bits[:, 5]
+    peace = (extended == 2) & bits[:, 6] & bits[:, 7] & (bits[:, 8] | bits[:, 9])
+    gesture = np.where(thumbs_up, THUMBS_UP, np.where(peace, PEACE, HAND_DETECTED))
+    return np.stack([extended, gesture], axis=1)
+
+
+# Rule code -> (extended fingers, index into HAND_GESTURES)
+HAND_RULE_TABLE = _rule_table()
+
+
+def hand_rule_codes(hands):
+    """Bit pattern of the hand rules met by each of H hands in an (H, 21, 3) array -> (H,)."""
+    pairs = hands.reshape(len(hands), -1).T.take(_RULE_INDEX, axis=0)  # (2, rules, H)
+    return _RULE_BITS.dot(pairs[0] > pairs[1] + _RULE_MARGIN)
+
+
+# Held while MediaPipe is imported with TensorFlow hidden; code that imports TensorFlow takes it as well
+MODEL_IMPORT_LOCK = threading.Lock()
+
+
+def mediapipe_solutions():
+    """Imports MediaPipe (deferred: it takes seconds) and returns `mp.solutions`.
+
+    MediaPipe's model metadata reader imports TensorFlow whenever it is
+    installed, only to open files. Unless TensorFlow is already loaded, it
+    is hidden during the import so pipelines without the emotion stage
+    never load it (3 s and ~450 MB). Hiding it is process-wide, so this
+    happens once, under MODEL_IMPORT_LOCK: the emotion backends import
+    TensorFlow under the same lock and never see it hidden.
+    """
+    with MODEL_IMPORT_LOCK:
+        if "mediapipe" not in sys.modules and "tensorflow" not in sys.modules:
+            sys.modules["tensorflow"] = None  # `import tensorflow` raises ImportError
+            try:
+                import mediapipe  # noqa: F401
+            finally:
+                if sys.modules.get("tensorflow", False) is None:
+                    del sys.modules["tensorflow"]
+        import mediapipe as mp
+    return mp.solutions
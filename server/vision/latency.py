@@ -0,0 +1,35 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class LatencyWindow:
+    """Rolling window of the last `size` durations (seconds), reported in ms."""
+
+    def __init__(self, size=300):
+        self.samples = deque(maxlen=size)
+        self.count = 0  # All-time, unlike len()
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+            self.count += 1
+
+    @property
+    def last(self):
+        return self.samples[-1] if self.samples else 0.0
+
+    def __len__(self):
+        return len(self.samples)
+
+    def percentiles(self, qs=(50, 95, 99)):
+        with self._lock:
+            samples = np.array(self.samples)
+        if samples.size == 0:
+            return {f"p{q}_ms": 0.0 for q in qs} | {"max_ms": 0.0}
+        values = np.percentile(samples, qs) * 1000
+        stats = {f"p{q}_ms": float(v) for q, v in zip(qs, values)}
+        stats["max_ms"] = float(samples.max() * 1000)
+        return stats
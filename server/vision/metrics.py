@@ -0,0 +1,155 @@
+import bisect
+import os
+import threading
+import time
+
+# Process-wide counters, gauges and histograms, exported in Prometheus text format.
+# VISION_METRICS=0 turns every hook into a no-op.
+ENABLED = os.environ.get("VISION_METRICS", "1") != "0"
+
+# Stage latencies span ~0.1 ms (scoring) to ~100 ms (DeepFace)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+REGISTRY = []
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _series(self, label_value, suffix="", extra=""):
+        labels = []
+        if self.label is not None:
+            labels.append(f'{self.label}="{label_value}"')
+        if extra:
+            labels.append(extra)
+        return f"{self.name}{suffix}{{{','.join(labels)}}}" if labels else f"{self.name}{suffix}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda item: str(item[0]))
+        for label_value, value in items:
+            lines.extend(self._render_value(label_value, value))
+        return lines
+
+    def _render_value(self, label_value, value):
+        return [f"{self._series(label_value)} {value}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, label=None):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, label=None):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[label] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, label=None, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, label)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, label=None):
+        if not ENABLED:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), then sum
+                series = self._values[label] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def _render_value(self, label_value, series):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(f"{self._series(label_value, '_bucket', le)} {cumulative}")
+        lines.append(f"{self._series(label_value, '_sum')} {series[-1]}")
+        lines.append(f"{self._series(label_value, '_count')} {cumulative}")
+        return lines
+
+
+class _StageTimer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, self.stage)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage):
+    """`with metrics.timer("face_mesh"): ...` records the block's duration for that stage."""
+    return _StageTimer(stage) if ENABLED else _NULL_TIMER
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram("vision_stage_duration_seconds", "Time spent in each hot-path stage", label="stage")
+FRAMES_RECEIVED = Counter("vision_frames_received_total", "Frames uploaded or captured")
+FRAMES_PROCESSED = Counter("vision_frames_processed_total", "Frames run through a pipeline")
+FRAMES_DROPPED = Counter("vision_frames_dropped_total", "Frames replaced by a newer one before processing")
+STAGE_SKIPPED = Counter("vision_stage_skipped_total", "Frames a detector skipped because its interval had not elapsed",
+                        label="stage")
+EMOTION_RESULTS = Counter("vision_emotion_results_total", "Classified emotions", label="emotion")
+EMOTION_CROPS_DROPPED = Counter("vision_emotion_crops_dropped_total",
+                                "Face crops replaced before the emotion worker got to them")
+EMOTION_CACHE_LOOKUPS = Counter("vision_emotion_cache_lookups_total", "Emotion cache lookups by result",
+                                label="result")
+EVENTS_SENT = Counter("vision_events_sent_total", "State events delivered to the remote server")
+EVENT_POST_FAILURES = Counter("vision_event_post_failures_total", "Failed posts to the remote server")
+EVENTS_DROPPED = Counter("vision_events_dropped_total", "Events dropped because the send queue was full")
+SESSION_LOG_DROPPED = Counter("vision_session_log_dropped_total",
+                              "Frame records dropped because the session log writer fell behind")
+EVENT_QUEUE_DEPTH = Gauge("vision_event_queue_depth", "Events waiting to be sent")
+ACTIVE_SESSIONS = Gauge("vision_sessions_active", "Logged-in sessions with a pipeline")
@@ -0,0 +1,240 @@
+import datetime
+import time
+
+import numpy as np
+
+from frame_packet import FramePacket
+from latency import LatencyWindow
+from pipeline_config import FACE_STAGES, PROFILES, build_stage
+from scheduler import DEFAULT_STAGES, CpuBudgetScheduler
+from session_log import EMOTION_FRESH, FACE_PRESENT, LANDMARKS_FRESH, LANDMARKS_PREDICTED
+
+# What a result reports for a stage the pipeline doesn't run. Focus reads as
+# focused so a focus-less deployment never triggers distraction messages.
+IDLE_RESULT = {"focus": "focused", "emotion": "neutral", "thumbs_up": "not_detected", "wave": "not_detected"}
+
+
+def utc_timestamp():
+    return datetime.datetime.utcnow().isoformat() + "Z"
+
+
+class VisionPipeline:
+    """Runs the focus, emotion and gesture detectors for a single user.
+
+    `stages` (from pipeline_config.load_pipeline_config) picks which
+    detectors run and their options; only those are built, so a
+    focus-only pipeline never loads TensorFlow or MediaPipe Hands.
+    `emotion_backend` and `emotion_async` apply unless the emotion stage
+    sets its own. Results always carry every field, with IDLE_RESULT
+    values for stages that don't run.
+
+    With the focus stage's `max_faces` above 1, one FaceMesh pass tracks
+    up to that many people, focus and emotion are scored for all of them
+    in one batch each, and results gain `people`: a focus and emotion per
+    track ID. The top-level fields follow the person tracked longest.
+
+    A pipeline is not thread-safe: the owning session makes sure only one
+    frame is in flight at a time. With a `cpu_budget` (share of one core),
+    a CpuBudgetScheduler sets how often each detector runs; without one
+    they keep their fixed intervals.
+    """
+
+    def __init__(self, emotion_backend="keras", emotion_async=True, cpu_budget=None, roi=False, stages=None):
+        self.stages = stages if stages is not None else {name: {} for name in PROFILES["full"]}
+        emotion_options = {"backend": emotion_backend, "asynchronous": emotion_async, **self.stages.get("emotion", {})}
+        focus_options = self.stages.get("focus", {})
+        self.keyframe_every = focus_options.get("keyframe_every", 1)
+        self.max_faces = focus_options.get("max_faces", 1)
+        self.face_tracker = (build_stage("face", focus_options, roi)
+                             if any(s in self.stages for s in FACE_STAGES) else None)
+        self.focus_detector = build_stage("focus", self.stages["focus"]) if "focus" in self.stages else None
+        self.emotion_detector = build_stage("emotion", emotion_options) if "emotion" in self.stages else None
+        self.gesture_detector = build_stage("gesture", self.stages["gesture"], roi) if "gesture" in self.stages else None
+        self.components = [c for c in (self.face_tracker, self.focus_detector, self.emotion_detector,
+                                       self.gesture_detector) if c is not None]
+        if self.face_tracker is not None and self.focus_detector is None:
+            # Only emotion reads the face box, and only once per emotion interval
+            self.face_tracker.interval = self.emotion_detector.process_interval
+        elif self.keyframe_every > 1:
+            self.face_tracker.interval = self.focus_detector.frame_interval * self.keyframe_every
+        self.packet = FramePacket(mirror=True)
+        self.frame_latency = LatencyWindow()
+        self.result_latency = LatencyWindow()
+        # A configured interval replaces the stage's fastest scheduled rate
+        self._schedule_stages = tuple(
+            (name, self.stages[name].get("interval", fastest), max(slowest, self.stages[name].get("interval", 0.0)))
+            for name, fastest, slowest in DEFAULT_STAGES if name in self.stages
+        )
+        self.scheduler = CpuBudgetScheduler(cpu_budget, self._schedule_stages) if cpu_budget else None
+        self._emotion_runs = 0
+        self._logged_emotion_runs = 0
+
+    def _apply_schedule(self, now):
+        intervals = self.scheduler.plan(now)
+        # FaceMesh only has to run as often as focus scoring consumes it;
+        # emotion reuses the last face box
+        if self.face_tracker is not None:
+            self.face_tracker.interval = intervals.get("focus", intervals.get("emotion"))
+            if self.focus_detector is not None and self.keyframe_every > 1:
+                self.face_tracker.interval *= self.keyframe_every
+        if self.focus_detector is not None:
+            self.focus_detector.frame_interval = intervals["focus"]
+        if self.gesture_detector is not None:
+            self.gesture_detector.process_interval = intervals["gesture"]
+        if self.emotion_detector is not None:
+            self.emotion_detector.process_interval = intervals["emotion"]
+
+    def process(self, frame, timestamp=None):
+        """Analyse one BGR frame; `timestamp` is when it was captured or received (time.time())."""
+        start = time.perf_counter()
+        packet = self.packet.load(frame, timestamp)
+        if self.scheduler is not None:
+            self._apply_schedule(packet.timestamp)
+
+        result = dict(IDLE_RESULT)
+        face = None
+        focus_states = emotions = None
+        focus_time = emotion_time = gesture_time = 0.0
+        if self.face_tracker is not None:
+            stage_start = time.perf_counter()
+            face = self.face_tracker.process(packet)
+            if self.focus_detector is not None and self.max_faces > 1:
+                focus_states = self.focus_detector.process_faces(packet)
+                result["focus"] = self._focus_label(focus_states.get(face.track_id))
+            elif self.focus_detector is not None:
+                _, focus_state = self.focus_detector.process_frame(packet)
+                result["focus"] = "focused" if focus_state["is_focused"] else "distracted"
+            focus_time = time.perf_counter() - stage_start
+
+        if self.emotion_detector is not None:
+            stage_start = time.perf_counter()
+            if self.max_faces > 1:
+                emotions = self.emotion_detector.detect_emotions(packet)
+                result["emotion"] = emotions.get(face.track_id, {"emotion": "Neutral"})["emotion"].lower()
+            else:
+                result["emotion"] = self.emotion_detector.detect_emotion(packet)["emotion"].lower()
+            emotion_time = time.perf_counter() - stage_start
+
+        if self.max_faces > 1:
+            result["people"] = self._people(packet, focus_states, emotions)
+
+        if self.gesture_detector is not None:
+            stage_start = time.perf_counter()
+            gesture = self.gesture_detector.detect_gesture(packet)["gesture"]
+            result["thumbs_up"] = "detected" if gesture == "Thumbs Up" else "not_detected"
+            result["wave"] = "detected" if gesture == "Wave" else "not_detected"
+            gesture_time = time.perf_counter() - stage_start
+
+        frame_time = time.perf_counter() - start
+        if self.scheduler is not None:
+            self._record_costs(packet, face, focus_time, emotion_time, gesture_time, frame_time)
+        self.frame_latency.record(frame_time)
+        self.result_latency.record(time.time() - packet.timestamp)
+        result["timestamp"] = utc_timestamp()
+        return result
+
+    def frame_detail(self, landmarks=False):
+        """The last frame's detector detail for the session log and focus aggregates: (session_log flags,
+        faces, focus state, emotion scores, landmarks copy if `landmarks`).
+
+        In multi-face mode this follows the primary person, like the top-level result fields.
+        """
+        face = self.packet.face
+        flags = faces = 0
+        points = None
+        if face is not None and face.face_present:
+            flags = FACE_PRESENT
+            if face.fresh:
+                flags |= LANDMARKS_FRESH
+            if face.predicted:
+                flags |= LANDMARKS_PREDICTED
+            faces = 1
+            if landmarks:
+                points = face.points.copy()
+        if self.max_faces > 1:
+            faces = sum(f.face_present for f in self.packet.faces)
+        focus_state = self.focus_detector.last_output_state if self.focus_detector is not None else None
+        scores = None
+        emotion = self.emotion_detector
+        if emotion is not None:
+            scores = (emotion.track_scores.get(face.track_id) if self.max_faces > 1 and face is not None
+                      else emotion.last_scores)
+            if emotion.inference_latency.count > self._logged_emotion_runs:
+                self._logged_emotion_runs = emotion.inference_latency.count
+                flags |= EMOTION_FRESH
+        return flags, faces, focus_state, scores, points
+
+    @staticmethod
+    def _focus_label(focus_state):
+        return "focused" if focus_state is not None and focus_state["is_focused"] else "distracted"
+
+    def _people(self, packet, focus_states, emotions):
+        people = []
+        for face in packet.faces:
+            person = {"track_id": face.track_id, "focus": IDLE_RESULT["focus"], "emotion": IDLE_RESULT["emotion"]}
+            if focus_states is not None:
+                person["focus"] = self._focus_label(focus_states.get(face.track_id))
+            if emotions is not None:
+                person["emotion"] = emotions.get(face.track_id, {"emotion": "Neutral"})["emotion"].lower()
+            people.append(person)
+        return people
+
+    def _record_costs(self, packet, face, focus_time, emotion_time, gesture_time, frame_time):
+        overhead = frame_time - emotion_time
+        if face is not None and face.fresh:
+            # Without a focus stage the tracker only runs for emotion; charge it there. With keyframes,
+            # one FaceMesh run serves `keyframe_every` focus updates.
+            if self.focus_detector is not None:
+                self.scheduler.record("focus", focus_time / self.keyframe_every)
+            else:
+                self.scheduler.record("emotion", focus_time)
+            overhead -= focus_time
+        if self.gesture_detector is not None and self.gesture_detector.last_processed_time == packet.timestamp:
+            self.scheduler.record("gesture", gesture_time)
+            overhead -= gesture_time
+        # Inference may run on the emotion worker, so take its cost from there
+        if self.emotion_detector is not None:
+            inference = self.emotion_detector.inference_latency
+            if inference.count > self._emotion_runs:
+                self._emotion_runs = inference.count
+                self.scheduler.record("emotion", inference.last)
+        self.scheduler.record_frame(packet.timestamp, overhead)
+
+    def reset(self):
+        """Back to a freshly built state for the next session, keeping the loaded models."""
+        for component in self.components:
+            component.reset()
+        self.frame_latency = LatencyWindow()
+        self.result_latency = LatencyWindow()
+        if self.scheduler is not None:
+            self.scheduler = CpuBudgetScheduler(self.scheduler.budget, self._schedule_stages)
+        self._emotion_runs = 0
+        self._logged_emotion_runs = 0
+
+    def warm_up(self, shape=(480, 640, 3)):
+        """Runs every model once so the first real frame doesn't pay for graph setup."""
+        self.process(np.zeros(shape, dtype=np.uint8), 0.0)
+        if self.emotion_detector is not None:
+            self.emotion_detector.warm_up(self.max_faces)
+        self.reset()
+
+    def latency_stats(self):
+        emotion = self.emotion_detector
+        roi = self.face_tracker.roi if self.face_tracker is not None else None
+        return {
+            "enabled": list(self.stages),
+            "frames": len(self.frame_latency),
+            "frame": self.frame_latency.percentiles(),
+            "capture_to_result": self.result_latency.percentiles(),
+            "emotion_inference": emotion.inference_latency.percentiles() if emotion is not None else None,
+            "emotion_crops_dropped": emotion.crops_dropped if emotion is not None else None,
+            "emotion_cache": emotion.cache.stats() if emotion is not None and emotion.cache is not None else None,
+            "schedule": self.scheduler.stats() if self.scheduler is not None else None,
+            "roi": {"face": roi.stats(),
+                    "hands": self.gesture_detector.roi.stats() if self.gesture_detector is not None else None}
+            if roi is not None else None,
+        }
+
+    def release(self):
+        for component in self.components:
+            component.release()
@@ -0,0 +1,89 @@
+import json
+
+# Options each stage accepts in a pipeline definition; anything left out keeps the detector's default.
+# "interval" is the stage's fastest run interval in seconds. Focus "keyframe_every" = N runs FaceMesh on
+# every Nth focus update and scores predicted landmarks on the others (2 keeps focus accuracy, 3 doesn't; see
+# benchmarks/bench_keyframes.py); "max_faces" > 1 tracks and scores that many people (focus and emotion)
+# from one camera.
+STAGE_OPTIONS = {
+    "focus": ("interval", "keyframe_every", "max_faces"),
+    "emotion": ("interval", "backend", "asynchronous", "cache_size", "cache_distance", "cache_ttl"),
+    "gesture": ("interval", "max_hands"),
+}
+
+PROFILES = {
+    "full": ("focus", "emotion", "gesture"),
+    "focus": ("focus",),
+}
+
+# Stages that read the FaceTracker's landmarks / face box
+FACE_STAGES = ("focus", "emotion")
+
+
+def load_pipeline_config(spec="full"):
+    """Stage name -> options from a profile name, a comma-separated stage list or a JSON file.
+
+    A JSON file looks like {"stages": {"focus": {"interval": 0.15}, "emotion": {"backend": "keras"}}}.
+    """
+    if spec.endswith(".json"):
+        with open(spec) as f:
+            stages = json.load(f)["stages"]
+    else:
+        names = PROFILES.get(spec) or [name.strip() for name in spec.split(",") if name.strip()]
+        stages = {name: {} for name in names}
+
+    if not stages:
+        raise ValueError(f"Pipeline definition {spec!r} has no stages")
+    for name, options in stages.items():
+        if name not in STAGE_OPTIONS:
+            raise ValueError(f"Unknown pipeline stage {name!r}, expected one of {', '.join(STAGE_OPTIONS)}")
+        unknown = set(options) - set(STAGE_OPTIONS[name])
+        if unknown:
+            raise ValueError(f"Unknown options for stage {name!r}: {', '.join(sorted(unknown))}")
+        if options.get("keyframe_every", 1) < 1:
+            raise ValueError("keyframe_every must be at least 1")
+        if options.get("max_faces", 1) < 1:
+            raise ValueError("max_faces must be at least 1")
+    # Keep the pipeline's own stage order whatever order the definition used
+    return {name: dict(stages[name]) for name in STAGE_OPTIONS if name in stages}
+
+
+# Builders import their detector on first use, so models (and TensorFlow or
+# MediaPipe Hands) for stages a deployment leaves out are never loaded.
+
+def _build_face_tracker(options, roi):
+    from face_tracker import FaceTracker
+    return FaceTracker(roi=roi, predict=options.get("keyframe_every", 1) > 1, max_faces=options.get("max_faces", 1))
+
+
+def _build_focus(options, roi):
+    from focus_detector import SimpleFocusDetector
+    detector = SimpleFocusDetector()
+    detector.frame_interval = options.get("interval", detector.frame_interval)
+    return detector
+
+
+def _build_emotion(options, roi):
+    from emotion_detector import EmotionDetector
+    detector = EmotionDetector(**{key: value for key, value in options.items() if key != "interval"})
+    detector.process_interval = options.get("interval", detector.process_interval)
+    return detector
+
+
+def _build_gesture(options, roi):
+    from gesture_detector import GestureDetector
+    detector = GestureDetector(roi=roi, max_hands=options.get("max_hands", 1))
+    detector.process_interval = options.get("interval", detector.process_interval)
+    return detector
+
+
+STAGE_BUILDERS = {
+    "face": _build_face_tracker,
+    "focus": _build_focus,
+    "emotion": _build_emotion,
+    "gesture": _build_gesture,
+}
+
+
+def build_stage(name, options=None, roi=False):
+    return STAGE_BUILDERS[name](options or {}, roi)
@@ -0,0 +1,379 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from latency import LatencyWindow
+from pipeline import IDLE_RESULT, utc_timestamp
+from pipeline_config import FACE_STAGES, PROFILES, build_stage
+from session_log import EMOTION_FRESH, FACE_PRESENT, LANDMARKS_FRESH, LANDMARKS_PREDICTED
+
+STAGES = ("focus", "gesture", "emotion")
+STAGE_TIMEOUT = 10.0  # Seconds a worker may take on one frame before it is restarted
+
+
+class FrameRing:
+    """A few RGB frame slots in one shared memory block.
+
+    The owning process mirrors and converts each frame straight into a
+    slot; worker processes map the same block and read the slot in place.
+    """
+
+    def __init__(self, shape, slots=4):
+        self.shape = shape
+        self.slots = slots
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * slots)
+        self.frames = np.ndarray((slots,) + shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.next_slot = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, frame, mirror=True, held=None):
+        """Copies a BGR frame into the next slot other than `held`; returns the slot."""
+        slot = self.next_slot
+        if slot == held:
+            slot = (slot + 1) % self.slots
+        self.next_slot = (slot + 1) % self.slots
+        dst = self.frames[slot]
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=dst)
+        if mirror:
+            cv2.flip(dst, 1, dst=dst)
+        return slot
+
+    def close(self):
+        self.frames = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _create_stage(stage, options):
+    # Built through the registry so each worker only imports the models it runs
+    stages, roi = options["stages"], options["roi"]
+    if stage == "focus":
+        tracker = build_stage("face", stages.get("focus"), roi)
+        focus = build_stage("focus", stages["focus"]) if "focus" in stages else None
+        if tracker.predict:
+            tracker.interval = focus.frame_interval * stages["focus"]["keyframe_every"]
+
+        def run(packet, _):
+            face = tracker.process(packet)
+            # Detail for the session log and aggregates: (session_log flags, focus state, landmarks)
+            flags, points = 0, None
+            if face.face_present:
+                flags = (FACE_PRESENT | (LANDMARKS_FRESH if face.fresh else 0) |
+                         (LANDMARKS_PREDICTED if face.predicted else 0))
+                points = face.points
+            if focus is None:
+                return None, face.bbox, (flags, None, points)
+            _, state = focus.process_frame(packet)
+            return bool(state["is_focused"]), face.bbox, (flags, state, points)
+        return run, (tracker,) if focus is None else (tracker, focus)
+
+    if stage == "gesture":
+        gestures = build_stage("gesture", stages["gesture"], roi)
+
+        def run(packet, _):
+            return gestures.detect_gesture(packet)["gesture"]
+        return run, (gestures,)
+
+    from face_tracker import FaceObservation
+    emotion = build_stage("emotion", {"backend": options["emotion_backend"], **stages["emotion"],
+                                      "asynchronous": False})
+
+    def run(packet, bbox):
+        packet.face = FaceObservation(bbox=bbox, timestamp=packet.timestamp)
+        runs = emotion.inference_latency.count
+        label = emotion.detect_emotion(packet)["emotion"]
+        inference = emotion.inference_latency.last if emotion.inference_latency.count > runs else None
+        return label, inference, emotion.last_scores
+    return run, (emotion,)
+
+
+def _stage_worker(stage, conn, options):
+    """Worker process loop: (ring name, slot, shape, frame id, timestamp, extra) in, (frame id, result, seconds) out.
+
+    A frame the detector fails on is answered with a None result, so one bad frame doesn't end the worker.
+    """
+    from frame_packet import FramePacket
+
+    run, components = _create_stage(stage, options)
+    conn.send(None)  # Models loaded
+    packet = FramePacket()
+    shm, frames = None, None
+    try:
+        while True:
+            job = conn.recv()
+            if job is None:
+                break
+            if job == "reset":
+                for component in components:
+                    component.reset()
+                conn.send(None)
+                continue
+            name, slot, shape, frame_id, timestamp, extra = job
+            if shm is None or shm.name != name:
+                frames = None
+                if shm is not None:
+                    shm.close()
+                shm = shared_memory.SharedMemory(name=name)
+                count = shm.size // int(np.prod(shape))
+                frames = np.ndarray((count,) + shape, dtype=np.uint8, buffer=shm.buf)
+            start = time.perf_counter()
+            try:
+                packet.attach(frames[slot], timestamp, frame_id)
+                result = run(packet, extra)
+            except Exception as e:
+                print(f"❌ [vision-{stage}] Frame {frame_id} failed: {e}")
+                result = None
+            conn.send((frame_id, result, time.perf_counter() - start))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        for component in components:
+            component.release()
+        frames = None
+        if shm is not None:
+            shm.close()
+
+
+class ProcessPipeline:
+    """VisionPipeline with each detector in its own worker process.
+
+    Each frame is written once into a shared-memory FrameRing. Focus
+    (with the face tracker) and gesture analyse it in parallel; emotion
+    then runs on the face box focus found, overlapping with the next
+    frame, and its result is merged in by frame id when it arrives.
+    Returns the same state dicts as VisionPipeline, and `stages` works the
+    same way: only the workers the enabled stages need are started (focus
+    runs whenever emotion does, since it finds the face). The CPU-budget
+    scheduler and multi-face mode are not available here: workers keep
+    their intervals and follow one face.
+
+    Workers are spawned, so they import the parent's main script: keep its
+    side effects under `if __name__ == "__main__"` (app.py does).
+    """
+
+    def __init__(self, emotion_backend="keras", roi=False, mirror=True, slots=4, stages=None):
+        self.stages = stages if stages is not None else {name: {} for name in PROFILES["full"]}
+        if self.stages.get("focus", {}).get("max_faces", 1) > 1:
+            raise ValueError("Multi-face mode (max_faces > 1) needs the thread pipeline")
+        self.mirror = mirror
+        self.slots = slots
+        self.ring = None
+        self.frame_id = 0
+        self.frame_latency = LatencyWindow()
+        self.result_latency = LatencyWindow()
+        self.worker_stages = [stage for stage in STAGES if stage in self.stages or
+                              (stage == "focus" and any(s in self.stages for s in FACE_STAGES))]
+        self.stage_latency = {stage: LatencyWindow() for stage in self.worker_stages}
+        self.emotion_latency = LatencyWindow()
+
+        self.emotion = "Neutral"
+        self.emotion_frame_id = -1
+        self.emotion_scores = None
+        self._emotion_fresh = False  # An emotion result arrived since the last frame_detail()
+        self._emotion_slot = None  # Slot the emotion worker is reading, if it is busy
+        self._face_box = None
+        self._face_detail = (0, None, None)  # The focus worker's (flags, focus state, landmarks) for the last frame
+
+        # Spawned rather than forked: the parent may already run TensorFlow and MediaPipe threads
+        self._ctx = multiprocessing.get_context("spawn")
+        self._options = {"emotion_backend": emotion_backend, "roi": roi, "stages": self.stages}
+        self.conns = {}
+        self.workers = {}
+        self.restarts = {stage: 0 for stage in self.worker_stages}
+        for stage in self.worker_stages:
+            self._start_worker(stage)
+        for stage in self.worker_stages:
+            try:
+                self._wait_started(stage)
+            except RuntimeError:
+                self.release()
+                raise
+        print(f"[ProcessPipeline] Started {len(self.workers)} detector processes")
+
+    def _start_worker(self, stage):
+        parent, child = self._ctx.Pipe()
+        worker = self._ctx.Process(target=_stage_worker, args=(stage, child, self._options), name=f"vision-{stage}",
+                                   daemon=True)
+        worker.start()
+        child.close()
+        self.conns[stage] = parent
+        self.workers[stage] = worker
+
+    def _wait_started(self, stage):
+        try:
+            self.conns[stage].recv()
+        except EOFError:
+            raise RuntimeError(f"{stage} worker process failed to start") from None
+
+    def _restart_worker(self, stage):
+        """Replaces a worker that died or hung; the new one starts from a reset state."""
+        self.restarts[stage] += 1
+        print(f"❌ [ProcessPipeline] {stage} worker process stopped responding, restarting it")
+        worker = self.workers[stage]
+        if worker.is_alive():
+            worker.kill()  # A hung worker may not get to handle SIGTERM
+        worker.join(timeout=5)
+        self.conns[stage].close()
+        if stage == "emotion":
+            self._emotion_slot = None
+        self._start_worker(stage)
+        self._wait_started(stage)
+
+    def _send(self, stage, job):
+        if not self.workers[stage].is_alive():
+            self._restart_worker(stage)
+        try:
+            self.conns[stage].send(job)
+        except (BrokenPipeError, OSError):
+            pass  # Died just now; _receive restarts it
+
+    def _receive(self, stage):
+        """(frame id, result) of the stage's next reply; (None, None) if the worker had to be restarted."""
+        conn = self.conns[stage]
+        try:
+            if not conn.poll(STAGE_TIMEOUT):
+                raise TimeoutError
+            frame_id, result, seconds = conn.recv()
+        except (EOFError, OSError, TimeoutError):
+            self._restart_worker(stage)
+            return None, None
+        self.stage_latency[stage].record(seconds)
+        return frame_id, result
+
+    def _receive_frame(self, stage, frame_id):
+        """The stage's result for `frame_id`: older replies are dropped, and a reply for another frame or a
+        restarted worker gives None."""
+        while True:
+            reply_id, result = self._receive(stage)
+            if reply_id == frame_id or reply_id is None:
+                return result
+            if reply_id > frame_id:
+                print(f"❌ [ProcessPipeline] {stage} answered frame {reply_id} while waiting for {frame_id}")
+                return None
+            print(f"[ProcessPipeline] Dropped a stale {stage} result for frame {reply_id} (waiting for {frame_id})")
+
+    def _collect_emotion(self, wait=False):
+        if self._emotion_slot is None or not (wait or self.conns["emotion"].poll()):
+            return
+        frame_id, result = self._receive("emotion")
+        self._emotion_slot = None
+        if result is None:
+            return
+        label, inference, scores = result
+        if inference is not None:
+            self.emotion_latency.record(inference)
+        if frame_id > self.emotion_frame_id:
+            self.emotion_frame_id = frame_id
+            self.emotion = label
+            self.emotion_scores = scores
+            self._emotion_fresh = inference is not None
+
+    def process(self, frame, timestamp=None):
+        """Analyse one BGR frame; `timestamp` is when it was captured or received (time.time())."""
+        start = time.perf_counter()
+        timestamp = time.time() if timestamp is None else timestamp
+        if self.ring is None or self.ring.shape != frame.shape:
+            # The emotion worker may still be reading the old ring
+            self._collect_emotion(wait=True)
+            if self.ring is not None:
+                self.ring.close()
+            self.ring = FrameRing(frame.shape, self.slots)
+
+        self.frame_id += 1
+        slot = self.ring.write(frame, self.mirror, held=self._emotion_slot)
+        job = (self.ring.name, slot, frame.shape, self.frame_id, timestamp)
+        for stage in ("focus", "gesture"):
+            if stage in self.conns:
+                self._send(stage, job + (None,))
+
+        result = dict(IDLE_RESULT)
+        if "emotion" in self.conns:
+            self._collect_emotion()
+        if "focus" in self.conns:
+            focus = self._receive_frame("focus", self.frame_id)
+            is_focused, face_box, self._face_detail = focus if focus is not None else (None, None, (0, None, None))
+            if is_focused is not None:
+                result["focus"] = "focused" if is_focused else "distracted"
+            if face_box is not None:
+                self._face_box = face_box
+        if "gesture" in self.conns:
+            gesture = self._receive_frame("gesture", self.frame_id)  # None if the frame failed
+            result["thumbs_up"] = "detected" if gesture == "Thumbs Up" else "not_detected"
+            result["wave"] = "detected" if gesture == "Wave" else "not_detected"
+        if "emotion" in self.conns:
+            if self._emotion_slot is None and self._face_box is not None:
+                self._send("emotion", job + (self._face_box,))
+                self._emotion_slot = slot
+            result["emotion"] = self.emotion.lower()
+
+        self.frame_latency.record(time.perf_counter() - start)
+        self.result_latency.record(time.time() - timestamp)
+        result["timestamp"] = utc_timestamp()
+        return result
+
+    def frame_detail(self, landmarks=False):
+        """Same as VisionPipeline.frame_detail, from what the focus and emotion workers sent back."""
+        flags, focus_state, points = self._face_detail
+        if self._emotion_fresh:
+            flags |= EMOTION_FRESH
+            self._emotion_fresh = False
+        return (flags, int(bool(flags & FACE_PRESENT)), focus_state, self.emotion_scores,
+                points if landmarks else None)
+
+    def reset(self):
+        """Back to a freshly started state for the next session, keeping the workers and their models."""
+        self._collect_emotion(wait=True)
+        for stage in self.worker_stages:
+            self._send(stage, "reset")
+        for stage in self.worker_stages:
+            try:
+                self.conns[stage].recv()
+            except (EOFError, OSError):
+                self._restart_worker(stage)  # A fresh worker is already reset
+        self.frame_latency = LatencyWindow()
+        self.result_latency = LatencyWindow()
+        self.stage_latency = {stage: LatencyWindow() for stage in self.worker_stages}
+        self.emotion_latency = LatencyWindow()
+        self.emotion = "Neutral"
+        self.emotion_frame_id = -1
+        self.emotion_scores = None
+        self._emotion_fresh = False
+        self._face_box = None
+        self._face_detail = (0, None, None)
+
+    def warm_up(self, shape=(480, 640, 3)):
+        """Runs one blank frame through the workers so the first real frame doesn't pay for graph setup."""
+        self.process(np.zeros(shape, dtype=np.uint8), 0.0)
+        self.reset()
+
+    def latency_stats(self):
+        return {
+            "mode": "process",
+            "frames": len(self.frame_latency),
+            "frame": self.frame_latency.percentiles(),
+            "capture_to_result": self.result_latency.percentiles(),
+            "emotion_inference": self.emotion_latency.percentiles(),
+            "stages": {stage: window.percentiles() for stage, window in self.stage_latency.items()},
+            "worker_restarts": dict(self.restarts),
+        }
+
+    def release(self):
+        for stage, conn in self.conns.items():
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for stage, worker in self.workers.items():
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+            self.conns[stage].close()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
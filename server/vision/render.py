@@ -0,0 +1,145 @@
+import cv2
+
+import metrics
+from landmarks import mediapipe_solutions
+
+# Render modes understood by every detector's draw() stage:
+#   off     - never touch pixels, detectors only produce structured results
+#   minimal - status text and boxes
+#   full    - everything, including face mesh, landmark points and debug stats
+RENDER_OFF = "off"
+RENDER_MINIMAL = "minimal"
+RENDER_FULL = "full"
+RENDER_MODES = (RENDER_OFF, RENDER_MINIMAL, RENDER_FULL)
+
+
+def parse_render_mode(value):
+    mode = (value or RENDER_OFF).lower()
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode {value!r}, expected one of {', '.join(RENDER_MODES)}")
+    return mode
+
+
+def draw_overlays(frame, *detectors):
+    # The optional drawing stage: run after detection, on the frame to display
+    with metrics.timer("draw"):
+        for detector in detectors:
+            detector.draw(frame)
+    return frame
+
+
+# --- Focus ---
+
+def draw_face_mesh(frame, face_landmarks):
+    solutions = mediapipe_solutions()  # Imported on the first mesh/hand drawing
+    solutions.drawing_utils.draw_landmarks(
+        image=frame,
+        landmark_list=face_landmarks,
+        connections=solutions.face_mesh.FACEMESH_TESSELATION,
+        landmark_drawing_spec=None,
+        connection_drawing_spec=solutions.drawing_styles.get_default_face_mesh_tesselation_style()
+    )
+
+    solutions.drawing_utils.draw_landmarks(
+        image=frame,
+        landmark_list=face_landmarks,
+        connections=solutions.face_mesh.FACEMESH_CONTOURS,
+        landmark_drawing_spec=None,
+        connection_drawing_spec=solutions.drawing_styles.get_default_face_mesh_contours_style()
+    )
+
+
+def draw_focus_points(frame, points):
+    h, w = frame.shape[:2]
+
+    def px(point):
+        return int(point[0] * w), int(point[1] * h)
+
+    for eye in (points['left_eye'], points['right_eye']):
+        for point in eye:
+            cv2.circle(frame, px(point), 2, (0, 255, 0), -1)
+
+    cv2.circle(frame, px(points['nose']), 5, (0, 0, 255), -1)
+    cv2.circle(frame, px(points['chin']), 3, (255, 0, 0), -1)
+    cv2.circle(frame, px(points['forehead']), 3, (255, 0, 0), -1)
+    cv2.circle(frame, px(points['left_ear']), 3, (0, 255, 255), -1)
+    cv2.circle(frame, px(points['right_ear']), 3, (0, 255, 255), -1)
+    cv2.circle(frame, px(points['eye_center']), 4, (255, 0, 255), -1)
+
+
+def draw_gaze_stats(frame, debug):
+    h, w = frame.shape[:2]
+    cv2.putText(frame, f"V-ratio: {debug['v_ratio']:.2f}",
+               (w - 140, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+    cv2.putText(frame, f"H-ratio: {debug['h_ratio']:.2f}",
+               (w - 140, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+    cv2.putText(frame, f"Gaze: {debug['gaze_direction']}",
+               (w - 140, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+    cv2.putText(frame, f"Angle: {debug['angle']:.1f}",
+               (w - 140, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+
+
+def draw_focus_status(frame, focus_state):
+    # Draw a more stable overlay box at the top-left
+    cv2.rectangle(frame, (10, 10), (280, 130), (0, 0, 0), -1)
+
+    # Status with persistent color
+    status_color = (0, 255, 0) if focus_state['is_focused'] else (0, 0, 255)
+    status_text = "FOCUSED" if focus_state['is_focused'] else "DISTRACTED"
+
+    cv2.putText(frame, f"Status: {status_text}",
+               (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
+
+    # Draw the stats with larger size and better spacing
+    cv2.putText(frame, f"Eye AR: {focus_state['eye_aspect_ratio']:.2f}",
+               (20, 75), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (255, 255, 255), 2)
+
+    cv2.putText(frame, f"Gaze Score: {focus_state['gaze_score']:.2f}",
+               (20, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (255, 255, 255), 2)
+
+
+# --- Emotion ---
+
+EMOTION_COLORS = {
+    "Happy": (0, 255, 0),  # Green
+    "Sad": (255, 0, 0),    # Blue (BGR format)
+    "Neutral": (255, 255, 255)  # White
+}
+
+
+def draw_emotion_box(frame, x, y, w, h, emotion, confidence):
+    color = EMOTION_COLORS.get(emotion, (255, 255, 255))
+    cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+    label = f"{emotion}: {confidence:.2f}"
+    cv2.putText(frame, label, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+
+# --- Gesture ---
+
+GESTURE_COLORS = {
+    "Wave": (0, 255, 255),
+    "Thumbs Up": (0, 255, 0),
+    "Peace": (255, 0, 255),
+    "Hand Detected": (255, 255, 255)
+}
+
+
+def draw_hand_landmarks(frame, hand_landmarks):
+    solutions = mediapipe_solutions()  # Imported on the first mesh/hand drawing
+    solutions.drawing_utils.draw_landmarks(
+        frame,
+        hand_landmarks,
+        solutions.hands.HAND_CONNECTIONS,
+        solutions.drawing_styles.get_default_hand_landmarks_style(),
+        solutions.drawing_styles.get_default_hand_connections_style()
+    )
+
+
+def draw_gesture_status(frame, gesture_result):
+    color = GESTURE_COLORS.get(gesture_result["gesture"], (128, 128, 128))
+
+    cv2.putText(frame, f"Gesture: {gesture_result['gesture']}",
+               (20, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+
+    cv2.putText(frame, f"Confidence: {gesture_result['confidence']:.2f}",
+               (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+
+
+class RoiTracker:
+    """Chooses the part of the frame a landmark model looks at.
+
+    While an object (face, hand) is tracked, the model only gets a square
+    crop around its last box, `margin` box-sizes wider on each side and
+    scaled down to at most `infer_size` pixels. When tracking is lost it
+    searches the whole frame (scaled down to `search_size`, if given). The
+    crop only moves once the object gets within half a margin of its edge,
+    so MediaPipe's own frame-to-frame tracking sees a steady image.
+
+    MediaPipe tracks in the coordinates of the image it was last given, so
+    after the region changes (`moved`) a miss only means its tracking state
+    is stale; callers retry that frame once before giving up on the object.
+    """
+
+    def __init__(self, margin=0.5, infer_size=256, search_size=None):
+        self.margin = margin
+        self.infer_size = infer_size
+        self.search_size = search_size
+        self._buffer = None
+        self.reset()
+
+    def reset(self):
+        self.box = None  # (x, y, w, h) in frame pixels, None = search the whole frame
+        self.region = None
+        self.moved = False
+        self.searches = 0
+        self.tracked = 0
+        self.pixels = 0  # Fed to the model
+        self.frame_pixels = 0  # A full-frame model would have been fed
+
+    def prepare(self, rgb):
+        """Returns (model input, region) where region is the (x, y, w, h) of the frame it covers."""
+        h, w = rgb.shape[:2]
+        if self.box is None:
+            self.searches += 1
+            region, limit = (0, 0, w, h), self.search_size
+        else:
+            self.tracked += 1
+            region, limit = self.box, self.infer_size
+        self.moved = region != self.region
+        self.region = region
+        x, y, rw, rh = region
+        image = rgb[y:y + rh, x:x + rw]
+        scale = limit / max(rw, rh) if limit else 1.0
+        if scale < 1.0:
+            size = (max(1, round(rw * scale)), max(1, round(rh * scale)))
+            if self._buffer is None or self._buffer.shape[1::-1] != size:
+                self._buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            cv2.resize(image, size, dst=self._buffer, interpolation=cv2.INTER_LINEAR)
+            image = self._buffer
+        elif region != (0, 0, w, h):
+            image = np.ascontiguousarray(image)
+        self.pixels += image.shape[0] * image.shape[1]
+        self.frame_pixels += w * h
+        return image, region
+
+    @staticmethod
+    def to_frame(points, region, width, height):
+        """Maps (N, 3) landmarks normalised to `region` into whole-frame coordinates, in place."""
+        x, y, rw, rh = region
+        if (x, y, rw, rh) == (0, 0, width, height):
+            return points
+        points[:, 0] = (x + points[:, 0] * rw) / width
+        points[:, 1] = (y + points[:, 1] * rh) / height
+        points[:, 2] *= rw / width  # z shares x's scale
+        return points
+
+    def update(self, points, width, height):
+        """Moves the crop to follow frame-normalised `points`; None means tracking was lost."""
+        if points is None:
+            self.box = None
+            return
+        x_min, y_min = points[:, 0].min() * width, points[:, 1].min() * height
+        x_max, y_max = points[:, 0].max() * width, points[:, 1].max() * height
+        size = max(x_max - x_min, y_max - y_min)
+        if self.box is not None:
+            bx, by, bw, bh = self.box
+            slack = size * self.margin / 2
+            if (x_min - bx >= slack and y_min - by >= slack and
+                    bx + bw - x_max >= slack and by + bh - y_max >= slack):
+                return
+
+        side = size * (1 + 2 * self.margin)
+        cx, cy = (x_min + x_max) / 2, (y_min + y_max) / 2
+        x0 = int(max(0, cx - side / 2))
+        y0 = int(max(0, cy - side / 2))
+        x1 = int(min(width, cx + side / 2))
+        y1 = int(min(height, cy + side / 2))
+        self.box = (x0, y0, x1 - x0, y1 - y0) if x1 > x0 and y1 > y0 else None
+
+    def stats(self):
+        return {
+            "searches": self.searches,
+            "tracked": self.tracked,
+            "pixel_fraction": self.pixels / self.frame_pixels if self.frame_pixels else 1.0,
+        }
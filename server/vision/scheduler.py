@@ -0,0 +1,101 @@
+import math
+
+# (stage, fastest interval, slowest interval) in priority order. The fastest
+# intervals are the detectors' historical hardcoded ones.
+DEFAULT_STAGES = (
+    ("focus", 0.15, 1.0),
+    ("gesture", 0.05, 0.5),
+    ("emotion", 0.4, 5.0),
+)
+
+
+class CpuBudgetScheduler:
+    """Splits one stream's CPU budget between the detectors.
+
+    `budget` is the share of one core the stream may use (0.25 = 25%).
+    The scheduler keeps a moving average of what each detector run costs
+    and of the fixed per-frame work (decode, colour conversion), then
+    hands out run rates in priority order: every stage first gets its
+    slowest rate, then focus, gesture and emotion in turn are sped up
+    towards their fastest rate while budget remains. Under load emotion
+    slows down first and focus last.
+    """
+
+    def __init__(self, budget=0.25, stages=DEFAULT_STAGES, smoothing=0.2, replan_interval=1.0):
+        self.budget = budget
+        self.stages = stages
+        self.smoothing = smoothing
+        self.replan_interval = replan_interval
+        self.costs = {name: None for name, _, _ in stages}
+        self.intervals = {name: fastest for name, fastest, _ in stages}
+        self.frame_cost = 0.0
+        self.frame_period = None
+        self.last_frame_time = None
+        self.last_plan_time = None
+
+    def _average(self, old, new):
+        return new if old is None else old + self.smoothing * (new - old)
+
+    def record(self, stage, seconds):
+        self.costs[stage] = self._average(self.costs[stage], seconds)
+
+    def record_frame(self, timestamp, overhead_seconds):
+        if self.last_frame_time is not None and timestamp > self.last_frame_time:
+            self.frame_period = self._average(self.frame_period, timestamp - self.last_frame_time)
+        self.last_frame_time = timestamp
+        self.frame_cost = self._average(self.frame_cost, overhead_seconds)
+
+    def plan(self, now):
+        """Recomputes the stage intervals at most once per `replan_interval`; returns them."""
+        if self.last_plan_time is not None and now - self.last_plan_time < self.replan_interval:
+            return self.intervals
+        self.last_plan_time = now
+
+        remaining = self.budget
+        if self.frame_period:
+            remaining -= self.frame_cost / self.frame_period
+
+        intervals = {}
+        rates = {}
+        for name, _, slowest in self.stages:
+            intervals[name], rates[name] = self._snap(slowest)
+            remaining -= rates[name] * (self.costs[name] or 0.0)
+        for name, fastest, slowest in self.stages:
+            cost = self.costs[name]
+            if cost is None or cost <= 0:
+                intervals[name], rates[name] = self._snap(fastest)  # Not measured yet: run at the historical rate
+                continue
+            affordable = rates[name] + max(0.0, remaining) / cost
+            if affordable * fastest >= 1.0:
+                interval, rate = self._snap(fastest)
+            else:
+                interval, rate = self._snap(min(slowest, 1.0 / affordable))
+            remaining -= (rate - rates[name]) * cost
+            intervals[name], rates[name] = interval, rate
+
+        self.intervals = intervals
+        return self.intervals
+
+    def _snap(self, interval):
+        """Rounds an interval up to a whole number of frames; returns (interval, achieved rate).
+
+        A detector can only run on frames that arrive, so at 15 fps asking
+        for 12 runs a second really gets 7.5. The returned interval sits
+        half a frame below the multiple so clock jitter can't skip a frame.
+        """
+        if not self.frame_period:
+            return interval, 1.0 / interval
+        frames = max(1, math.ceil(interval / self.frame_period - 1e-6))
+        return (frames - 0.5) * self.frame_period, 1.0 / (frames * self.frame_period)
+
+    def stats(self):
+        planned = sum((self.costs[name] or 0.0) * self._snap(interval)[1] for name, interval in self.intervals.items())
+        if self.frame_period:
+            planned += self.frame_cost / self.frame_period
+        return {
+            "budget": self.budget,
+            "planned_cpu": planned,
+            "intervals": dict(self.intervals),
+            "costs_ms": {name: (cost or 0.0) * 1000 for name, cost in self.costs.items()},
+            "frame_cost_ms": self.frame_cost * 1000,
+        }
@@ -0,0 +1,293 @@
+import mmap
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import metrics
+from emotion_backends import EMOTION_LABELS
+from landmarks import GAZE_DIRECTIONS, NUM_FACE_LANDMARKS
+
+# File layout: a HEADER_SIZE-byte header, then `count` fixed-size records.
+# `count` is only raised after the records it covers are written, so a
+# reader of a live log never sees a half-written record.
+MAGIC = b"VLOG"
+VERSION = 1
+HEADER_SIZE = 64
+HEADER = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("landmarks", "<u2"),  # 1 if records carry quantized landmarks
+    ("record_size", "<u4"),
+    ("header_size", "<u4"),
+    ("count", "<u8"),
+    ("created", "<f8"),  # time.time() the log was opened
+])
+
+# Record `flags` bits
+FACE_PRESENT = 1
+FOCUSED = 2
+THUMBS_UP = 4
+WAVE = 8
+LANDMARKS_FRESH = 16  # FaceMesh ran on this frame (not reused or predicted)
+LANDMARKS_PREDICTED = 32
+EMOTION_FRESH = 64  # `emotion_scores` came from an inference that finished since the last record
+
+EMOTION_STATES = ("neutral", "happy", "sad")  # `emotion` codes; -1 when unknown
+
+# Landmarks are stored as int16 at 1/LANDMARK_SCALE resolution (±2 in normalised
+# coordinates, ~0.04 px on a 640 px frame)
+LANDMARK_SCALE = 16384
+
+
+def record_dtype(landmarks=False):
+    """Structured dtype of one frame record (52 bytes, or 2860 with landmarks)."""
+    fields = [
+        ("timestamp", "<f8"),  # When the frame was received (time.time())
+        ("frame", "<u4"),  # Frames processed in this session before this one
+        ("flags", "u1"),
+        ("faces", "u1"),  # People tracked (multi-face mode) or 0/1
+        ("gaze_direction", "i1"),  # Index into GAZE_DIRECTIONS, -1 without a focus update
+        ("emotion", "i1"),  # Index into EMOTION_STATES
+        ("ear", "<f4"),  # Eye aspect ratio of the last focus update, NaN before the first
+        ("gaze_score", "<f4"),
+        ("emotion_scores", "<f4", (len(EMOTION_LABELS),)),  # Last model scores (percent), NaN before the first
+    ]
+    if landmarks:
+        fields.append(("landmarks", "<i2", (NUM_FACE_LANDMARKS, 3)))
+    return np.dtype(fields)
+
+
+_GAZE_CODES = {direction: i for i, direction in enumerate(GAZE_DIRECTIONS)}
+_EMOTION_CODES = {emotion: i for i, emotion in enumerate(EMOTION_STATES)}
+_NO_SCORES = np.full(len(EMOTION_LABELS), np.nan, dtype=np.float32)
+_NO_LANDMARKS = np.zeros((NUM_FACE_LANDMARKS, 3), dtype=np.int16)
+
+# What a pipeline without detector detail reports: (flags, faces, focus state, emotion scores, points)
+NO_DETAIL = (0, 0, None, None, None)
+
+
+def frame_record(timestamp, frame, result, detail=NO_DETAIL):
+    """One record's field values as a plain tuple, which is far cheaper to build than a structured row.
+
+    `detail` comes from the pipeline's frame_detail(). `points` (float32
+    landmarks) is only used by logs with landmarks, and quantized by the
+    writer thread.
+    """
+    flags, faces, focus_state, scores, points = detail
+    if result["focus"] == "focused":
+        flags |= FOCUSED
+    if result["thumbs_up"] == "detected":
+        flags |= THUMBS_UP
+    if result["wave"] == "detected":
+        flags |= WAVE
+    if focus_state is not None:
+        gaze_direction = _GAZE_CODES.get(focus_state["gaze_direction"], -1)
+        ear, gaze_score = focus_state["eye_aspect_ratio"], focus_state["gaze_score"]
+    else:
+        gaze_direction, ear, gaze_score = -1, np.nan, np.nan
+    return (timestamp, frame, flags, faces, gaze_direction, _EMOTION_CODES.get(result["emotion"], -1), ear,
+            gaze_score, _NO_SCORES if scores is None else scores, points)
+
+
+def quantize_landmarks(points):
+    if points is None:
+        return _NO_LANDMARKS
+    return np.clip(np.rint(points * LANDMARK_SCALE), -32767, 32767).astype(np.int16)
+
+
+def dequantize_landmarks(landmarks):
+    """float32 (..., 468, 3) normalised landmarks from a log's `landmarks` field."""
+    return landmarks.astype(np.float32) / LANDMARK_SCALE
+
+
+class SessionLog:
+    """Append-only, memory-mapped file of fixed-size frame records for one session.
+
+    The file grows `chunk` records at a time and is trimmed to its records
+    on close. Only the SessionLogWriter thread appends to it.
+    """
+
+    def __init__(self, path, landmarks=False, chunk=4096):
+        self.path = path
+        self.landmarks = landmarks
+        self.dtype = record_dtype(landmarks)
+        self.chunk = chunk
+        self.count = 0
+        self.capacity = 0
+        self._file = open(path, "w+b")
+        header = np.zeros((), HEADER)
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["landmarks"] = landmarks
+        header["record_size"] = self.dtype.itemsize
+        header["header_size"] = HEADER_SIZE
+        header["created"] = time.time()
+        self._file.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+        self._mmap = None
+        self._header = None
+        self._records = None
+        self._grow(chunk)
+
+    def _grow(self, capacity):
+        self._unmap()
+        self._file.truncate(HEADER_SIZE + capacity * self.dtype.itemsize)
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._header = np.ndarray((), HEADER, buffer=self._mmap)
+        self._records = np.ndarray((capacity,), self.dtype, buffer=self._mmap, offset=HEADER_SIZE)
+        self.capacity = capacity
+
+    def _unmap(self):
+        # Views into the map must go before it can be closed
+        self._header = None
+        self._records = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def append(self, records):
+        """Appends frame_record() tuples and commits them to the header."""
+        if self.landmarks:
+            records = [record[:-1] + (quantize_landmarks(record[-1]),) for record in records]
+        else:
+            records = [record[:-1] for record in records]
+        end = self.count + len(records)
+        if end > self.capacity:
+            self._grow(max(end, self.capacity + self.chunk))
+        self._records[self.count:end] = np.array(records, self.dtype)
+        self.count = end
+        self._header["count"] = end
+
+    def flush(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._unmap()
+        self._file.truncate(HEADER_SIZE + self.count * self.dtype.itemsize)
+        self._file.close()
+
+
+class SessionLogWriter:
+    """One background thread that appends records to every session's log.
+
+    The detection thread only builds a frame_record() tuple and queues it;
+    converting records, mapping, growing and flushing files happen here. While the disk is more than
+    `max_queued` records behind, new records are dropped.
+    """
+
+    def __init__(self, flush_interval=1.0, max_queued=10000):
+        self.flush_interval = flush_interval
+        self.max_queued = max_queued
+        self.queue = deque()
+        self.records_written = 0
+        self.records_dropped = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self.thread = threading.Thread(target=self._run, name="session-log", daemon=True)
+        self.thread.start()
+
+    def append(self, log, record):
+        with self._cond:
+            if len(self.queue) >= self.max_queued:
+                self.records_dropped += 1
+                metrics.SESSION_LOG_DROPPED.inc()
+                return
+            self.queue.append((log, record))
+            self._cond.notify()
+
+    def close_log(self, log):
+        """Closes `log` once the records queued before this call are written."""
+        with self._cond:
+            self.queue.append((log, None))
+            self._cond.notify()
+
+    def _run(self):
+        dirty = set()
+        last_flush = time.time()
+        while True:
+            with self._cond:
+                while not self.queue and not self._stopped:
+                    self._cond.wait(self.flush_interval if dirty else None)
+                    if dirty and time.time() - last_flush >= self.flush_interval:
+                        break
+                if self._stopped and not self.queue and not dirty:
+                    return
+                batch = list(self.queue)
+                self.queue.clear()
+
+            # Consecutive records for the same log are appended in one copy
+            pending = {}
+            for log, record in batch:
+                if record is not None:
+                    pending.setdefault(log, []).append(record)
+                    continue
+                self._write(log, pending.pop(log, None))
+                dirty.discard(log)
+                try:
+                    log.close()
+                except OSError as e:
+                    print(f"❌ Could not close session log {log.path}: {e}")
+            for log, records in pending.items():
+                self._write(log, records)
+                dirty.add(log)
+
+            if dirty and (self._stopped or time.time() - last_flush >= self.flush_interval):
+                for log in dirty:
+                    try:
+                        log.flush()
+                    except (OSError, ValueError) as e:
+                        print(f"❌ Could not flush session log {log.path}: {e}")
+                dirty.clear()
+                last_flush = time.time()
+
+    def _write(self, log, records):
+        if not records:
+            return
+        try:
+            with metrics.timer("session_log"):
+                log.append(records)
+            self.records_written += len(records)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not write session log {log.path}: {e}")
+
+    def stats(self):
+        with self._cond:
+            return {"queued": len(self.queue), "records_written": self.records_written,
+                    "records_dropped": self.records_dropped}
+
+    def close(self, timeout=5.0):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self.thread.join(timeout=timeout)
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        header = np.frombuffer(f.read(HEADER.itemsize), HEADER)[0]
+    if header["magic"] != MAGIC:
+        raise ValueError(f"{path} is not a session log")
+    if header["version"] != VERSION:
+        raise ValueError(f"{path} has unsupported session log version {header['version']}")
+    return header
+
+
+def open_session_log(path):
+    """The committed records of a session log as a read-only structured array, mapped without copying.
+
+    Works on a log that is still being written: it shows the records
+    committed when it was opened.
+    """
+    header = read_header(path)
+    dtype = record_dtype(bool(header["landmarks"]))
+    if header["record_size"] != dtype.itemsize:
+        raise ValueError(f"{path} has {header['record_size']}-byte records, expected {dtype.itemsize}")
+    count = int(header["count"])
+    if count == 0:
+        return np.zeros(0, dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=int(header["header_size"]), shape=(count,))
@@ -0,0 +1,347 @@
+import hmac
+import os
+import secrets
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from event_sender import EventSender
+from focus_aggregates import FocusAggregates
+from frame_sources import REDUCE_FACTORS, UploadSource
+from pipeline import VisionPipeline, utc_timestamp
+from session_log import SessionLog, SessionLogWriter, frame_record
+from state_store import StateStore
+from state_stream import StateBroadcaster
+
+
+class VisionSession:
+    """Detection state for one logged-in user.
+
+    Uploaded frames land in an UploadSource (newest wins, decoded only
+    when taken) and are analysed on the shared worker pool, one frame at a
+    time per session. `upload_reduce` decodes them at 1/n size.
+    Every processed frame also updates the session's windowed
+    FocusAggregates. With a `log` (SessionLog), it gets a record too,
+    written by the shared `log_writer`. With a `summary_interval`, the
+    event sender gets the state plus a `summary` of the aggregates every
+    that many seconds instead of on every change. `token` is the secret the
+    browser extension, which has no session cookie, reads the session with.
+    """
+
+    def __init__(self, session_id, user_email, pool, event_sender=None, pipeline_factory=VisionPipeline,
+                 history_size=1024, pipeline=None, release_pipeline=None, log=None, log_writer=None,
+                 summary_interval=0, upload_reduce=1):
+        self.session_id = session_id
+        self.user_email = user_email
+        self.token = secrets.token_urlsafe(32)
+        self.pool = pool
+        self.event_sender = event_sender
+
+        self.state = StateStore({
+            "emotion": "neutral",
+            "focus": "focused",
+            "thumbs_up": "not_detected",
+            "wave": "not_detected",
+            "timestamp": utc_timestamp(),
+            "user_email": user_email,
+            "current_tab_url": ""
+        }, history=history_size)
+
+        self.state_stream = StateBroadcaster()
+        self.state_stream.publish(self.latest_data)
+
+        self.pipeline = pipeline if pipeline is not None else pipeline_factory()
+        # Called once the session is done with the pipeline; the manager pools it for the next login
+        self._release_pipeline = release_pipeline or (lambda p: p.release())
+        self.frames_received = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.log = log
+        self.log_writer = log_writer
+        self.aggregates = FocusAggregates()
+        self.summary_interval = summary_interval
+        self._next_summary = 0.0
+
+        self._lock = threading.Lock()
+        self.source = UploadSource(upload_reduce)
+        self._busy = False
+        self._stopped = threading.Event()
+
+    @property
+    def latest_data(self):
+        # Immutable snapshot; safe to read from any thread
+        return self.state.snapshot
+
+    @property
+    def closed(self):
+        return self._stopped.is_set()
+
+    def submit_jpeg(self, data):
+        with self._lock:
+            if self.closed:
+                return False
+            self.frames_received += 1
+            metrics.FRAMES_RECEIVED.inc()
+            if self.source.push(data):
+                self.frames_dropped += 1
+                metrics.FRAMES_DROPPED.inc()
+            if self._busy:
+                return True
+            self._busy = True
+        self.pool.submit(self._process_pending)
+        return True
+
+    def _process_pending(self):
+        with self._lock:
+            data, received_at = self.source.take()
+            if data is None or self.closed:
+                self._finish_locked()
+                return
+
+        try:
+            frame = self.source.decode(data)
+            if frame is None:
+                print(f"❌ [{self.session_id[:8]}] Could not decode uploaded frame")
+            else:
+                result = self.pipeline.process(frame, received_at)
+                snapshot = self.state.publish(result)
+                detail = self.pipeline.frame_detail(self.log is not None and self.log.landmarks)
+                self.aggregates.add(received_at, result, detail[2])
+                if self.log is not None:
+                    self.log_writer.append(self.log, frame_record(received_at, self.frames_processed, result, detail))
+                self.frames_processed += 1
+                metrics.FRAMES_PROCESSED.inc()
+                self.state_stream.publish(snapshot)
+                if self.event_sender is not None:
+                    self._send(snapshot, received_at)
+        except Exception as e:
+            print(f"Error processing frame for {self.user_email}: {e}")
+
+        # Re-queue behind other sessions rather than looping, so one busy
+        # session cannot monopolise a worker.
+        with self._lock:
+            if not self.source.pending or self.closed:
+                self._finish_locked()
+                return
+        self.pool.submit(self._process_pending)
+
+    def _send(self, snapshot, received_at):
+        if not self.summary_interval:
+            self.event_sender.publish(snapshot)
+        elif received_at >= self._next_summary:
+            # Downstream work then follows the summary rate rather than every state change
+            self._next_summary = received_at + self.summary_interval
+            self.event_sender.publish({**snapshot, "summary": self.aggregates.summary(received_at)})
+
+    def _finish_locked(self):
+        self._busy = False
+        if self.closed:
+            self._release_locked()
+
+    def _release_locked(self):
+        self._release_pipeline(self.pipeline)
+        if self.log is not None:
+            self.log_writer.close_log(self.log)
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self._stopped.set()
+            self.source.release()
+            # A worker that is mid-frame releases the models (and closes the log) when it finishes.
+            if not self._busy:
+                self._release_locked()
+        self.state_stream.close()
+        if self.event_sender is not None:
+            self.event_sender.forget(self.user_email)
+
+
+class SessionManager:
+    def __init__(self, max_workers=None, max_sessions=32, remote_url=None, heartbeat_interval=5,
+                 event_queue_path=None, pipeline_factory=VisionPipeline, history_size=1024, pooled_pipelines=2,
+                 session_log_dir=None, session_log_landmarks=False, summary_interval=0, upload_reduce=1):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pipeline_factory = pipeline_factory
+        # Pipelines from logged-out sessions are reset and kept (up to `pooled_pipelines`)
+        # so the next login doesn't reload every model
+        self.pooled_pipelines = pooled_pipelines
+        self.ready = threading.Event()
+        self.warm_up_seconds = None
+        self._idle_pipelines = []
+        self._warming = 0
+        self._pipelines_changed = threading.Condition()
+        self._shut_down = False
+        self.history_size = history_size
+        self.max_sessions = max_sessions
+        self.remote_url = remote_url
+        self.summary_interval = summary_interval
+        if upload_reduce not in REDUCE_FACTORS:
+            raise ValueError(f"upload_reduce must be one of {', '.join(map(str, REDUCE_FACTORS))}")
+        self.upload_reduce = upload_reduce
+        # One sender and one pooled connection for every session
+        self.event_sender = None
+        if remote_url:
+            # Summaries already go out regularly; heartbeats only cover a stream that stopped sending frames
+            self.event_sender = EventSender(remote_url, heartbeat_interval=max(heartbeat_interval, summary_interval),
+                                            queue_path=event_queue_path)
+        # Per-session binary frame logs (<session id>.vlog), written by one shared thread
+        self.session_log_dir = session_log_dir
+        self.session_log_landmarks = session_log_landmarks
+        self.log_writer = None
+        if session_log_dir:
+            os.makedirs(session_log_dir, exist_ok=True)
+            self.log_writer = SessionLogWriter()
+        self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vision-worker")
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def warm_up(self, count=1):
+        """Loads and warms `count` pipelines in the background; `ready` is set once they are pooled."""
+        if count <= 0:
+            self.ready.set()
+            return
+        with self._pipelines_changed:
+            self._warming += count
+        threading.Thread(target=self._warm_pipelines, args=(count,), name="vision-warm-up", daemon=True).start()
+
+    def _warm_pipelines(self, count):
+        start = time.perf_counter()
+        warmed = 0
+        for _ in range(count):
+            pipeline = None
+            try:
+                pipeline = self.pipeline_factory()
+                pipeline.warm_up()
+                warmed += 1
+            except Exception as e:
+                print(f"❌ Pipeline warm-up failed: {e}")
+                if pipeline is not None:
+                    pipeline.release()
+                    pipeline = None
+            with self._pipelines_changed:
+                self._warming -= 1
+                if pipeline is not None and not self._shut_down:
+                    self._idle_pipelines.append(pipeline)
+                    pipeline = None
+                self._pipelines_changed.notify_all()
+            if pipeline is not None:
+                pipeline.release()
+        self.warm_up_seconds = time.perf_counter() - start
+        if warmed:
+            self.ready.set()
+            print(f"🔥 {warmed} pipeline(s) loaded and warmed up in {self.warm_up_seconds:.1f}s")
+
+    def idle_pipeline_count(self):
+        with self._pipelines_changed:
+            return len(self._idle_pipelines)
+
+    def _acquire_pipeline(self):
+        with self._pipelines_changed:
+            # Logging in during start-up waits for the pipeline being warmed instead of loading a second one
+            self._pipelines_changed.wait_for(lambda: self._idle_pipelines or not self._warming)
+            if self._idle_pipelines:
+                return self._idle_pipelines.pop()
+        return self.pipeline_factory()
+
+    def _recycle_pipeline(self, pipeline):
+        try:
+            pipeline.reset()
+        except Exception as e:
+            print(f"❌ Could not reset pipeline for reuse: {e}")
+            pipeline.release()
+            return
+        with self._pipelines_changed:
+            if not self._shut_down and len(self._idle_pipelines) < self.pooled_pipelines:
+                self._idle_pipelines.append(pipeline)
+                self._pipelines_changed.notify_all()
+                return
+        pipeline.release()
+
+    def create(self, user_email):
+        with self._lock:
+            if len(self.sessions) >= self.max_sessions:
+                return None
+            session_id = uuid.uuid4().hex
+            self.sessions[session_id] = None  # reserve the slot while models load
+
+        pipeline = log = None
+        try:
+            pipeline = self._acquire_pipeline()
+            if self.log_writer is not None:
+                log = SessionLog(os.path.join(self.session_log_dir, f"{session_id}.vlog"),
+                                 landmarks=self.session_log_landmarks)
+            vision_session = VisionSession(session_id, user_email, self.pool,
+                                           event_sender=self.event_sender,
+                                           history_size=self.history_size,
+                                           pipeline=pipeline,
+                                           release_pipeline=self._recycle_pipeline,
+                                           log=log, log_writer=self.log_writer,
+                                           summary_interval=self.summary_interval,
+                                           upload_reduce=self.upload_reduce)
+        except Exception:
+            with self._lock:
+                self.sessions.pop(session_id, None)
+            if pipeline is not None:
+                self._recycle_pipeline(pipeline)
+            if log is not None:
+                log.close()
+            raise
+
+        with self._lock:
+            # close() or shutdown() may have dropped the reservation while models loaded
+            reserved = session_id in self.sessions
+            if reserved:
+                self.sessions[session_id] = vision_session
+        if not reserved:
+            vision_session.close()
+            print(f"Vision session {session_id[:8]} for {user_email} was closed while starting")
+            return None
+        print(f"Started vision session {session_id[:8]} for {user_email} "
+              f"({len(self.sessions)}/{self.max_sessions} sessions)")
+        return vision_session
+
+    def get(self, session_id):
+        if not session_id:
+            return None
+        with self._lock:
+            return self.sessions.get(session_id)
+
+    def active_count(self):
+        with self._lock:
+            return sum(1 for s in self.sessions.values() if s is not None)
+
+    def find_by_token(self, token):
+        if not token:
+            return None
+        with self._lock:
+            sessions = [s for s in self.sessions.values() if s is not None]
+        for vision_session in sessions:
+            if hmac.compare_digest(vision_session.token, token):
+                return vision_session
+        return None
+
+    def close(self, session_id):
+        with self._lock:
+            vision_session = self.sessions.pop(session_id, None)
+        if vision_session is not None:
+            vision_session.close()
+            print(f"Closed vision session {session_id[:8]} for {vision_session.user_email}")
+
+    def shutdown(self):
+        with self._lock:
+            session_ids = list(self.sessions)
+        for session_id in session_ids:
+            self.close(session_id)
+        self.pool.shutdown(wait=True)
+        with self._pipelines_changed:
+            self._shut_down = True
+            idle, self._idle_pipelines = self._idle_pipelines, []
+        for pipeline in idle:
+            pipeline.release()
+        if self.event_sender is not None:
+            self.event_sender.close()
+        if self.log_writer is not None:
+            self.log_writer.close()
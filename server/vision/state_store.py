@@ -0,0 +1,49 @@
+import threading
+
+
+class StateStore:
+    """Versioned detection state for one session.
+
+    Every publish() builds a new snapshot dict carrying a monotonically
+    increasing "version" and swaps it in; snapshots are never mutated
+    afterwards, so readers just take `snapshot` without locking and can
+    never see half an update. The last `history` snapshots are kept in a
+    fixed-size ring indexed by version.
+    """
+
+    def __init__(self, initial, history=1024):
+        self.size = history
+        self._ring = [None] * history
+        self._write_lock = threading.Lock()
+        self.snapshot = None
+        self._store(dict(initial, version=0))
+
+    @property
+    def version(self):
+        return self.snapshot["version"]
+
+    def _store(self, snapshot):
+        self._ring[snapshot["version"] % self.size] = snapshot
+        self.snapshot = snapshot
+
+    def publish(self, updates):
+        with self._write_lock:
+            snapshot = dict(self.snapshot)
+            snapshot.update(updates)
+            snapshot["version"] = self.snapshot["version"] + 1
+            self._store(snapshot)
+        return snapshot
+
+    def since(self, version):
+        """Snapshots newer than `version`, oldest first, and whether older ones were already overwritten."""
+        latest = self.snapshot["version"]
+        oldest = max(0, latest - self.size + 1)
+        start = max(version + 1, oldest)
+        snapshots = []
+        for v in range(start, latest + 1):
+            snapshot = self._ring[v % self.size]
+            # A writer may have lapped us since we read `latest`
+            if snapshot is not None and snapshot["version"] == v:
+                snapshots.append(snapshot)
+        truncated = version + 1 < oldest or (snapshots and snapshots[0]["version"] != start)
+        return snapshots, bool(truncated)
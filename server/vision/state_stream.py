@@ -0,0 +1,75 @@
+import json
+import threading
+from collections import deque
+
+# Change with every published frame; sent along with a diff, never a diff by themselves
+VOLATILE_FIELDS = ("timestamp", "version")
+
+
+class StateBroadcaster:
+    """Fans a session's state changes out to Server-Sent Events subscribers.
+
+    publish() diffs the new state against the last one and serialises the
+    changed fields once; every subscriber is handed the same bytes. A
+    subscriber that falls more than `history` messages behind gets a fresh
+    snapshot instead of the diffs it missed.
+    """
+
+    def __init__(self, history=64, keepalive=15.0):
+        self.keepalive = keepalive
+        self.version = 0
+        self.subscribers = 0
+        self._state = {}
+        self._messages = deque(maxlen=history)  # (version, encoded message)
+        self._snapshot = (0, None)
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def publish(self, state):
+        with self._cond:
+            diff = {k: v for k, v in state.items() if k not in VOLATILE_FIELDS and self._state.get(k) != v}
+            volatile = {k: state[k] for k in VOLATILE_FIELDS if k in state}
+            self._state.update(volatile)
+            if not diff:
+                return False
+            diff.update(volatile)
+            self._state.update(diff)
+            self.version += 1
+            self._messages.append((self.version, f"data: {json.dumps(diff)}\n\n".encode()))
+            self._cond.notify_all()
+        return True
+
+    def _snapshot_locked(self):
+        if self._snapshot[0] != self.version or self._snapshot[1] is None:
+            self._snapshot = (self.version, f"event: snapshot\ndata: {json.dumps(self._state)}\n\n".encode())
+        return self._snapshot[1]
+
+    def subscribe(self):
+        """Generator of encoded SSE messages; starts with a full snapshot."""
+        with self._cond:
+            self.subscribers += 1
+            seen = self.version
+            first = self._snapshot_locked()
+        try:
+            yield first
+            while True:
+                with self._cond:
+                    if not self._cond.wait_for(lambda: self.version > seen or self._closed, self.keepalive):
+                        chunk = b": keepalive\n\n"
+                    elif self._closed:
+                        return
+                    elif self._messages and self._messages[0][0] <= seen + 1:
+                        chunk = b"".join(message for version, message in self._messages if version > seen)
+                        seen = self.version
+                    else:
+                        chunk = self._snapshot_locked()
+                        seen = self.version
+                yield chunk
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
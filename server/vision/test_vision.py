@@ -1,3 +1,4 @@
+import argparse
 import cv2
 import time
 import sys
@@ -5,9 +6,16 @@ import os
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from capture import FrameGrabber, Pacer
+from face_tracker import FaceTracker
 from focus_detector import SimpleFocusDetector
+from frame_packet import FramePacket
+from frame_sources import open_source
 from emotion_detector import EmotionDetector
+from emotion_backends import EMOTION_BACKENDS
 from gesture_detector import GestureDetector
+from latency import LatencyWindow
+from render import RENDER_FULL, RENDER_MODES, draw_overlays
 
 def draw_ui(frame, fps, focus_state, emotion_state, gesture_state):
     h, w = frame.shape[:2]
@@ -42,17 +50,24 @@ def draw_ui(frame, fps, focus_state, emotion_state, gesture_state):
     # Optional FPS top-right
     cv2.putText(frame, f"FPS: {fps:.1f}", (w - 100, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (220, 220, 220), 1)
 
-def run_all_detectors():
+def run_all_detectors(render_mode=RENDER_FULL, emotion_backend="keras", target_fps=15, source="0",
+                      source_options=None):
     print("\n🔍 Starting Focus or Die Vision Test")
-    cap = cv2.VideoCapture(0)
+    # A camera, video file or image directory (see frame_sources.open_source)
+    cap = FrameGrabber(open_source(source, **(source_options or {})))
 
     if not cap.isOpened():
-        print("🚨 Error: Cannot access webcam.")
+        print(f"🚨 Error: Cannot open frame source {source}.")
+        cap.release()
         return
 
-    focus_detector = SimpleFocusDetector()
-    emotion_detector = EmotionDetector()
-    gesture_detector = GestureDetector()
+    face_tracker = FaceTracker()
+    focus_detector = SimpleFocusDetector(render_mode=render_mode)
+    emotion_detector = EmotionDetector(render_mode=render_mode, backend=emotion_backend)
+    gesture_detector = GestureDetector(render_mode=render_mode)
+    packet = FramePacket(mirror=True)
+    pacer = Pacer(target_fps)
+    capture_latency = LatencyWindow()
 
     print("🎥 Press 'q' to quit.")
 
@@ -68,24 +83,29 @@ def run_all_detectors():
 
     try:
         while True:
-            ret, frame = cap.read()
-            if not ret:
+            # Newest frame from the capture thread; stale ones were already dropped
+            frame, captured_at = cap.read()
+            if frame is None:
                 print("❌ Failed to grab frame")
                 break
 
-            frame = cv2.flip(frame, 1)
+            # Mirror and convert to RGB once; every detector shares the result
+            packet.load(frame, captured_at)
+
+            # One face model run per frame, shared by focus and emotion
+            face_tracker.process(packet)
 
             # Process with focus detector first
-            frame, focus_state = focus_detector.process_frame(frame)
+            frame, focus_state = focus_detector.process_frame(packet)
 
             # Get emotion update if available
-            current_emotion = emotion_detector.detect_emotion(frame)
+            current_emotion = emotion_detector.detect_emotion(packet)
             if current_emotion != last_emotion:
                 last_emotion = current_emotion
                 last_emotion_time = time.time()
 
             # Get gesture update if available
-            current_gesture = gesture_detector.detect_gesture(frame)
+            current_gesture = gesture_detector.detect_gesture(packet)
             if current_gesture != last_gesture:
                 last_gesture = current_gesture
                 last_gesture_time = time.time()
@@ -98,7 +118,8 @@ def run_all_detectors():
                 frame_count = 0
                 start_time = time.time()
 
-            # Draw all UI elements
+            # Drawing is its own stage, after all detectors have run
+            draw_overlays(frame, focus_detector, emotion_detector, gesture_detector)
             draw_ui(frame, fps, focus_state, last_emotion, last_gesture)
 
             # Text console output
@@ -109,11 +130,23 @@ def run_all_detectors():
             # Display frame
             cv2.imshow("Focus or Die - Full Vision Test", frame)
 
+            capture_latency.record(time.time() - captured_at)
+
             # Check for quit
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
 
+            # Sleep only for what is left of this frame's slot
+            pacer.wait()
+
     finally:
+        stats = capture_latency.percentiles()
+        print(f"\n⏱️ Capture to result p50 {stats['p50_ms']:.1f} ms | p95 {stats['p95_ms']:.1f} ms | "
+              f"{cap.frames_dropped}/{cap.frames_captured} camera frames dropped")
+        stats = emotion_detector.inference_latency.percentiles()
+        print(f"⏱️ Emotion inference p50 {stats['p50_ms']:.1f} ms | p95 {stats['p95_ms']:.1f} ms | "
+              f"max {stats['max_ms']:.1f} ms (off the frame loop)")
+        face_tracker.release()
         focus_detector.release()
         emotion_detector.release()
         gesture_detector.release()
@@ -122,4 +155,18 @@ def run_all_detectors():
         print("\n✅ Vision test completed.")
 
 if __name__ == "__main__":
-    run_all_detectors()
+    parser = argparse.ArgumentParser(description="Run all detectors on the webcam with overlays")
+    parser.add_argument("--render", choices=RENDER_MODES, default=RENDER_FULL, help="Detector overlay detail")
+    parser.add_argument("--emotion-backend", choices=EMOTION_BACKENDS, default="keras", help="Emotion model to use")
+    parser.add_argument("--fps", type=float, default=15, help="Target analysis rate")
+    parser.add_argument("--source", default="0", help="Camera index, video file or image directory")
+    parser.add_argument("--width", type=int, help="Capture width to ask the camera for")
+    parser.add_argument("--height", type=int, help="Capture height to ask the camera for")
+    parser.add_argument("--camera-fps", type=float, help="Frame rate to ask the camera for (image directories: playback rate)")
+    parser.add_argument("--fourcc", help="Pixel format to ask the camera for, e.g. MJPG")
+    parser.add_argument("--loop", action="store_true", help="Replay a video file or image directory forever")
+    args = parser.parse_args()
+    run_all_detectors(render_mode=args.render, emotion_backend=args.emotion_backend, target_fps=args.fps,
+                      source=args.source,
+                      source_options={"width": args.width, "height": args.height, "fps": args.camera_fps,
+                                      "fourcc": args.fourcc, "loop": args.loop})